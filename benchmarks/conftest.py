@@ -0,0 +1,161 @@
+"""Pytest fixtures for the benchmarks.
+
+The benchmarks run offline and are not collected by default.  Run them
+with:
+
+    pytest benchmarks
+
+Parametrised sizes larger than `--benchmark-max-size` (default: 10000) are
+skipped.  Use `--benchmark-max-size=100000` to run the full range and
+`--benchmark-json=FILE` to save the results for later comparison with
+`pytest-benchmark compare`.
+
+Note that adding instances and relations to a DLite collection takes time
+proportional to the size of the collection, so setting up the largest
+collections takes minutes.
+
+In addition to the timings recorded by pytest-benchmark, the `profile`
+fixture records the throughput, latency percentiles and peak memory of
+each benchmark in its extra info.
+"""
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+    from typing import Any
+
+# Default value of `--benchmark-max-size`.
+DEFAULT_MAX_SIZE = 10_000
+
+# Latency percentiles recorded by the `profile` fixture.
+PERCENTILES = (50, 90, 99)
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the `--benchmark-max-size` command line option."""
+    parser.addoption(
+        "--benchmark-max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help="Skip benchmarks parametrised with a larger size.",
+    )
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: "list[pytest.Item]"
+) -> None:
+    """Skip benchmarks with a size larger than `--benchmark-max-size`."""
+    max_size = config.getoption("--benchmark-max-size")
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        if callspec is None:
+            continue
+        sizes = [
+            value
+            for name, value in callspec.params.items()
+            if name.startswith("n") and isinstance(value, int)
+        ]
+        if any(size > max_size for size in sizes):
+            item.add_marker(
+                pytest.mark.skip(reason="size > --benchmark-max-size")
+            )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def load_strategies() -> None:
+    """Load pip installed plugin strategies."""
+    from oteapi.plugins import load_strategies
+
+    load_strategies()
+
+
+@pytest.fixture(scope="session")
+def entities_path() -> "Path":
+    """Absolute path to the entities directory used by the tests."""
+    from pathlib import Path
+
+    import dlite
+
+    path = Path(__file__).resolve().parent.parent / "tests" / "entities"
+    dlite.storage_path.append(path)
+    return path
+
+
+@pytest.fixture
+def make_collection(entities_path: "Path") -> "Callable[..., Any]":
+    """Return a function creating a synthetic collection.
+
+    The returned function has the signature `make_collection(ninstances=0,
+    ntriples=0)`.  The collection is populated with `ninstances` Energy
+    instances labelled "energy<n>" and `ntriples` mapping triples that are
+    not connected to any datamodel.
+    """
+    # pylint: disable=redefined-outer-name,unused-argument
+    import dlite
+    from tripper import MAP
+
+    def make(ninstances: int = 0, ntriples: int = 0) -> dlite.Collection:
+        coll = dlite.Collection()
+        Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+        for n in range(ninstances):
+            energy = Energy()
+            energy.energy = float(n)
+            coll.add(f"energy{n}", energy)
+        for n in range(ntriples):
+            coll.add_relation(
+                f"http://example.com/meta/0.1/Item{n}#value",
+                MAP.mapsTo,
+                f"http://example.com/onto#Concept{n}",
+            )
+        return coll
+
+    return make
+
+
+@pytest.fixture
+def profile(benchmark) -> "Callable[..., Any]":
+    """Return a function benchmarking a callable with extended statistics.
+
+    The returned function has the signature `profile(func, *args,
+    items=1, **kwargs)`.  It benchmarks `func(*args, **kwargs)` and records
+    the following extra info:
+
+    - `throughput`: `items` processed per second, based on the mean time.
+    - `p50`, `p90`, `p99`: Latency percentiles in seconds.
+    - `peak_memory`: Peak memory in bytes allocated through Python and
+      NumPy during one additional call, as traced by `tracemalloc`.
+      Memory allocated directly by DLite is not included.
+
+    With `--benchmark-disable`, `func` is only called once and no extra info
+    is recorded.
+    """
+    import tracemalloc
+
+    import numpy as np
+
+    def run(func, *args, items: int = 1, **kwargs):
+        result = benchmark(func, *args, **kwargs)
+        if benchmark.disabled:
+            return result
+
+        timings = np.asarray(benchmark.stats.stats.data)
+        benchmark.extra_info["throughput"] = items / timings.mean()
+        for percentile in PERCENTILES:
+            benchmark.extra_info[f"p{percentile}"] = float(
+                np.percentile(timings, percentile)
+            )
+
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory"] = peak
+        return result
+
+    return run
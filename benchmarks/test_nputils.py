@@ -0,0 +1,64 @@
+"""Benchmarks for converting parsed tables to numpy rec arrays.
+
+Run with:
+
+    pytest benchmarks/test_nputils.py
+
+Compares `dict2recarray()` with the original per-value implementation,
+which is included below for reference, on a tall and a wide table with
+numerical, categorical and missing values.
+"""
+
+import pytest
+
+SHAPES = {"tall": (1_000_000, 4), "wide": (1_000, 400)}
+
+
+def _reference_dict2recarray(excel_dict, names=None):
+    """The original implementation of `dict2recarray()`."""
+    import numpy as np
+
+    arrays = []
+    for arr in excel_dict.values():
+        if all(
+            isinstance(v, (bool, int, float, complex, None.__class__))
+            for v in arr
+        ):
+            arrays.append([np.nan if v is None else v for v in arr])
+        elif all(isinstance(v, (str, bytes, None.__class__)) for v in arr):
+            arrays.append(["" if v is None else v for v in arr])
+        else:
+            arrays.append(arr)
+        if names is None:
+            names = list(excel_dict.keys())
+    return np.rec.fromarrays(arrays, names=names)
+
+
+def _table(nrows: int, ncols: int) -> "dict[str, list]":
+    """Return a table in the format returned by the Excel parser."""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    columns = [
+        lambda: rng.integers(0, 1000, nrows).tolist(),
+        lambda: [None if v < 0.01 else v for v in rng.random(nrows).tolist()],
+        lambda: rng.choice(["low", "medium", "high", None], nrows).tolist(),
+        lambda: [v < 0.5 for v in rng.random(nrows).tolist()],
+    ]
+    return {f"col{n}": columns[n % len(columns)]() for n in range(ncols)}
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_dict2recarray(benchmark, shape: str) -> None:
+    """Convert a table with `dict2recarray()`."""
+    from oteapi_dlite.utils import dict2recarray
+
+    table = _table(*SHAPES[shape])
+    benchmark(dict2recarray, table)
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_reference_dict2recarray(benchmark, shape: str) -> None:
+    """Reference: convert a table with the original implementation."""
+    table = _table(*SHAPES[shape])
+    benchmark(_reference_dict2recarray, table)
@@ -0,0 +1,112 @@
+"""Benchmarks for concurrent evaluation of property mappings.
+
+Run with:
+
+    pytest benchmarks/test_parallel.py
+
+Each property of the target datamodel is computed by its own call to a
+CPU-bound conversion function.  Serial evaluation is compared to thread
+and process pools with an increasing number of workers.  Process pools
+scale with the number of available cores, while thread pools only help
+for conversion functions that release the GIL.
+"""
+
+import pytest
+
+# Number of properties of the target datamodel.
+NPROPS = 8
+
+# Number of workers in the pools.
+WORKER_SIZES = [1, 2, 4, 8]
+
+ONTO = "http://example.com/onto#"
+
+
+def expensive(x):
+    """A CPU-bound conversion function."""
+    total = 0.0
+    for i in range(200_000):
+        total += (x * i) % 7
+    return total
+
+
+@pytest.fixture
+def parallel_collection():
+    """A collection with a source instance and mappings to every property
+    of the target datamodel through `expensive()`."""
+    import dlite
+    from tripper import Triplestore
+
+    dlite.Instance.create_metadata(
+        "http://example.com/meta/0.1/ParallelSource",
+        [],
+        [dlite.Property("x", "float64")],
+        "Source of the parallel benchmarks.",
+    )
+    dlite.Instance.create_metadata(
+        "http://example.com/meta/0.1/ParallelTarget",
+        [],
+        [dlite.Property(f"y{n}", "float64") for n in range(NPROPS)],
+        "Target of the parallel benchmarks.",
+    )
+    coll = dlite.Collection()
+    source = dlite.Instance.from_metaid(
+        "http://example.com/meta/0.1/ParallelSource", []
+    )
+    source.x = 3.0
+    coll.add("source", source)
+
+    ts = Triplestore(backend="collection", collection=coll)
+    ts.add_mapsTo(ONTO + "X", "http://example.com/meta/0.1/ParallelSource#x")
+    for n in range(NPROPS):
+        ts.add_mapsTo(
+            ONTO + f"Y{n}", f"http://example.com/meta/0.1/ParallelTarget#y{n}"
+        )
+        ts.add_function(
+            expensive,
+            expects=[ONTO + "X"],
+            returns=[ONTO + f"Y{n}"],
+            base_iri=ONTO,
+        )
+    return coll
+
+
+def test_get_instance_serial(profile, parallel_collection) -> None:
+    """Evaluate all property mappings in the calling thread."""
+    from oteapi_dlite.utils import get_instance
+
+    profile(
+        get_instance,
+        "http://example.com/meta/0.1/ParallelTarget",
+        parallel_collection,
+        items=NPROPS,
+    )
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+@pytest.mark.parametrize("workers", WORKER_SIZES)
+def test_get_instance_parallel(
+    profile, parallel_collection, pool: str, workers: int
+) -> None:
+    """Evaluate the property mappings concurrently in a pool."""
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    from oteapi_dlite.utils import get_instance
+
+    executor_class = (
+        ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    )
+    with executor_class(max_workers=workers) as executor:
+        # Start the workers and let them cache the route plan
+        get_instance(
+            "http://example.com/meta/0.1/ParallelTarget",
+            parallel_collection,
+            executor=executor,
+        )
+        profile(
+            get_instance,
+            "http://example.com/meta/0.1/ParallelTarget",
+            parallel_collection,
+            executor=executor,
+            items=NPROPS,
+        )
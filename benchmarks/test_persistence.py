@@ -0,0 +1,108 @@
+"""Benchmarks for incremental collection persistence.
+
+Run with:
+
+    pytest benchmarks/test_persistence.py
+
+The wall time and the number of bytes written to the datacache per
+`update_collection()` stay flat as the collection grows, while writing
+the full JSON grows linearly.  `test_save_collection` times the save
+alone, `test_full_asjson_save` the full JSON write it replaces.  The
+bytes written per step are reported as `written_bytes` in the extra info
+of each benchmark.
+"""
+
+import pytest
+
+SIZES = [100, 1_000, 10_000]
+
+
+def _populated_collection(nrelations: int):
+    """Return a new collection with `nrelations` relations."""
+    import dlite
+
+    coll = dlite.Collection()
+    for i in range(nrelations):
+        coll.add_relation(f"s{i}", "p", f"o{i}")
+    return coll
+
+
+@pytest.mark.parametrize("nrelations", SIZES)
+def test_update_collection_step(benchmark, nrelations: int) -> None:
+    """One pipeline step: add a relation and persist the collection."""
+    import pickle
+
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils import update_collection
+    from oteapi_dlite.utils.persistence import journal_key
+
+    coll = _populated_collection(nrelations)
+    update_collection(coll)
+    counter = iter(range(10**9))
+
+    def step():
+        coll.add_relation(f"step{next(counter)}", "p", "o")
+        update_collection(coll)
+
+    benchmark(step)
+
+    cache = DataCache()
+    nentries = cache.get(journal_key(coll.uuid))
+    if nentries:
+        delta = cache.get(journal_key(coll.uuid, nentries - 1))
+        benchmark.extra_info["written_bytes"] = len(pickle.dumps(delta))
+
+
+@pytest.mark.parametrize("nrelations", SIZES)
+def test_full_asjson_step(benchmark, nrelations: int) -> None:
+    """Reference: one pipeline step writing the full collection JSON."""
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import collection_asjson
+
+    coll = _populated_collection(nrelations)
+    counter = iter(range(10**9))
+
+    def step():
+        coll.add_relation(f"step{next(counter)}", "p", "o")
+        DataCache().add(collection_asjson(coll), key=coll.uuid)
+
+    benchmark(step)
+    benchmark.extra_info["written_bytes"] = len(collection_asjson(coll))
+
+
+@pytest.mark.parametrize("nrelations", SIZES)
+def test_save_collection(benchmark, nrelations: int) -> None:
+    """Wall time of saving a collection with one new relation."""
+    from oteapi_dlite.utils.persistence import save_collection
+
+    coll = _populated_collection(nrelations)
+    save_collection(coll)
+    counter = iter(range(10**9))
+
+    def setup():
+        coll.add_relation(f"step{next(counter)}", "p", "o")
+
+    benchmark.pedantic(
+        save_collection, args=(coll,), setup=setup, rounds=50, warmup_rounds=1
+    )
+
+
+@pytest.mark.parametrize("nrelations", SIZES)
+def test_full_asjson_save(benchmark, nrelations: int) -> None:
+    """Reference: wall time of writing the full collection JSON."""
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import collection_asjson
+
+    coll = _populated_collection(nrelations)
+    counter = iter(range(10**9))
+
+    def setup():
+        coll.add_relation(f"step{next(counter)}", "p", "o")
+
+    def save():
+        DataCache().add(collection_asjson(coll), key=coll.uuid)
+
+    benchmark.pedantic(save, setup=setup, rounds=50, warmup_rounds=1)
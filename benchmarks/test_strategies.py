@@ -0,0 +1,128 @@
+"""Benchmarks for the registered strategies.
+
+Run with:
+
+    pytest benchmarks/test_strategies.py
+"""
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Number of instances and mapping triples in the synthetic collections.
+INSTANCE_SIZES = [10, 1_000, 10_000]
+TRIPLE_SIZES = [10, 1_000, 100_000]
+
+# Image shapes for small and large array properties.
+IMAGE_SHAPES = {"small": (8, 8, 1), "large": (512, 512, 3)}
+
+
+@pytest.mark.parametrize("ninstances", INSTANCE_SIZES)
+def test_parse_json(
+    profile, make_collection, tmp_path: "Path", ninstances: int
+) -> None:
+    """Parse a JSON document into a collection with existing instances."""
+    import json
+
+    from oteapi_dlite.strategies.parse_json import (
+        DLiteJsonStrategy,
+        DLiteJsonStrategyConfig,
+    )
+    from oteapi_dlite.utils import update_collection
+
+    sample_file = tmp_path / "hallpetch.json"
+    sample_file.write_text(json.dumps({"theta0": 50, "k": 0.02, "d": 5e-4}))
+
+    coll = make_collection(ninstances)
+    update_collection(coll)
+    config = DLiteJsonStrategyConfig.model_validate(
+        {
+            "entity": "http://onto-ns.com/meta/0.4/HallPetch",
+            "parserType": "json/vnd.dlite-json",
+            "configuration": {
+                "collection_id": coll.uuid,
+                "downloadUrl": sample_file.as_uri(),
+                "mediaType": "application/json",
+            },
+        }
+    )
+
+    counter = iter(range(10**9))
+
+    def parse():
+        config.configuration.label = f"json-data{next(counter)}"
+        return DLiteJsonStrategy(config).get()
+
+    profile(parse)
+
+
+@pytest.mark.parametrize("shape", IMAGE_SHAPES)
+@pytest.mark.parametrize("chunk_size", [None, 2**20], ids=["bytes", "stream"])
+def test_generate(
+    profile, entities_path: "Path", shape: str, chunk_size: "int | None"
+) -> None:
+    """Serialise an image to the datacache."""
+    # pylint: disable=unused-argument
+    import dlite
+    import numpy as np
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+    from oteapi_dlite.utils import get_meta
+
+    coll = dlite.Collection()
+    Image = get_meta("http://onto-ns.com/meta/1.0/Image")
+    image = Image(IMAGE_SHAPES[shape])
+    image.data = np.random.default_rng(0).integers(
+        0, 256, IMAGE_SHAPES[shape], dtype=np.uint8
+    )
+    coll.add("image", image)
+    config = DLiteGenerateConfig(
+        functionType="application/vnd.dlite-generate",
+        configuration={
+            "label": "image",
+            "driver": "json",
+            "chunk_size": chunk_size,
+            "collection_id": coll.uuid,
+            "datacache_config": {"accessKey": "benchmark-image"},
+        },
+    )
+
+    profile(DLiteGenerateStrategy(config).get, items=image.data.nbytes)
+
+
+@pytest.mark.parametrize("ntriples", TRIPLE_SIZES)
+def test_mapping(profile, ntriples: int) -> None:
+    """Add mapping triples to a new collection."""
+    import dlite
+    from tripper import MAP
+
+    from oteapi_dlite.strategies.mapping import (
+        DLiteMappingConfig,
+        DLiteMappingStrategy,
+    )
+
+    triples = [
+        (
+            f"http://example.com/meta/0.1/Item{n}#value",
+            MAP.mapsTo,
+            f"http://example.com/onto#Concept{n}",
+        )
+        for n in range(ntriples)
+    ]
+
+    def initialize():
+        coll = dlite.Collection()
+        config = DLiteMappingConfig(
+            mappingType="mappings",
+            triples=triples,
+            configuration={"collection_id": coll.uuid},
+        )
+        return DLiteMappingStrategy(config).initialize()
+
+    profile(initialize, items=ntriples)
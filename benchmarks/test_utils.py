@@ -0,0 +1,80 @@
+"""Benchmarks for the collection and instantiation utilities.
+
+Run with:
+
+    pytest benchmarks/test_utils.py
+"""
+
+import pytest
+
+# Number of instances and mapping triples in the synthetic collections.
+INSTANCE_SIZES = [10, 1_000, 10_000]
+TRIPLE_SIZES = [10, 1_000, 100_000]
+
+
+@pytest.mark.parametrize("ninstances", INSTANCE_SIZES)
+def test_get_collection(profile, make_collection, ninstances: int) -> None:
+    """Load a collection from the datacache in a fresh interpreter."""
+    from oteapi_dlite.utils import get_collection, update_collection
+    from oteapi_dlite.utils.persistence import clear_live_cache
+
+    coll = make_collection(ninstances)
+    update_collection(coll)
+
+    def load():
+        clear_live_cache()
+        return get_collection(collection_id=coll.uuid)
+
+    profile(load, items=ninstances)
+
+
+@pytest.mark.parametrize("ninstances", INSTANCE_SIZES)
+def test_update_collection(profile, make_collection, ninstances: int) -> None:
+    """Add an instance to a collection and persist it."""
+    import dlite
+
+    from oteapi_dlite.utils import update_collection
+
+    coll = make_collection(ninstances)
+    update_collection(coll)
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+    counter = iter(range(10**9))
+
+    def step():
+        coll.add(f"step{next(counter)}", Energy())
+        update_collection(coll)
+
+    profile(step)
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "warm"])
+@pytest.mark.parametrize("ntriples", TRIPLE_SIZES)
+def test_get_instance(
+    profile, make_collection, ntriples: int, cached: bool
+) -> None:
+    """Instantiate a Result from a collection with mapping triples."""
+    import dlite
+    from tripper import EMMO, MAP
+
+    from oteapi_dlite.utils.utils import clear_route_plan_cache, get_instance
+
+    coll = make_collection(1, ntriples)
+    Forces = dlite.get_instance("http://onto-ns.com/meta/0.1/Forces")
+    coll.add("forces", Forces(dimensions={"natoms": 10, "ncoords": 3}))
+    meta = "http://onto-ns.com/meta/0.1"
+    result = f"{meta}/Result"
+    for triple in [
+        (f"{meta}/Energy#energy", MAP.mapsTo, EMMO.PotentialEnergy),
+        (f"{meta}/Forces#forces", MAP.mapsTo, EMMO.Force),
+        (f"{result}#potential_energy", MAP.mapsTo, EMMO.PotentialEnergy),
+        (f"{result}#forces", MAP.mapsTo, EMMO.Force),
+    ]:
+        coll.add_relation(*triple)
+
+    def instantiate():
+        if not cached:
+            clear_route_plan_cache()
+        return get_instance(result, coll)
+
+    clear_route_plan_cache()
+    profile(instantiate)
@@ -0,0 +1,243 @@
+"""Filter strategy selecting instances and rows of a DLite collection."""
+
+# pylint: disable=invalid-name
+import fnmatch
+import logging
+from typing import TYPE_CHECKING, Annotated, Optional
+
+import dlite
+from oteapi.models import AttrDict, FilterConfig
+from pydantic import Field
+from pydantic.dataclasses import dataclass
+
+from oteapi_dlite.models import DLiteSessionUpdate
+from oteapi_dlite.utils import get_collection, update_collection
+from oteapi_dlite.utils.aio import run_blocking
+from oteapi_dlite.utils.persistence import get_index, get_relations
+from oteapi_dlite.utils.query import compile_query, filter_instance
+
+if TYPE_CHECKING:  # pragma: no cover
+    from oteapi_dlite.utils.indexes import CollectionIndex
+
+    Pattern = tuple[Optional[str], Optional[str], Optional[str]]
+
+logger = logging.getLogger(__name__)
+
+
+class DLiteFilterStrategyConfig(AttrDict):
+    """Configuration for a DLite filter.
+
+    Instances are selected from the collection by `label_pattern`,
+    `datamodel` and `relation`.  All given criteria must be fulfilled.
+    The rows of the selected instances are then filtered with the `query`
+    and `limit` fields of the filter config, see
+    `oteapi_dlite.utils.query`.
+    """
+
+    collection_id: Annotated[
+        Optional[str],
+        Field(description="A reference to the DLite collection to filter."),
+    ] = None
+    label_pattern: Annotated[
+        Optional[str],
+        Field(
+            description=(
+                "Glob pattern matching the labels of the instances to select."
+            ),
+        ),
+    ] = None
+    datamodel: Annotated[
+        Optional[str],
+        Field(description="URI of the datamodel of the instances to select."),
+    ] = None
+    relation: Annotated[
+        Optional[tuple[Optional[str], Optional[str], Optional[str]]],
+        Field(
+            description=(
+                "A (subject, predicate, object) pattern, where None matches "
+                "anything.  Selects the instances whose labels are the "
+                "subject or object of a matching relation."
+            ),
+        ),
+    ] = None
+    output_collection_id: Annotated[
+        Optional[str],
+        Field(
+            description=(
+                "Id of the new collection holding the selected instances.  "
+                "Defaults to a random UUID."
+            ),
+        ),
+    ] = None
+    keep_relations: Annotated[
+        bool,
+        Field(
+            description=(
+                "Whether to copy the relations of the collection that do not "
+                "describe instances, like property mappings, to the new "
+                "collection."
+            ),
+        ),
+    ] = True
+
+
+class DLiteFilterConfig(FilterConfig):
+    """DLite filter strategy config."""
+
+    configuration: Annotated[
+        DLiteFilterStrategyConfig,
+        Field(
+            description="DLite filter strategy-specific configuration.",
+        ),
+    ] = DLiteFilterStrategyConfig()
+
+
+@dataclass
+class DLiteFilterStrategy:
+    """Filter strategy selecting instances and rows of a DLite collection.
+
+    The selected instances are added to a new collection under the same
+    labels, which is returned as the collection of the session.  Instances
+    whose rows are not all selected by `query` are replaced with new
+    instances holding only the selected rows.  Other instances are shared
+    with the original collection, such that the new collection is
+    lightweight.
+
+    Instances without the properties referenced by `query` are not
+    selected.
+
+    **Registers strategies**:
+
+    - `("filterType", "dlite/filter")`
+
+    """
+
+    filter_config: DLiteFilterConfig
+
+    def initialize(self) -> DLiteSessionUpdate:
+        """Initialize strategy."""
+        return DLiteSessionUpdate(
+            collection_id=(
+                self.filter_config.configuration.collection_id
+                or get_collection().uuid
+            )
+        )
+
+    def get(self) -> DLiteSessionUpdate:
+        """Execute strategy and return a dictionary."""
+        config = self.filter_config.configuration
+        coll = get_collection(collection_id=config.collection_id)
+        index = get_index(coll)
+        query = (
+            compile_query(self.filter_config.query)
+            if self.filter_config.query
+            else None
+        )
+
+        new = dlite.Collection(id=config.output_collection_id)
+        for label in select_labels(
+            coll,
+            label_pattern=config.label_pattern,
+            datamodel=config.datamodel,
+            relation=config.relation,
+            index=index,
+        ):
+            inst = coll.get(label)
+            if query is not None:
+                if not all(inst.has_property(name) for name in query.names):
+                    logger.debug(
+                        "Skipping %s without queried properties", label
+                    )
+                    continue
+                inst = filter_instance(inst, query, self.filter_config.limit)
+                if inst is None:
+                    continue
+            new.add(label, inst)
+
+        if config.keep_relations:
+            relations = (
+                (
+                    r
+                    for p in index.get_predicates()
+                    for r in index.get_relations(p)
+                )
+                if index
+                else get_relations(coll)
+            )
+            for s, p, o, d in relations:
+                if not p.startswith("_"):
+                    new.add_relation(s, p, o, d)
+
+        update_collection(new)
+        return DLiteSessionUpdate(collection_id=new.uuid)
+
+    async def ainitialize(self) -> DLiteSessionUpdate:
+        """Initialize strategy asynchronously.
+
+        Like `initialize()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.initialize)
+
+    async def aget(self) -> DLiteSessionUpdate:
+        """Execute strategy asynchronously.
+
+        Like `get()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.get)
+
+
+def select_labels(
+    coll: dlite.Collection,
+    label_pattern: "Optional[str]" = None,
+    datamodel: "Optional[str]" = None,
+    relation: "Optional[Pattern]" = None,
+    index: "Optional[CollectionIndex]" = None,
+) -> "list[str]":
+    """Return the labels of the instances in `coll` matching all criteria.
+
+    Parameters:
+        coll: The collection.
+        label_pattern: Glob pattern matching the labels.
+        datamodel: URI of the datamodel of the instances.
+        relation: A (s, p, o) pattern, where None matches anything.  Only
+            labels that are the subject or object of a matching relation
+            are returned.
+        index: Index of `coll`.  If given, it is used for the lookups
+            instead of scanning the relations of `coll`.
+
+    Returns:
+        The matching labels, in the order the instances were added.
+    """
+    if index:
+        labels = index.get_labels(datamodel)
+    elif datamodel:
+        uri = datamodel.rstrip("#/")
+        labels = [
+            s
+            for s, _, o in coll.get_relations(p="_has-meta")
+            if o.rstrip("#/") == uri
+        ]
+    else:
+        labels = list(coll.get_labels())
+
+    if label_pattern:
+        labels = fnmatch.filter(labels, label_pattern)
+
+    if relation:
+        s, p, o = relation
+        if index and p:
+            relations = (
+                (rs, ro)
+                for rs, _, ro, _ in index.get_relations(p)
+                if (s is None or rs == s) and (o is None or ro == o)
+            )
+        else:
+            relations = (
+                (rs, ro) for rs, _, ro in coll.get_relations(s=s, p=p, o=o)
+            )
+        related = {term for pair in relations for term in pair}
+        labels = [label for label in labels if label in related]
+
+    return labels
@@ -1,20 +1,55 @@
 """Generic generate strategy using DLite storage plugin."""
 
 # pylint: disable=unused-argument,invalid-name,possibly-used-before-assignment
+import fnmatch
+import logging
+import os
 import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from itertools import islice
 from typing import TYPE_CHECKING, Annotated, Optional
 
+import dlite
+from dlite.mappings import instantiate_all
 from oteapi.datacache import DataCache
 from oteapi.models import AttrDict, DataCacheConfig, FunctionConfig
 from pydantic import Field
 from pydantic.dataclasses import dataclass
 
 from oteapi_dlite.models import DLiteSessionUpdate
-from oteapi_dlite.utils import get_collection, get_driver, update_collection
+from oteapi_dlite.utils import (
+    get_collection,
+    get_driver,
+    get_instance,
+    get_meta,
+    update_collection,
+)
+from oteapi_dlite.utils.aio import run_blocking
+from oteapi_dlite.utils.indexes import indexed_triplestore
+from oteapi_dlite.utils.persistence import collection_asjson, get_index
+from oteapi_dlite.utils.streaming import (
+    add_cache_stream,
+    iter_json,
+    open_json_stream,
+)
 
 if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable, Iterator
     from typing import Any
 
+logger = logging.getLogger(__name__)
+
+
+class ParallelEnum(str, Enum):
+    """
+    Defines the available pools for evaluating property mappings
+    """
+
+    thread = "thread"
+    process = "process"
+
 
 class DLiteStorageConfig(AttrDict):
     """Configuration for a generic DLite storage filter.
@@ -25,7 +60,12 @@ class DLiteStorageConfig(AttrDict):
     Where the output should be written, is specified using either the
     `location` or `datacache_config.accessKey` field.
 
-    Either `label` or `datamodel` should be provided.
+    One of `label`, `label_pattern` or `datamodel` should be provided.
+
+    Several instances can be generated in one call by setting `batch`
+    together with `datamodel` or by providing `label_pattern`.  They are
+    either all written to the storage at `location` or added to the data
+    cache under the keys `<accessKey>-0`, `<accessKey>-1`, ...
     """
 
     driver: Annotated[
@@ -55,7 +95,10 @@ class DLiteStorageConfig(AttrDict):
             description=(
                 "Location of storage to write to.  If unset to store in data "
                 "cache using the key provided with "
-                "`datacache_config.accessKey` (defaults to 'generate_data')."
+                "`datacache_config.accessKey`.  Without an access key, the "
+                "key is a hash of the serialised instance, or a random UUID "
+                "with `chunk_size`.  The keys are returned as `cache_keys` "
+                "in the session update."
             ),
         ),
     ] = None
@@ -77,6 +120,49 @@ class DLiteStorageConfig(AttrDict):
             ),
         ),
     ] = None
+    label_pattern: Annotated[
+        Optional[str],
+        Field(
+            description=(
+                "Glob pattern matching the labels of the DLite instances in "
+                "the collection to serialise.  Implies `batch`.  Cannot be "
+                "combined with `label` or `datamodel`."
+            ),
+        ),
+    ] = None
+    batch: Annotated[
+        bool,
+        Field(
+            description=(
+                "Whether to serialise all instances of `datamodel`, "
+                "including all instances that can be instantiated from "
+                "property mappings, instead of only the first one."
+            ),
+        ),
+    ] = False
+    max_instances: Annotated[
+        Optional[int],
+        Field(
+            description=(
+                "Maximum number of instances to serialise in batch mode.  "
+                "The default is no limit."
+            ),
+            ge=1,
+        ),
+    ] = None
+    chunk_size: Annotated[
+        Optional[int],
+        Field(
+            description=(
+                "If given, stream the serialised instances to `location` or "
+                "the data cache in chunks of approximately this number of "
+                "bytes, such that the full serialisation is never held in "
+                "memory.  Only supported by the json driver, which then "
+                "writes the default DLite JSON format and ignores `options`."
+            ),
+            ge=1,
+        ),
+    ] = None
     store_collection: Annotated[
         bool,
         Field(
@@ -98,6 +184,29 @@ class DLiteStorageConfig(AttrDict):
             description="Whether to allow incomplete property mappings.",
         ),
     ] = False
+    parallel: Annotated[
+        Optional[ParallelEnum],
+        Field(
+            description=(
+                "If given, the property mappings of a `datamodel` instance "
+                "are evaluated concurrently in a pool of threads or "
+                "processes.  Worthwhile when the mappings call expensive "
+                "conversion functions, which must be importable for "
+                "'process'.  In this mode, at most one instance is "
+                "instantiated from property mappings."
+            ),
+        ),
+    ] = None
+    max_workers: Annotated[
+        Optional[int],
+        Field(
+            description=(
+                "Maximum number of workers used with `parallel`.  Defaults "
+                "to the default of the `concurrent.futures` executors."
+            ),
+            ge=1,
+        ),
+    ] = None
     collection_id: Annotated[
         Optional[str],
         Field(
@@ -112,6 +221,20 @@ class DLiteStorageConfig(AttrDict):
     ] = None
 
 
+class DLiteGenerateSessionUpdate(DLiteSessionUpdate):
+    """Class for returning values from the DLite generate strategy."""
+
+    cache_keys: Annotated[
+        Optional[list[str]],
+        Field(
+            description=(
+                "Data cache keys of the instances serialised to the data "
+                "cache."
+            ),
+        ),
+    ] = None
+
+
 class DLiteGenerateConfig(FunctionConfig):
     """DLite generate strategy config."""
 
@@ -141,7 +264,7 @@ class DLiteGenerateStrategy:
         )
         return DLiteSessionUpdate(collection_id=collection_id)
 
-    def get(self) -> DLiteSessionUpdate:
+    def get(self) -> DLiteGenerateSessionUpdate:
         """Execute the strategy.
 
         This method will be called through the strategy-specific endpoint
@@ -150,7 +273,6 @@ class DLiteGenerateStrategy:
             SessionUpdate instance.
         """
         config = self.generate_config.configuration
-        cacheconfig = config.datacache_config
 
         driver = (
             config.driver
@@ -161,36 +283,19 @@ class DLiteGenerateStrategy:
         )
 
         coll = get_collection(collection_id=config.collection_id)
-        if config.datamodel:
-            instances = coll.get_instances(
-                metaid=config.datamodel,
-                property_mappings=True,
-                allow_incomplete=config.allow_incomplete,
-            )
-            inst = next(instances)
-        elif config.label:
-            inst = coll[config.label]
-        elif config.store_collection:
-            if config.store_collection_id:
-                inst = coll.copy(newid=config.store_collection_id)
-            else:
-                inst = coll
-        else:  # fail if there are more instances
-            raise ValueError(
-                "One of `label` or `datamodel` configurations should be given."
+        batch = config.batch or bool(config.label_pattern)
+        insts = _select_instances(coll, config, batch)
+
+        stream = bool(config.chunk_size)
+        if stream and driver != "json":
+            logger.warning(
+                "Streaming is not supported by the %s driver, ignoring "
+                "`chunk_size`.",
+                driver,
             )
-        # Save instance
-        if config.location:
-            inst.save(driver, config.location, config.options)
-        else:
-            if cacheconfig and cacheconfig.accessKey:
-                key = cacheconfig.accessKey
-
-            cache = DataCache()
-            with tempfile.TemporaryDirectory() as tmpdir:
-                inst.save(driver, "{tmpdir}/data", config.options)
-                with open(f"{tmpdir}/data", "rb") as f:
-                    cache.add(f.read(), key=key)
+            stream = False
+
+        cache_keys = _save_instances(insts, driver, config, batch, stream)
         # __TODO__
         # Can we safely assume that all strategies in a pipeline will be
         # executed in the same Python interpreter?  If not, we should write
@@ -198,4 +303,225 @@ class DLiteGenerateStrategy:
         # other strategies.
 
         update_collection(coll)
-        return DLiteSessionUpdate(collection_id=coll.uuid)
+        return DLiteGenerateSessionUpdate(
+            collection_id=coll.uuid, cache_keys=cache_keys
+        )
+
+    async def ainitialize(self) -> DLiteSessionUpdate:
+        """Initialize asynchronously.
+
+        Like `initialize()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.initialize)
+
+    async def aget(self) -> DLiteGenerateSessionUpdate:
+        """Execute the strategy asynchronously.
+
+        Like `get()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.get)
+
+
+def _select_instances(
+    coll: dlite.Collection, config: DLiteStorageConfig, batch: bool
+) -> "Iterable[dlite.Instance]":
+    """Return the instances in `coll` to save, as selected by `config`."""
+    if config.datamodel:
+        # All instances are generated from the same generator, such
+        # that mapping routes are only computed once for the batch
+        instances = _datamodel_instances(coll, config)
+        if batch:
+            return islice(instances, config.max_instances)
+        return [next(instances)]
+    if config.label:
+        return [coll[config.label]]
+    if config.label_pattern:
+        index = get_index(coll)
+        labels = fnmatch.filter(
+            index.get_labels() if index else coll.get_labels(),
+            config.label_pattern,
+        )
+        return (coll[label] for label in labels[: config.max_instances])
+    if config.store_collection:
+        if config.store_collection_id:
+            return [coll.copy(newid=config.store_collection_id)]
+        return [coll]
+    # fail if there are more instances
+    raise ValueError(
+        "One of `label`, `label_pattern` or `datamodel` "
+        "configurations should be given."
+    )
+
+
+def _save_instances(
+    insts: "Iterable[dlite.Instance]",
+    driver: str,
+    config: DLiteStorageConfig,
+    batch: bool,
+    stream: bool,
+) -> "Optional[list[str]]":
+    """Save `insts` to `config.location` or to the datacache.
+
+    Returns:
+        The datacache keys of the instances if they are saved to the
+        datacache, otherwise None.
+    """
+    if config.location and stream:
+        with open(config.location, "wb") as f:
+            for chunk in iter_json(insts, config.chunk_size):
+                f.write(chunk)
+    elif config.location and batch:
+        with dlite.Storage(driver, config.location, config.options) as storage:
+            for inst in insts:
+                storage.save(inst)
+    elif config.location:
+        (inst,) = insts
+        inst.save(driver, config.location, config.options)
+    elif batch:
+        key = _cache_key(config)
+        return [
+            _add_instance(
+                f"{key}-{n}" if key else None,
+                inst,
+                driver,
+                config,
+                stream,
+            )
+            for n, inst in enumerate(insts)
+        ]
+    else:
+        (inst,) = insts
+        return [_add_instance(_cache_key(config), inst, driver, config, stream)]
+    return None
+
+
+def _cache_key(config: DLiteStorageConfig) -> "Optional[str]":
+    """Return the datacache key to save instances under or None."""
+    cacheconfig = config.datacache_config
+    if cacheconfig and cacheconfig.accessKey:
+        return cacheconfig.accessKey
+    return None
+
+
+def _add_instance(
+    key: "Optional[str]",
+    inst: dlite.Instance,
+    driver: str,
+    config: DLiteStorageConfig,
+    stream: bool,
+) -> str:
+    """Serialise `inst` into the datacache and return its key.
+
+    Without `key`, the key generated by `DataCache.add()` is used, or a
+    random UUID if `stream` is true.
+    """
+    if stream:
+        key = key or str(uuid.uuid4())
+        _add_stream(key, inst, config)
+        return key
+    return DataCache().add(serialise(inst, driver, config.options), key=key)
+
+
+def _datamodel_instances(
+    coll: dlite.Collection, config: DLiteStorageConfig
+) -> "Iterator[dlite.Instance]":
+    """Yield the instances of `config.datamodel` in `coll`, followed by
+    the instances that can be instantiated from property mappings.
+
+    The existing instances are looked up in the index of `coll` when it
+    is available.  In `config.parallel` mode, at most one instance is
+    instantiated from property mappings.
+    """
+    index = get_index(coll)
+    if index is None and not config.parallel:
+        yield from coll.get_instances(
+            metaid=config.datamodel,
+            property_mappings=True,
+            allow_incomplete=config.allow_incomplete,
+        )
+        return
+
+    if index is None:
+        yield from coll.get_instances(metaid=config.datamodel)
+    else:
+        for label in index.get_labels(config.datamodel):
+            yield coll[label]
+
+    if not config.parallel:
+        yield from instantiate_all(
+            meta=get_meta(config.datamodel),
+            instances=list(coll.get_instances()),
+            triplestore=indexed_triplestore(coll, index),
+            allow_incomplete=bool(config.allow_incomplete),
+        )
+        return
+
+    executor_class = (
+        ProcessPoolExecutor
+        if config.parallel == ParallelEnum.process
+        else ThreadPoolExecutor
+    )
+    with executor_class(max_workers=config.max_workers) as executor:
+        inst = get_instance(
+            config.datamodel,
+            coll,
+            allow_incomplete=bool(config.allow_incomplete),
+            executor=executor,
+        )
+    yield inst
+
+
+def serialise(
+    inst: dlite.Instance, driver: str, options: "Optional[str]" = None
+) -> bytes:
+    """Serialise `inst` with the given DLite driver and return the result.
+
+    The instance is serialised in memory if the storage plugin of `driver`
+    supports it.  Otherwise it is saved to a temporary file, preferably on
+    a memory-backed file system.
+
+    Parameters:
+        inst: The instance to serialise.
+        driver: Name of the DLite storage driver.
+        options: Options passed to the DLite storage plugin.
+
+    Returns:
+        The serialised instance.
+    """
+    if isinstance(inst, dlite.Collection) and driver == "json":
+        return collection_asjson(inst).encode()
+
+    try:
+        with dlite.silent:
+            data = inst.to_bytes(driver, options=options)
+    except dlite.DLiteError:  # pylint: disable=no-member
+        data = None
+    if data:
+        return bytes(data)
+
+    # The storage plugin does not support serialising to bytes
+    with tempfile.TemporaryDirectory(dir=_scratch_dir()) as tmpdir:
+        filename = os.path.join(tmpdir, "data")
+        inst.save(driver, filename, options)
+        with open(filename, "rb") as f:
+            return f.read()
+
+
+def _add_stream(
+    key: str,
+    inst: dlite.Instance,
+    config: DLiteStorageConfig,
+) -> None:
+    """Stream the JSON representation of `inst` into the datacache."""
+    with open_json_stream(inst, config.chunk_size) as f:
+        add_cache_stream(key, f)
+
+
+def _scratch_dir() -> "Optional[str]":
+    """Return a memory-backed directory for temporary files if available."""
+    shm = "/dev/shm"  # nosec
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
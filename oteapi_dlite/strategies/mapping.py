@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import itertools
+import json
 import logging
+import time
+from contextlib import ExitStack
 
 # pylint: disable=unused-argument,invalid-name,disable=line-too-long,E1133,W0511
 from enum import Enum
@@ -10,21 +16,185 @@ from typing import TYPE_CHECKING, Annotated, Optional
 
 import rdflib
 from jinja2 import Template, TemplateError
+from oteapi.datacache import DataCache
 from oteapi.models import AttrDict, MappingConfig
 from pydantic import AnyUrl
 from pydantic.dataclasses import Field, dataclass
 from rdflib.exceptions import Error as RDFLibException
-from SPARQLWrapper import JSON, SPARQLWrapper
+from SPARQLWrapper import JSON, N3, SPARQLWrapper
 from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 from tripper import Triplestore
 
 from oteapi_dlite.models import DLiteSessionUpdate
 from oteapi_dlite.utils import get_collection, update_collection
+from oteapi_dlite.utils.aio import run_blocking
+from oteapi_dlite.utils.clientpool import sparql_client, triplestore_client
 
 if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
     from typing import Any
 logger = logging.getLogger(__name__)
 
+# Number of triples passed to the triplestore backend at a time by
+# populate_triplestore().  Remote backends add each batch with a single
+# bulk update request.
+TRIPLE_BATCH_SIZE = 10_000
+
+# Maximum number of expanded IRIs memoised by populate_triplestore().
+IRI_CACHE_MAXSIZE = 4096
+
+# Prefix of the datacache keys of knowledge graph fragments cached by
+# fetch_graph_fragment().
+GRAPH_CACHE_PREFIX = "oteapi-dlite-graph-"
+
+# Jinja2 template of the query used by find_parent_node().
+PARENT_NODE_QUERY = """
+{% macro sparql_query(class_names, graph_uri) %}
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT ?parentClass
+    WHERE {
+        GRAPH <{{ graph_uri }}> {
+            ?class rdfs:subClassOf* ?parentClass .
+            FILTER(
+                {% for class_name in class_names -%}
+                    ?class = <{{ class_name }}>{{ " ||" if not loop.last }}
+                {% endfor %})
+        }
+    }
+{% endmacro %}
+"""
+
+# Prefixes of GRAPH_QUERY and CONSTRUCT_GRAPH_QUERY.
+_GRAPH_QUERY_PREFIXES = """
+PREFIX owl: <http://www.w3.org/2002/07/owl#>
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX fno: <https://w3id.org/function/ontology#>
+PREFIX emmo: <http://emmo.info/domain-mappings#>
+PREFIX oteio: <http://emmo.info/oteio#>
+"""
+
+# Graph pattern of GRAPH_QUERY and CONSTRUCT_GRAPH_QUERY matching the
+# relevant triples of all subclasses of {parent} and their individuals.
+_GRAPH_QUERY_PATTERN = """
+    # Match all subclasses of the parent class
+    ?subclass rdfs:subClassOf* {parent} .
+
+    # Retrieve all relevant triples for these subclasses and their individuals
+    {{
+    # Subclasses themselves and their relationships
+    ?subclass ?predicate ?object .
+    BIND(?subclass AS ?subject)
+    }} UNION {{
+    # Individuals of these subclasses and their properties
+    ?subject rdf:type ?subclass .
+    ?subject ?predicate ?object .
+    }}
+
+    # Ensure subject, predicate, and object are not empty
+    FILTER(BOUND(?subject) && BOUND(?predicate) && BOUND(?object))
+
+    # Filter by the specific predicates
+    FILTER (?predicate IN (
+        rdfs:subClassOf,
+        rdfs:label,
+        rdf:type,
+        rdf:about,
+        owl:propertyDisjointWith,
+        fno:expects,
+        fno:predicate,
+        fno:type,
+        fno:returns,
+        fno:executes,
+        oteio:hasPythonFunctionName,
+        oteio:hasPythonModuleName,
+        oteio:hasPypiPackageName,
+        emmo:mapsTo))
+"""
+
+# Format string of the query used by fetch_and_populate_graph().
+GRAPH_QUERY = (
+    _GRAPH_QUERY_PREFIXES
+    + """
+SELECT DISTINCT ?subject ?predicate ?object
+WHERE {{
+GRAPH <{graph_uri}> {{
+"""
+    + _GRAPH_QUERY_PATTERN
+    + """
+}}
+}}
+"""
+)
+
+# Format string of the query used by fetch_graph_fragment() in "construct"
+# mode.  Finds the common parent of {classes} server-side and returns the
+# triples below it in the same request.  Of several common parents, the
+# one with the most ancestors (the lowest) is chosen.
+CONSTRUCT_GRAPH_QUERY = (
+    _GRAPH_QUERY_PREFIXES
+    + """
+CONSTRUCT {{ ?subject ?predicate ?object }}
+WHERE {{
+GRAPH <{graph_uri}> {{
+    {{
+        SELECT ?parent (COUNT(DISTINCT ?ancestor) AS ?depth)
+        WHERE {{
+            {{
+                SELECT ?parent
+                WHERE {{
+                    VALUES ?class {{ {classes} }}
+                    ?class rdfs:subClassOf* ?parent .
+                }}
+                GROUP BY ?parent
+                HAVING (COUNT(DISTINCT ?class) = {nclasses})
+            }}
+            ?parent rdfs:subClassOf* ?ancestor .
+        }}
+        GROUP BY ?parent
+        ORDER BY DESC(?depth)
+        LIMIT 1
+    }}
+"""
+    + _GRAPH_QUERY_PATTERN
+    + """
+}}
+}}
+"""
+)
+
+# Map content types of CONSTRUCT query responses to rdflib parser formats.
+RDF_FORMATS = {
+    "application/n-triples": "nt",
+    "application/turtle": "turtle",
+    "text/turtle": "turtle",
+    "application/rdf+xml": "xml",
+}
+
+# Query used by fetch_graph_fragment() to detect changes of a graph.  It
+# returns the number of triples and two checksums, each the sum of an
+# integer taken from the digits of a hash of every triple.  Sums do not
+# depend on the order in which the triples are aggregated.
+GRAPH_MARKER_QUERY = """
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+SELECT (COUNT(*) AS ?n) (SUM(?md5) AS ?checksum1) (SUM(?sha1) AS ?checksum2)
+WHERE {{
+  GRAPH <{graph_uri}> {{ ?s ?p ?o }}
+  BIND(CONCAT(
+    COALESCE(STR(?s), "_:"), " ", STR(?p), " ", COALESCE(STR(?o), "_:"),
+    " ", COALESCE(STR(DATATYPE(?o)), ""), COALESCE(LANG(?o), "")
+  ) AS ?t)
+  BIND(COALESCE(
+    xsd:integer(SUBSTR(REPLACE(MD5(?t), "[a-f]", ""), 1, 15)), 0
+  ) AS ?md5)
+  BIND(COALESCE(
+    xsd:integer(SUBSTR(REPLACE(SHA1(?t), "[a-f]", ""), 1, 15)), 0
+  ) AS ?sha1)
+}}
+"""
+
 
 class BackendEnum(str, Enum):
     """
@@ -36,6 +206,15 @@ class BackendEnum(str, Enum):
     graphdb = "graphdb"
 
 
+class GraphQueryEnum(str, Enum):
+    """
+    Defines the available ways of querying a knowledge graph fragment
+    """
+
+    select = "select"
+    construct = "construct"
+
+
 class DLiteMappingStrategyConfig(AttrDict):
     """Configuration for a DLite mapping filter."""
 
@@ -108,6 +287,54 @@ class DLiteMappingStrategyConfig(AttrDict):
             description="Endpoint Url to create an instance of SPARQLWrapper configured for the target SPARQL service"
         ),
     ] = None
+    graph_query: Annotated[
+        GraphQueryEnum,
+        Field(
+            description=(
+                "How to query the knowledge graph fragment from "
+                "`sparql_endpoint`.  'select' finds the common parent node "
+                "of the mapped classes and then selects the triples below "
+                "it.  'construct' does both in a single CONSTRUCT query."
+            )
+        ),
+    ] = GraphQueryEnum.select
+    graph_page_size: Annotated[
+        Optional[int],
+        Field(
+            description=(
+                "If given, the knowledge graph fragment is fetched in pages "
+                "of this number of triples, such that the memory used for "
+                "decoding query results stays bounded.  Only used with "
+                "`graph_query='select'`."
+            ),
+            ge=1,
+        ),
+    ] = None
+    graph_cache_ttl: Annotated[
+        Optional[int],
+        Field(
+            description=(
+                "If given, the knowledge graph fragment fetched from "
+                "`sparql_endpoint` is cached in the datacache and reused "
+                "for this number of seconds."
+            ),
+            ge=0,
+        ),
+    ] = None
+    graph_cache_revalidate: Annotated[
+        bool,
+        Field(
+            description=(
+                "Whether to keep using a cached knowledge graph fragment "
+                "after `graph_cache_ttl` has expired if the triples in "
+                "`graph_uri` are unchanged.  Checking this requires a "
+                "single query, in which the SPARQL service hashes every "
+                "triple of `graph_uri`.  This avoids transferring the "
+                "fragment, but its cost grows with the size of the whole "
+                "graph."
+            ),
+        ),
+    ] = True
 
 
 class DLiteMappingConfig(MappingConfig):
@@ -134,57 +361,66 @@ class DLiteMappingStrategy:
     mapping_config: DLiteMappingConfig
 
     def initialize(self) -> DLiteSessionUpdate:
-        """Initialize strategy."""
+        """Initialize strategy.
+
+        Clients for remote triplestores and SPARQL endpoints are taken from
+        a process-wide pool, see `oteapi_dlite.utils.clientpool`.
+        """
         coll = get_collection(
             collection_id=self.mapping_config.configuration.collection_id
         )
-        if self.mapping_config.configuration.backend:
-            ts = Triplestore(
-                backend=self.mapping_config.configuration.backend,
-                base_iri=self.mapping_config.configuration.base_iri,
-                triplestore_url=self.mapping_config.configuration.triplestore_url,
-                database=self.mapping_config.configuration.database,
-                uname=self.mapping_config.configuration.username,
-                pwd=self.mapping_config.configuration.password,
-            )
-        else:
-            ts = Triplestore(backend="collection", collection=coll)
-
-        if self.mapping_config.prefixes:
-            for prefix, iri in self.mapping_config.prefixes.items():
-                ts.bind(prefix, iri)
-        if (
-            self.mapping_config.configuration.sparql_endpoint
-            and self.mapping_config.configuration.graph_uri
-        ):
-            config = self.mapping_config.configuration
-            sparql_instance = SPARQLWrapper(config.sparql_endpoint)
-            sparql_instance.setHTTPAuth("BASIC")
-            sparql_instance.setCredentials(
-                config.username,
-                config.password,
-            )
-            # extract class names i.e. objects from triples
-            class_names = [triple[2] for triple in self.mapping_config.triples]
-            # Find parent node of the class_names
-            parent_node: str | None = find_parent_node(
-                sparql_instance,
-                class_names,
-                config.graph_uri,  # type:ignore
-            )
-            # If parent node exists, find the KG
-            if parent_node:
-                graph: rdflib.Graph = fetch_and_populate_graph(
+        with ExitStack() as stack:
+            if self.mapping_config.configuration.backend:
+                ts = stack.enter_context(
+                    triplestore_client(
+                        backend=self.mapping_config.configuration.backend,
+                        base_iri=self.mapping_config.configuration.base_iri,
+                        triplestore_url=self.mapping_config.configuration.triplestore_url,
+                        database=self.mapping_config.configuration.database,
+                        uname=self.mapping_config.configuration.username,
+                        pwd=self.mapping_config.configuration.password,
+                    )
+                )
+            else:
+                ts = Triplestore(backend="collection", collection=coll)
+
+            if self.mapping_config.prefixes:
+                for prefix, iri in self.mapping_config.prefixes.items():
+                    ts.bind(prefix, iri)
+            if (
+                self.mapping_config.configuration.sparql_endpoint
+                and self.mapping_config.configuration.graph_uri
+            ):
+                config = self.mapping_config.configuration
+                sparql_instance = stack.enter_context(
+                    sparql_client(
+                        config.sparql_endpoint,
+                        config.username,
+                        config.password,
+                    )
+                )
+                # extract class names i.e. objects from triples
+                class_names = [
+                    triple[2] for triple in self.mapping_config.triples
+                ]
+                # Find the KG below the parent node of the class_names
+                graph = fetch_graph_fragment(
                     sparql_instance,
+                    class_names,
                     config.graph_uri,  # type:ignore
-                    parent_node,
+                    query=config.graph_query,
+                    page_size=config.graph_page_size,
+                    ttl=config.graph_cache_ttl,
+                    revalidate=config.graph_cache_revalidate,
                 )
-                graph_triples = [(str(s), str(p), str(o)) for s, p, o in graph]
-                # Add triples to the collection
-                populate_triplestore(ts, graph_triples)
-
-        # Add triples to the collection
-        populate_triplestore(ts, self.mapping_config.triples)
+                if graph:
+                    # Add triples to the collection
+                    populate_triplestore(
+                        ts, ((str(s), str(p), str(o)) for s, p, o in graph)
+                    )
+
+            # Add triples to the collection
+            populate_triplestore(ts, self.mapping_config.triples)
         update_collection(coll)
         return DLiteSessionUpdate(collection_id=coll.uuid)
 
@@ -198,15 +434,48 @@ class DLiteMappingStrategy:
             )
         )
 
+    async def ainitialize(self) -> DLiteSessionUpdate:
+        """Initialize strategy asynchronously.
+
+        Like `initialize()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.initialize)
+
+    async def aget(self) -> DLiteSessionUpdate:
+        """Execute strategy asynchronously.
+
+        Like `get()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.get)
+
 
-def populate_triplestore(ts: Triplestore, triples: list):
-    """Populate the triplestore instance"""
-    ts.add_triples(
-        [
-            [ts.expand_iri(t) if isinstance(t, str) else t for t in triple]
-            for triple in (triples)  # pylint: disable=not-an-iterable
-        ]
+def populate_triplestore(
+    ts: Triplestore,
+    triples: Iterable,
+    batch_size: int = TRIPLE_BATCH_SIZE,
+) -> int:
+    """Populate the triplestore instance.
+
+    Prefixed IRIs are expanded using the namespaces bound to `ts`.  The
+    triples are consumed lazily and added in batches of `batch_size`, such
+    that `triples` may be a generator over a large graph.
+
+    Returns:
+        The number of added triples.
+    """
+    # Terms like predicates and classes are repeated in most triples
+    expand = functools.lru_cache(maxsize=IRI_CACHE_MAXSIZE)(ts.expand_iri)
+    expanded = (
+        tuple(expand(t) if isinstance(t, str) else t for t in triple)
+        for triple in triples
     )
+    ntriples = 0
+    while batch := list(itertools.islice(expanded, batch_size)):
+        ts.add_triples(batch)
+        ntriples += len(batch)
+    return ntriples
 
 
 # TODO: import the below function from SOFT7 once its available
@@ -238,24 +507,7 @@ def find_parent_node(
     """
 
     try:
-        template_str = """
-        {% macro sparql_query(class_names, graph_uri) %}
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?parentClass
-            WHERE {
-                GRAPH <{{ graph_uri }}> {
-                    ?class rdfs:subClassOf* ?parentClass .
-                    FILTER(
-                        {% for class_name in class_names -%}
-                            ?class = <{{ class_name }}>{{ " ||" if not loop.last }}
-                        {% endfor %})
-                }
-            }
-        {% endmacro %}
-        """
-
-        template = Template(template_str)
+        template = Template(PARENT_NODE_QUERY)
         query = template.module.sparql_query(class_names, graph_uri)
         sparql.setReturnFormat(JSON)
         sparql.setQuery(query)
@@ -290,11 +542,16 @@ def fetch_and_populate_graph(
     graph_uri: str,
     parent_node: str,
     graph: Optional[rdflib.Graph] = None,
+    page_size: Optional[int] = None,
 ) -> rdflib.Graph | None:
     """
     Fetches RDF triples related to a specified parent node from a SPARQL endpoint and
     populates them into an RDF graph.
 
+    If `page_size` is given, the triples are fetched in pages of at most `page_size`
+    results using LIMIT/OFFSET, and each page is added to the graph before the
+    next is fetched.  This bounds the size of the decoded query results.
+
     Args:
         sparql (SPARQLWrapper): An instance of SPARQLWrapper configured for the target
             SPARQL service.
@@ -303,6 +560,8 @@ def fetch_and_populate_graph(
         graph (rdflib.Graph, optional): An instance of an RDFlib graph to populate with
             fetched triples.
             If `None`, a new empty graph is created. Defaults to `None`.
+        page_size (int, optional): Number of results to fetch per query.
+            If `None`, all results are fetched with a single query.
 
     Returns:
         rdflib.Graph: The graph populated with the fetched triples.
@@ -320,66 +579,194 @@ def fetch_and_populate_graph(
     try:
         sparql.setReturnFormat(JSON)
 
-        query = f"""
-        PREFIX owl: <http://www.w3.org/2002/07/owl#>
-        PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-        PREFIX fno: <https://w3id.org/function/ontology#>
-        PREFIX emmo: <http://emmo.info/domain-mappings#>
-        PREFIX oteio: <http://emmo.info/oteio#>
-
-        SELECT DISTINCT ?subject ?predicate ?object
-        WHERE {{
-        GRAPH <{graph_uri}> {{
-
-            # Match all subclasses of the parent class
-            ?subclass rdfs:subClassOf* <{parent_node}> .
-
-            # Retrieve all relevant triples for these subclasses and their individuals
-            {{
-            # Subclasses themselves and their relationships
-            ?subclass ?predicate ?object .
-            BIND(?subclass AS ?subject)
-            }} UNION {{
-            # Individuals of these subclasses and their properties
-            ?subject rdf:type ?subclass .
-            ?subject ?predicate ?object .
-            }}
-
-            # Ensure subject, predicate, and object are not empty
-            FILTER(BOUND(?subject) && BOUND(?predicate) && BOUND(?object))
-
-            # Filter by the specific predicates
-            FILTER (?predicate IN (
-                rdfs:subClassOf,
-                rdfs:label,
-                rdf:type,
-                rdf:about,
-                owl:propertyDisjointWith,
-                fno:expects,
-                fno:predicate,
-                fno:type,
-                fno:returns,
-                fno:executes,
-                oteio:hasPythonFunctionName,
-                oteio:hasPythonModuleName,
-                oteio:hasPypiPackageName,
-                emmo:mapsTo))
-        }}
-        }}
-        """
-        sparql.setQuery(query)
-
-        results = sparql.query().convert()
-        for result in results["results"]["bindings"]:
-            graph.add(
+        query = GRAPH_QUERY.format(
+            graph_uri=graph_uri, parent=f"<{parent_node}>"
+        )
+        if page_size:
+            # Pages must be taken from a fixed order of the results
+            query += "ORDER BY ?subject ?predicate ?object\n"
+
+        offset = 0
+        while True:
+            if page_size:
+                sparql.setQuery(f"{query}LIMIT {page_size}\nOFFSET {offset}\n")
+            else:
+                sparql.setQuery(query)
+            bindings = sparql.query().convert()["results"]["bindings"]
+            graph.addN(
                 (
                     rdflib.URIRef(result["subject"]["value"]),
                     rdflib.URIRef(result["predicate"]["value"]),
                     rdflib.URIRef(result["object"]["value"]),
+                    graph,
                 )
+                for result in bindings
+            )
+            if not page_size or len(bindings) < page_size:
+                break
+            offset += page_size
+        logger.info("Graph populated with fetched triples.")
+
+    except SPARQLWrapperException as wrapper_error:
+        raise RuntimeError(
+            f"Failed to fetch or parse results: {wrapper_error}"
+        ) from wrapper_error
+
+    except RDFLibException as rdflib_error:
+        raise RuntimeError(
+            f"Failed to build graph elements: {rdflib_error}"
+        ) from rdflib_error
+
+    return graph
+
+
+def graph_cache_key(
+    endpoint: str,
+    class_names: list[str],
+    graph_uri: str,
+    query: GraphQueryEnum = GraphQueryEnum.select,
+    username: Optional[str] = None,
+) -> str:
+    """Return the datacache key of a cached knowledge graph fragment.
+
+    The key is a hash of the arguments and the query templates, such that
+    changes of the queries invalidate cached fragments.  The `username`
+    is included since different users may see different triples.
+    """
+    templates = (
+        [CONSTRUCT_GRAPH_QUERY]
+        if query == GraphQueryEnum.construct
+        else [PARENT_NODE_QUERY, GRAPH_QUERY]
+    )
+    content = json.dumps(
+        [endpoint, username, graph_uri, sorted(class_names), *templates]
+    )
+    return GRAPH_CACHE_PREFIX + hashlib.sha256(content.encode()).hexdigest()
+
+
+# The options after `graph_uri` are keyword-only
+def fetch_graph_fragment(  # pylint: disable=too-many-arguments
+    sparql: SPARQLWrapper,
+    class_names: list[str],
+    graph_uri: str,
+    *,
+    query: GraphQueryEnum = GraphQueryEnum.select,
+    page_size: Optional[int] = None,
+    ttl: Optional[int] = None,
+    revalidate: bool = True,
+) -> rdflib.Graph | None:
+    """Fetch the knowledge graph fragment relevant for `class_names`.
+
+    With `query="select"`, find_parent_node() and
+    fetch_and_populate_graph() are combined.  With `query="construct"`,
+    fetch_graph_construct() is used.
+
+    If `ttl` is given, the triples of the fragment are cached in the
+    datacache and reused for `ttl` seconds.  After that, if `revalidate`
+    is true, the cached fragment is reused for another `ttl` seconds as
+    long as the number of triples in `graph_uri` and checksums of them
+    are unchanged.  The checksums are computed by the SPARQL service,
+    which hashes every triple of `graph_uri`.
+
+    Args:
+        sparql (SPARQLWrapper): An instance of SPARQLWrapper configured for the target
+            SPARQL service.
+        class_names (list[str]): The class URIs to find a common parent for.
+        graph_uri (str): The URI of the graph in which to perform the query.
+        query (GraphQueryEnum): How to query the fragment.
+        page_size (int, optional): Number of triples to fetch per query with
+            `query="select"`.  By default, all triples are fetched at once.
+        ttl (int, optional): Number of seconds to reuse a cached fragment.
+            If `None`, the fragment is neither cached nor looked up in the cache.
+        revalidate (bool): Whether to revalidate expired fragments.
+
+    Returns:
+        rdflib.Graph | None: The fragment or None if the classes have no common
+            parent node.
+    """
+    if ttl is None:
+        return _fetch_graph_fragment(
+            sparql, class_names, graph_uri, query, page_size
+        )
+
+    cache = DataCache()
+    key = graph_cache_key(
+        sparql.endpoint, class_names, graph_uri, query, username=sparql.user
+    )
+    record = cache.get(key) if key in cache else None
+    now = time.time()
+    if record and now - record["fetched"] < ttl:
+        return _parse_graph_record(record)
+
+    marker = _graph_marker(sparql, graph_uri) if revalidate else None
+    if record and marker is not None and record["marker"] == marker:
+        logger.info("Cached graph fragment revalidated.")
+        graph = _parse_graph_record(record)
+    else:
+        graph = _fetch_graph_fragment(
+            sparql, class_names, graph_uri, query, page_size
+        )
+        record = {
+            "marker": marker,
+            "triples": (
+                [(str(s), str(p), str(o)) for s, p, o in graph]
+                if graph
+                else None
+            ),
+        }
+    record["fetched"] = now
+    cache.add(record, key=key)
+    return graph
+
+
+def fetch_graph_construct(
+    sparql: SPARQLWrapper,
+    class_names: list[str],
+    graph_uri: str,
+    graph: Optional[rdflib.Graph] = None,
+) -> rdflib.Graph:
+    """
+    Fetches the RDF triples below the common parent node of `class_names` from a
+    SPARQL endpoint with a single CONSTRUCT query and populates them into an RDF
+    graph.
+
+    The common parent node is found server-side.  The response is requested as
+    N-Triples (or Turtle) and parsed directly into the graph.
+
+    Args:
+        sparql (SPARQLWrapper): An instance of SPARQLWrapper configured for the target
+            SPARQL service.
+        class_names (list[str]): The class URIs to find a common parent for.
+        graph_uri (str): The URI of the graph from which triples will be fetched.
+        graph (rdflib.Graph, optional): An instance of an RDFlib graph to populate with
+            fetched triples.
+            If `None`, a new empty graph is created. Defaults to `None`.
+
+    Returns:
+        rdflib.Graph: The graph populated with the fetched triples.  It is empty if
+            the classes have no common parent node.
+
+    Raises:
+        RuntimeError: If processing the SPARQL query or building the RDF graph fails.
+    """
+    graph = graph if graph is not None else rdflib.Graph()
+
+    try:
+        sparql.setReturnFormat(N3)
+        sparql.setQuery(
+            CONSTRUCT_GRAPH_QUERY.format(
+                graph_uri=graph_uri,
+                classes=" ".join(f"<{name}>" for name in class_names),
+                nclasses=len(set(class_names)),
+                parent="?parent",
             )
+        )
+        result = sparql.query()
+        content_type = result.info().get("content-type", "").split(";")[0]
+        graph.parse(
+            data=result.response.read(),
+            format=RDF_FORMATS.get(content_type.strip(), "n3"),
+        )
         logger.info("Graph populated with fetched triples.")
 
     except SPARQLWrapperException as wrapper_error:
@@ -393,3 +780,52 @@ def fetch_and_populate_graph(
         ) from rdflib_error
 
     return graph
+
+
+def _fetch_graph_fragment(
+    sparql: SPARQLWrapper,
+    class_names: list[str],
+    graph_uri: str,
+    query: GraphQueryEnum = GraphQueryEnum.select,
+    page_size: Optional[int] = None,
+) -> rdflib.Graph | None:
+    """Fetch the knowledge graph fragment relevant for `class_names`."""
+    if query == GraphQueryEnum.construct:
+        return fetch_graph_construct(sparql, class_names, graph_uri)
+    parent_node = find_parent_node(sparql, class_names, graph_uri)
+    if not parent_node:
+        return None
+    return fetch_and_populate_graph(
+        sparql, graph_uri, parent_node, page_size=page_size
+    )
+
+
+def _parse_graph_record(record: dict[str, Any]) -> rdflib.Graph | None:
+    """Return the graph stored in a graph cache record."""
+    if record["triples"] is None:
+        return None
+    graph = rdflib.Graph()
+    graph.addN(
+        (rdflib.URIRef(s), rdflib.URIRef(p), rdflib.URIRef(o), graph)
+        for s, p, o in record["triples"]
+    )
+    return graph
+
+
+def _graph_marker(sparql: SPARQLWrapper, graph_uri: str) -> str:
+    """Return a marker changing with the triples in `graph_uri`.
+
+    The marker is the number of triples and their checksums.
+    """
+    try:
+        sparql.setReturnFormat(JSON)
+        sparql.setQuery(GRAPH_MARKER_QUERY.format(graph_uri=graph_uri))
+        results = sparql.query().convert()
+        binding = results["results"]["bindings"][0]
+        return ":".join(
+            binding[name]["value"] for name in ("n", "checksum1", "checksum2")
+        )
+    except SPARQLWrapperException as wrapper_error:
+        raise RuntimeError(
+            f"Failed to fetch or parse results: {wrapper_error}"
+        ) from wrapper_error
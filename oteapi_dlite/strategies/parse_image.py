@@ -0,0 +1,441 @@
+"""Strategy for parsing images into DLite Image instances."""
+
+import math
+import sys
+from typing import TYPE_CHECKING, Annotated, Optional
+
+import dlite
+import numpy as np
+from oteapi.models import AttrDict, HostlessAnyUrl, ParserConfig, ResourceConfig
+from PIL import Image
+from pydantic import AnyHttpUrl, Field
+from pydantic.dataclasses import dataclass
+
+from oteapi_dlite.models import DLiteSessionUpdate
+from oteapi_dlite.utils import get_collection, update_collection
+from oteapi_dlite.utils.aio import run_blocking
+from oteapi_dlite.utils.utils import get_meta, open_resource
+
+if sys.version_info >= (3, 10):
+    from typing import Literal
+else:
+    from typing_extensions import Literal
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import IO
+
+    Box = tuple[int, int, int, int]
+
+
+# URI of the default entity for images.
+IMAGE_URI = "http://onto-ns.com/meta/1.0/Image"
+
+# Pillow modes with one uint8 value per band.
+UINT8_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK", "YCbCr", "LAB", "HSV")
+
+# EXIF tag of the image orientation.
+ORIENTATION = 0x0112
+
+# Number of pixels copied at a time from a decoded image to an instance.
+BLOCK_PIXELS = 1 << 20
+
+
+class DLiteImageParseConfig(AttrDict):
+    """Configuration for DLite image parser."""
+
+    label: Annotated[
+        str,
+        Field(
+            description="Label for the new instance in the collection.",
+        ),
+    ] = "image"
+
+    resourceType: Optional[Literal["resource/url"]] = Field(
+        "resource/url",
+        description=ResourceConfig.model_fields["resourceType"].description,
+    )
+    downloadUrl: Optional[HostlessAnyUrl] = Field(
+        None,
+        description=ResourceConfig.model_fields["downloadUrl"].description,
+    )
+    mediaType: Optional[str] = Field(
+        None,
+        description=ResourceConfig.model_fields["mediaType"].description,
+    )
+    collection_id: Annotated[
+        Optional[str], Field(description="A reference to a DLite collection.")
+    ] = None
+    crop: Annotated[
+        Optional[tuple[int, int, int, int]],
+        Field(
+            description=(
+                "Region of interest as (left, top, right, bottom) pixel "
+                "coordinates in the original image.  Only this region is "
+                "copied to the instance."
+            ),
+        ),
+    ] = None
+    max_size: Annotated[
+        Optional[tuple[int, int]],
+        Field(
+            description=(
+                "Maximum (width, height) of the instance.  Larger images are "
+                "downscaled, keeping the aspect ratio.  JPEG images are "
+                "decoded directly at a reduced scale (draft mode)."
+            ),
+        ),
+    ] = None
+    image_mode: Annotated[
+        Optional[str],
+        Field(
+            description=(
+                "Pillow mode to convert the image into, like 'L' or 'RGB'.  "
+                "Must have one byte per band.  By default, the mode of the "
+                "image is kept if it has one byte per band, palette images "
+                "are converted to 'RGB' or 'RGBA' and other images to 'L'.  "
+                "See https://pillow.readthedocs.io/en/stable/handbook/"
+                "concepts.html for details."
+            ),
+        ),
+    ] = None
+
+
+class DLiteImageStrategyConfig(ParserConfig):
+    """DLite image parse strategy config."""
+
+    entity: AnyHttpUrl = Field(
+        IMAGE_URI,
+        validate_default=True,
+        description=(
+            "IRI to the entity of the new instance.  It must have a uint8 "
+            "`data` property with dimensions (height, width, bands)."
+        ),
+    )
+    configuration: Annotated[
+        DLiteImageParseConfig,
+        Field(description="DLite image parse strategy-specific configuration."),
+    ]
+
+
+class DLiteImageSessionUpdate(DLiteSessionUpdate):
+    """Class for returning values from DLite image parser."""
+
+    inst_uuid: Annotated[
+        str,
+        Field(
+            description="UUID of new instance.",
+        ),
+    ]
+    label: Annotated[
+        str,
+        Field(
+            description="Label of the new instance in the collection.",
+        ),
+    ]
+
+
+@dataclass
+class DLiteImageStrategy:
+    """Parse strategy for images.
+
+    Decodes images with Pillow into the `data` property of a new instance
+    of the Image entity, see `load_image()`.
+
+    **Registers strategies**:
+
+    - `("parserType",
+        "image/vnd.dlite-image")`
+
+    """
+
+    parse_config: DLiteImageStrategyConfig
+
+    def initialize(self) -> DLiteSessionUpdate:
+        """Initialize."""
+        collection_id = (
+            self.parse_config.configuration.collection_id
+            or get_collection().uuid
+        )
+        return DLiteSessionUpdate(collection_id=collection_id)
+
+    def get(self) -> DLiteImageSessionUpdate:
+        """Execute the strategy.
+
+        This method will be called through the strategy-specific endpoint
+        of the OTE-API Services.
+
+        Returns:
+            DLite instance.
+
+        """
+        config = self.parse_config.configuration
+        meta = get_meta(str(self.parse_config.entity))
+        with open_resource(config) as stream:
+            inst = load_image(
+                stream,
+                meta,
+                crop=config.crop,
+                max_size=config.max_size,
+                image_mode=config.image_mode,
+            )
+
+        coll = get_collection(collection_id=config.collection_id)
+        coll.add(config.label, inst)
+        update_collection(coll)
+
+        return DLiteImageSessionUpdate(
+            collection_id=coll.uuid,
+            inst_uuid=inst.uuid,
+            label=config.label,
+        )
+
+    async def ainitialize(self) -> DLiteSessionUpdate:
+        """Initialize asynchronously.
+
+        Like `initialize()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.initialize)
+
+    async def aget(self) -> DLiteImageSessionUpdate:
+        """Execute the strategy asynchronously.
+
+        Like `get()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.get)
+
+
+def load_image(
+    stream: "IO[bytes]",
+    meta: dlite.Instance,
+    crop: "Optional[Box]" = None,
+    max_size: "Optional[tuple[int, int]]" = None,
+    image_mode: "Optional[str]" = None,
+) -> dlite.Instance:
+    """Decode an image into a new instance of `meta`.
+
+    The pixels are copied from Pillow directly into the memory of the
+    `data` property of the instance, a block of rows at a time, such that
+    no intermediate array of the whole image is created.  Only the region
+    of interest is decoded when possible:
+
+    - JPEG images that are downscaled are decoded at the smallest scale
+      not below the requested size (draft mode).
+    - Images stored in several uncompressed tiles or strips, like large
+      uncompressed TIFF images, are decoded one tile at a time, skipping
+      the tiles outside of `crop`.  This is not done when downscaling.
+
+    Other images are decoded as a whole before copying the region of
+    interest.
+
+    Parameters:
+        stream: Seekable binary stream with the image file.
+        meta: Metadata with a uint8 `data` property with dimensions
+            (height, width, bands).
+        crop: Region of interest as (left, top, right, bottom) pixel
+            coordinates in the original image.
+        max_size: Maximum (width, height).  Larger images are downscaled,
+            keeping the aspect ratio.
+        image_mode: Pillow mode to convert the image into.  See
+            `DLiteImageParseConfig`.
+
+    Returns:
+        The new instance.
+
+    Raises:
+        ValueError: If `crop` is outside of the image, `image_mode` does
+            not have one byte per band or `meta` has no such `data`
+            property.
+    """
+    prop = meta.getprop("data")
+    if prop.type != "uint8" or len(prop.shape) != 3:
+        raise ValueError(
+            f"{meta.uri} has no uint8 'data' property with dimensions "
+            "(height, width, bands)"
+        )
+
+    with Image.open(stream) as img:
+        mode = image_mode or _uint8_mode(img)
+        if mode not in UINT8_MODES:
+            raise ValueError(f"image mode '{mode}' has not one byte per band")
+        width, height = img.size
+        box = crop or (0, 0, width, height)
+        if not (
+            0 <= box[0] < box[2] <= width and 0 <= box[1] < box[3] <= height
+        ):
+            raise ValueError(
+                f"crop box {crop} is outside of the {width}x{height} image"
+            )
+        if max_size:
+            return _load_scaled(img, box, max_size, mode, meta)
+
+        inst = _new_image(meta, box[3] - box[1], box[2] - box[0], mode)
+        data = inst.get_property("data")
+        # Tiles are decoded without applying the EXIF orientation
+        if not (
+            len(img.tile) > 1
+            and ORIENTATION not in img.getexif()
+            and _copy_tiles(img, stream, box, mode, data)
+        ):
+            _copy_pixels(img, box, mode, data)
+    return inst
+
+
+def _load_scaled(
+    img: Image.Image,
+    box: "Box",
+    max_size: "tuple[int, int]",
+    mode: str,
+    meta: dlite.Instance,
+) -> dlite.Instance:
+    """Return a new instance of `meta` with the pixels of `img` within
+    `box`, downscaled to fit into `max_size`."""
+    width, height = img.size
+    left, top, right, bottom = box
+    # Size of the region of interest fitted into max_size
+    ratio = min(max_size[0] / (right - left), max_size[1] / (bottom - top), 1)
+    size = (
+        max(round((right - left) * ratio), 1),
+        max(round((bottom - top) * ratio), 1),
+    )
+    if ratio < 1:
+        img.draft(None, (math.ceil(width * ratio), math.ceil(height * ratio)))
+    # Scale the crop box to the (possibly) reduced draft image
+    scale = img.size[0] / width, img.size[1] / height
+    box = (
+        math.floor(left * scale[0]),
+        math.floor(top * scale[1]),
+        math.ceil(right * scale[0]),
+        math.ceil(bottom * scale[1]),
+    )
+    if size != (box[2] - box[0], box[3] - box[1]):
+        # Crop first, such that only the region of interest is converted
+        # and resized.  Palette images must be converted before resizing.
+        img = img.crop(box)
+        if img.mode not in UINT8_MODES:
+            img = img.convert(mode)
+        img = img.resize(size, reducing_gap=3.0)
+        box = (0, 0, *size)
+    inst = _new_image(meta, size[1], size[0], mode)
+    _copy_pixels(img, box, mode, inst.get_property("data"))
+    return inst
+
+
+def _uint8_mode(img: Image.Image) -> str:
+    """Return the mode with one byte per band to convert `img` into."""
+    if img.mode in UINT8_MODES:
+        return img.mode
+    if img.mode in ("P", "PA"):
+        return (
+            "RGBA" if img.mode == "PA" or "transparency" in img.info else "RGB"
+        )
+    return "L"
+
+
+def _new_image(
+    meta: dlite.Instance, height: int, width: int, mode: str
+) -> dlite.Instance:
+    """Return a new instance of `meta` with the dimensions of an image of
+    the given size and mode."""
+    dims = [str(dim) for dim in meta.getprop("data").shape]
+    return meta(
+        dimensions=dict(zip(dims, (height, width, Image.getmodebands(mode))))
+    )
+
+
+def _copy_pixels(
+    img: Image.Image,
+    box: "Box",
+    mode: str,
+    out: np.ndarray,
+    offset: "tuple[int, int]" = (0, 0),
+) -> None:
+    """Copy the pixels of `img` within `box` into `out`.
+
+    The pixels are converted to `mode` and copied a block of rows at a
+    time, starting at the (row, column) `offset` of `out`.
+    """
+    left, top, right, bottom = box
+    row, column = offset
+    nrows = max(BLOCK_PIXELS // (right - left), 1)
+    for y in range(top, bottom, nrows):
+        block = img.crop((left, y, right, min(y + nrows, bottom)))
+        if block.mode != mode:
+            block = block.convert(mode)
+        pixels = np.asarray(block)
+        out[
+            row + y - top : row + y - top + pixels.shape[0],
+            column : column + right - left,
+        ] = pixels.reshape(pixels.shape[0], pixels.shape[1], -1)
+
+
+def _raw_tile_sizes(img: Image.Image) -> "Optional[list[int]]":
+    """Return the number of bytes of each tile of `img` in the file, or
+    None if not all tiles are uncompressed."""
+    sizes = []
+    for codec, (x0, y0, x1, y1), _, args in img.tile:
+        if codec != "raw":
+            return None
+        rawmode, stride = (args, 0) if isinstance(args, str) else args[:2]
+        if not stride:
+            try:
+                stride = len(
+                    Image.new(img.mode, (x1 - x0, 1)).tobytes("raw", rawmode)
+                )
+            except ValueError:
+                return None
+        sizes.append(abs(stride) * (y1 - y0))
+    return sizes
+
+
+def _copy_tiles(
+    img: Image.Image,
+    stream: "IO[bytes]",
+    box: "Box",
+    mode: str,
+    out: np.ndarray,
+) -> bool:
+    """Decode the tiles of `img` intersecting `box` one at a time and copy
+    their pixels within `box` into `out`.
+
+    The tiles are read from `stream`, the file of `img`.  Only
+    uncompressed tiles can be decoded this way.
+
+    Returns:
+        Whether the tiles were copied.  False if not all tiles are
+        uncompressed, in which case nothing is copied.
+    """
+    sizes = _raw_tile_sizes(img)
+    if sizes is None:
+        return False
+    for (_, extent, offset, args), size in zip(img.tile, sizes):
+        region = (
+            max(extent[0], box[0]),
+            max(extent[1], box[1]),
+            min(extent[2], box[2]),
+            min(extent[3], box[3]),
+        )
+        if region[0] >= region[2] or region[1] >= region[3]:
+            continue
+        stream.seek(offset)
+        tile = Image.frombytes(
+            img.mode,
+            (extent[2] - extent[0], extent[3] - extent[1]),
+            stream.read(size),
+            "raw",
+            args,
+        )
+        _copy_pixels(
+            tile,
+            (
+                region[0] - extent[0],
+                region[1] - extent[1],
+                region[2] - extent[0],
+                region[3] - extent[1],
+            ),
+            mode,
+            out,
+            offset=(region[1] - box[1], region[0] - box[0]),
+        )
+    return True
@@ -1,9 +1,14 @@
 """Strategy for JSON parsing."""
 
+import json
+import logging
 import sys
-from typing import Annotated, Optional
+from enum import Enum
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import dlite
+import numpy as np
+from dlite.utils import infer_dimensions
 from oteapi.models import AttrDict, HostlessAnyUrl, ParserConfig, ResourceConfig
 from oteapi.plugins import create_strategy
 from pydantic import Field
@@ -11,13 +16,31 @@ from pydantic.dataclasses import dataclass
 
 from oteapi_dlite.models import DLiteSessionUpdate
 from oteapi_dlite.utils import get_collection, update_collection
-from oteapi_dlite.utils.utils import get_meta
+from oteapi_dlite.utils.aio import run_blocking
+from oteapi_dlite.utils.nputils import NUMPY_TYPES
+from oteapi_dlite.utils.storagepaths import register_storage_path
+from oteapi_dlite.utils.streaming import load_json_stream
+from oteapi_dlite.utils.utils import get_meta, open_resource
 
 if sys.version_info >= (3, 10):
     from typing import Literal
 else:
     from typing_extensions import Literal
 
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class RecordsEnum(str, Enum):
+    """
+    Defines the ways of parsing a JSON array of records
+    """
+
+    instances = "instances"
+    columns = "columns"
+
 
 class DLiteJsonParseConfig(AttrDict):
     """Configuration for DLite Excel parser."""
@@ -54,6 +77,35 @@ class DLiteJsonParseConfig(AttrDict):
     collection_id: Annotated[
         Optional[str], Field(description="A reference to a DLite collection.")
     ] = None
+    chunk_size: Annotated[
+        Optional[int],
+        Field(
+            description=(
+                "If given, parse the document incrementally, reading this "
+                "number of bytes at a time.  Only the properties of the "
+                "entity are decoded and numerical arrays are decoded "
+                "directly into NumPy arrays, which bounds the memory use "
+                "to about the size of the new instance.  Local files are "
+                "read directly instead of through the data cache."
+            ),
+            ge=1,
+        ),
+    ] = None
+    records: Annotated[
+        Optional[RecordsEnum],
+        Field(
+            description=(
+                "If given, the document is a JSON array of records, i.e. "
+                "objects mapping property names to values.  With "
+                "'instances', one instance is created per record and added "
+                "to the collection with the labels `<label>-0`, "
+                "`<label>-1`, ...  With 'columns', a single instance is "
+                "created, whose properties hold the values of all records "
+                "along their first dimension.  The dimensions are inferred "
+                "from the values in both cases."
+            ),
+        ),
+    ] = None
 
 
 class DLiteJsonStrategyConfig(ParserConfig):
@@ -69,17 +121,37 @@ class DLiteJsonSessionUpdate(DLiteSessionUpdate):
     """Class for returning values from DLite json parser."""
 
     inst_uuid: Annotated[
-        str,
+        Optional[str],
         Field(
-            description="UUID of new instance.",
+            description=(
+                "UUID of new instance.  None if `records='instances'`."
+            ),
         ),
-    ]
+    ] = None
     label: Annotated[
-        str,
+        Optional[str],
         Field(
-            description="Label of the new instance in the collection.",
+            description=(
+                "Label of the new instance in the collection.  None if "
+                "`records='instances'`."
+            ),
         ),
-    ]
+    ] = None
+    inst_uuids: Annotated[
+        Optional[list[str]],
+        Field(
+            description="UUIDs of the new instances if `records='instances'`.",
+        ),
+    ] = None
+    labels: Annotated[
+        Optional[list[str]],
+        Field(
+            description=(
+                "Labels of the new instances in the collection if "
+                "`records='instances'`."
+            ),
+        ),
+    ] = None
 
 
 @dataclass
@@ -118,11 +190,83 @@ class DLiteJsonStrategy:
             # Update dlite storage paths if provided
             if config.storage_path:
                 for storage_path in config.storage_path.split("|"):
-                    dlite.storage_path.append(storage_path)
+                    register_storage_path(storage_path)
         except Exception as e:
             print(f"Error during update of DLite storage path: {e}")
             raise RuntimeError("Failed to update DLite storage path.") from e
 
+        meta = get_meta(self.parse_config.entity)
+        if config.records:
+            if config.chunk_size:
+                logger.warning(
+                    "Streaming is not supported for records, ignoring "
+                    "`chunk_size`."
+                )
+            return self._parse_records(meta)
+        if config.chunk_size:
+            try:
+                with open_resource(config) as stream:
+                    inst = load_json_stream(stream, meta, config.chunk_size)
+            except ValueError as e:
+                raise RuntimeError("Failed to parse JSON data.") from e
+        else:
+            inst = self._parse(meta)
+
+        # Add collection and add the entity instance
+        coll = get_collection(
+            collection_id=self.parse_config.configuration.collection_id
+        )
+        coll.add(config.label, inst)
+        update_collection(coll)
+
+        return DLiteJsonSessionUpdate(
+            collection_id=coll.uuid,
+            inst_uuid=inst.uuid,
+            label=config.label,
+        )
+
+    def _parse_records(self, meta: dlite.Instance) -> DLiteJsonSessionUpdate:
+        """Parse a JSON array of records and add the new instances to the
+        collection."""
+        config = self.parse_config.configuration
+        try:
+            with open_resource(config) as stream:
+                records = json.load(stream)
+            if not isinstance(records, list) or not all(
+                isinstance(record, dict) for record in records
+            ):
+                raise ValueError("expected a JSON array of records")
+            if config.records == RecordsEnum.columns:
+                insts = [records2instance(meta, records)]
+                labels = [config.label]
+            else:
+                insts = records2instances(meta, records)
+                labels = [f"{config.label}-{n}" for n in range(len(insts))]
+        except ValueError as e:
+            raise RuntimeError("Failed to parse JSON data.") from e
+
+        # The collection is saved once for all instances
+        coll = get_collection(collection_id=config.collection_id)
+        for label, inst in zip(labels, insts):
+            coll.add(label, inst)
+        update_collection(coll)
+
+        if config.records == RecordsEnum.columns:
+            return DLiteJsonSessionUpdate(
+                collection_id=coll.uuid,
+                inst_uuid=insts[0].uuid,
+                label=config.label,
+            )
+        return DLiteJsonSessionUpdate(
+            collection_id=coll.uuid,
+            inst_uuids=[inst.uuid for inst in insts],
+            labels=labels,
+        )
+
+    def _parse(self, meta: dlite.Instance) -> dlite.Instance:
+        """Return a new instance of `meta` decoded with the JSON parser of
+        oteapi-core."""
+        config = self.parse_config.configuration
         try:
             # Instantiate and use JSON parser from oteapi core
             json_parser = create_strategy(
@@ -143,20 +287,136 @@ class DLiteJsonStrategy:
             raise RuntimeError("Failed to parse JSON data.") from e
 
         # Create DLite instance
-        meta = get_meta(self.parse_config.entity)
         inst = meta(dimensions={})
         for name in list(columns.keys()):
             inst[name] = columns[name]
+        return inst
 
-        # Add collection and add the entity instance
-        coll = get_collection(
-            collection_id=self.parse_config.configuration.collection_id
+    async def ainitialize(self) -> DLiteSessionUpdate:
+        """Initialize asynchronously.
+
+        Like `initialize()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.initialize)
+
+    async def aget(self) -> DLiteJsonSessionUpdate:
+        """Execute the strategy asynchronously.
+
+        Like `get()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.get)
+
+
+def records2instances(
+    meta: dlite.Instance, records: "list[dict[str, Any]]"
+) -> "list[dlite.Instance]":
+    """Return one instance of `meta` per record.
+
+    Properties given in all records are converted column-wise to NumPy
+    arrays, such that each instance is assigned a row of the array.  If
+    the values of all properties have the same shape in all records, the
+    dimensions are only inferred once.  Keys that are not properties of
+    `meta` are ignored.
+
+    Parameters:
+        meta: Metadata of the instances.
+        records: Dicts mapping property names to values.
+
+    Returns:
+        The new instances.
+    """
+    props = {prop.name: prop for prop in meta["properties"]}
+    names = [name for name in props if all(name in r for r in records)]
+    columns = {name: _column(props[name], records) for name in names}
+    # Dimensions only need to be inferred once if all values are rows
+    regular = all(
+        columns.get(name) is not None
+        for record in records
+        for name in record
+        if name in props
+    )
+
+    dimensions = None
+    insts = []
+    for n, record in enumerate(records):
+        values = {
+            name: (
+                columns[name][n]
+                if columns.get(name) is not None
+                else record[name]
+            )
+            for name in record
+            if name in props
+        }
+        if dimensions is None or not regular:
+            dims = infer_dimensions(meta, values)
+            dimensions = [dims[name] for name in meta.dimnames()]
+        inst = meta(dimensions)
+        for name, value in values.items():
+            inst[name] = value
+        insts.append(inst)
+    return insts
+
+
+def records2instance(
+    meta: dlite.Instance, records: "list[dict[str, Any]]"
+) -> dlite.Instance:
+    """Return an instance of `meta` holding the values of all records.
+
+    The values of each property are stacked along its first dimension,
+    which must be the same for all properties given in the records.
+
+    Parameters:
+        meta: Metadata of the instance.
+        records: Dicts mapping property names to values.
+
+    Returns:
+        The new instance.
+
+    Raises:
+        ValueError: If there are no records, a record misses a property
+            given in the first record or a property has no dimensions.
+    """
+    if not records:
+        raise ValueError("cannot infer dimensions without records")
+    props = {prop.name: prop for prop in meta["properties"]}
+    columns = {}
+    for name in records[0]:
+        if name not in props:
+            continue
+        if len(props[name].shape) == 0:
+            raise ValueError(
+                f"property {name!r} of {meta.uri} has no dimensions and "
+                "cannot hold the values of several records"
+            )
+        if not all(name in record for record in records):
+            raise ValueError(f"not all records have property {name!r}")
+        column = _column(props[name], records)
+        columns[name] = (
+            column if column is not None else [r[name] for r in records]
         )
-        coll.add(config.label, inst)
-        update_collection(coll)
 
-        return DLiteJsonSessionUpdate(
-            collection_id=coll.uuid,
-            inst_uuid=inst.uuid,
-            label=config.label,
+    inst = meta(dimensions=infer_dimensions(meta, columns))
+    for name, value in columns.items():
+        inst[name] = value
+    return inst
+
+
+def _column(
+    prop: "Any", records: "list[dict[str, Any]]"
+) -> "Optional[np.ndarray]":
+    """Return the values of `prop` in all records as a NumPy array.
+
+    Returns None if the property is not numerical or the values do not
+    have the same shape in all records.
+    """
+    if not NUMPY_TYPES.match(prop.type):
+        return None
+    try:
+        return np.asarray(
+            [record[prop.name] for record in records], dtype=prop.type
         )
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,363 @@
+"""Strategy for parsing tables in CSV files and Excel workbooks."""
+
+import sys
+from itertools import islice
+from typing import TYPE_CHECKING, Annotated, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from oteapi.models import AttrDict, HostlessAnyUrl, ParserConfig, ResourceConfig
+from pydantic import Field
+from pydantic.dataclasses import dataclass
+
+from oteapi_dlite.models import DLiteSessionUpdate
+from oteapi_dlite.utils import dict2recarray, get_collection, update_collection
+from oteapi_dlite.utils.aio import run_blocking
+from oteapi_dlite.utils.nputils import NUMPY_TYPES
+from oteapi_dlite.utils.storagepaths import register_storage_path
+from oteapi_dlite.utils.utils import get_meta, open_resource
+
+if sys.version_info >= (3, 10):
+    from typing import Literal
+else:
+    from typing_extensions import Literal
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+    from typing import IO, Any
+
+    import dlite
+
+
+# Media types of CSV files.  Other resources are read as Excel workbooks.
+CSV_MEDIATYPES = ("text/csv", "application/csv")
+
+
+class DLiteTableParseConfig(AttrDict):
+    """Configuration for DLite table parser."""
+
+    label: Annotated[
+        Optional[str],
+        Field(
+            description="Optional label for new instance in collection.",
+        ),
+    ] = "table-data"
+
+    resourceType: Optional[Literal["resource/url"]] = Field(
+        "resource/url",
+        description=ResourceConfig.model_fields["resourceType"].description,
+    )
+    downloadUrl: Optional[HostlessAnyUrl] = Field(
+        None,
+        description=ResourceConfig.model_fields["downloadUrl"].description,
+    )
+    mediaType: Optional[str] = Field(
+        None,
+        description=ResourceConfig.model_fields["mediaType"].description,
+    )
+    storage_path: Annotated[
+        Optional[str],
+        Field(
+            description="Path to metadata storage",
+        ),
+    ] = None
+    collection_id: Annotated[
+        Optional[str], Field(description="A reference to a DLite collection.")
+    ] = None
+    columns: Annotated[
+        Optional[dict[str, str]],
+        Field(
+            description=(
+                "Dict mapping column names to property names.  By default, "
+                "all properties are read from the columns with the same "
+                "names.  All mapped columns must be in the table.  Other "
+                "columns are skipped."
+            ),
+        ),
+    ] = None
+    sheet: Annotated[
+        Optional[str],
+        Field(
+            description=(
+                "Name of the worksheet to parse.  Defaults to the active "
+                "worksheet.  Not used for CSV files."
+            ),
+        ),
+    ] = None
+    delimiter: Annotated[
+        str,
+        Field(description="Delimiter of CSV files."),
+    ] = ","
+    chunk_rows: Annotated[
+        int,
+        Field(
+            description=(
+                "Number of rows read and converted at a time.  Bounds the "
+                "memory used in addition to the new instance."
+            ),
+            ge=1,
+        ),
+    ] = 10_000
+
+
+class DLiteTableStrategyConfig(ParserConfig):
+    """DLite table parse strategy config."""
+
+    configuration: Annotated[
+        DLiteTableParseConfig,
+        Field(description="DLite table parse strategy-specific configuration."),
+    ]
+
+
+class DLiteTableSessionUpdate(DLiteSessionUpdate):
+    """Class for returning values from DLite table parser."""
+
+    inst_uuid: Annotated[
+        str,
+        Field(
+            description="UUID of new instance.",
+        ),
+    ]
+    label: Annotated[
+        str,
+        Field(
+            description="Label of the new instance in the collection.",
+        ),
+    ]
+
+
+@dataclass
+class DLiteTableStrategy:
+    """Parse strategy for tables in CSV files and Excel workbooks.
+
+    The first row holds the column names.  Each column is mapped to a
+    one-dimensional property of the entity, all sharing the same row
+    dimension.  The table is read `chunk_rows` rows at a time, each chunk
+    converted to typed columns with `dict2recarray()` and appended to
+    growing column arrays.  Numerical columns are converted to the type of
+    their property, with missing values as NaN.
+
+    **Registers strategies**:
+
+    - `("parserType",
+        "table/vnd.dlite-table")`
+
+    """
+
+    parse_config: DLiteTableStrategyConfig
+
+    def initialize(self) -> DLiteSessionUpdate:
+        """Initialize."""
+        collection_id = (
+            self.parse_config.configuration.collection_id
+            or get_collection().uuid
+        )
+        return DLiteSessionUpdate(collection_id=collection_id)
+
+    def get(self) -> DLiteTableSessionUpdate:
+        """Execute the strategy.
+
+        This method will be called through the strategy-specific endpoint
+        of the OTE-API Services.
+
+        Returns:
+            DLite instance.
+
+        """
+        config = self.parse_config.configuration
+        if config.storage_path:
+            for storage_path in config.storage_path.split("|"):
+                register_storage_path(storage_path)
+
+        meta = get_meta(self.parse_config.entity)
+        columns = config.columns or {
+            prop.name: prop.name for prop in meta["properties"]
+        }
+        dim = _row_dimension(meta, columns)
+        dtypes = {
+            prop.name: np.dtype(prop.type)
+            for prop in meta["properties"]
+            if prop.name in columns.values() and NUMPY_TYPES.match(prop.type)
+        }
+
+        buffers = _read_columns(config, columns, dtypes)
+        nrows = {buffer.size for buffer in buffers.values()}
+        if len(nrows) != 1:
+            raise ValueError(
+                f"columns of the table have different numbers of rows: "
+                f"{sorted(nrows)}"
+            )
+        inst = meta(dimensions={dim: nrows.pop()})
+        # Release each column as soon as it is copied into the instance
+        for name in list(buffers):
+            inst[name] = buffers.pop(name).array()
+
+        coll = get_collection(collection_id=config.collection_id)
+        coll.add(config.label, inst)
+        update_collection(coll)
+
+        return DLiteTableSessionUpdate(
+            collection_id=coll.uuid,
+            inst_uuid=inst.uuid,
+            label=config.label,
+        )
+
+    async def ainitialize(self) -> DLiteSessionUpdate:
+        """Initialize asynchronously.
+
+        Like `initialize()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.initialize)
+
+    async def aget(self) -> DLiteTableSessionUpdate:
+        """Execute the strategy asynchronously.
+
+        Like `get()`, but awaitable.  The blocking work is run in the
+        executor of `oteapi_dlite.utils.aio`.
+        """
+        return await run_blocking(self.get)
+
+
+def _row_dimension(meta: "dlite.Metadata", columns: "dict[str, str]") -> str:
+    """Return the name of the row dimension of the properties in `columns`.
+
+    Raises:
+        ValueError: If the properties are not one-dimensional properties of
+            `meta` with the same dimension.
+    """
+    props = {prop.name: prop for prop in meta["properties"]}
+    unknown = sorted(set(columns.values()).difference(props))
+    if unknown:
+        raise ValueError(f"{meta.uri} has no properties {unknown}")
+    shapes = {
+        tuple(str(dim) for dim in props[name].shape)
+        for name in columns.values()
+    }
+    if len(shapes) != 1 or len(next(iter(shapes))) != 1:
+        raise ValueError(
+            f"properties {sorted(columns.values())} of {meta.uri} must "
+            "be one-dimensional with the same dimension"
+        )
+    ((dim,),) = shapes
+    return dim
+
+
+def _read_columns(
+    config: DLiteTableParseConfig,
+    columns: "dict[str, str]",
+    dtypes: "dict[str, np.dtype]",
+) -> "dict[str, _ColumnBuffer]":
+    """Read the table in chunks and return the column buffers, keyed by
+    property name."""
+    buffers = {name: _ColumnBuffer() for name in columns.values()}
+    with open_resource(config) as stream:
+        if config.mediaType in CSV_MEDIATYPES or str(
+            config.downloadUrl
+        ).endswith(".csv"):
+            chunks = _csv_chunks(stream, columns, dtypes, config)
+        else:
+            chunks = _excel_chunks(stream, columns, config)
+        for chunk in chunks:
+            rec = dict2recarray(chunk, dtypes=dtypes)
+            for name in rec.dtype.names:
+                buffers[name].append(rec[name])
+    return buffers
+
+
+def _csv_chunks(
+    stream: "IO[bytes]",
+    columns: "dict[str, str]",
+    dtypes: "dict[str, np.dtype]",
+    config: DLiteTableParseConfig,
+) -> "Iterator[dict[str, Any]]":
+    """Yield chunks of a CSV file as dicts mapping property names to
+    column arrays."""
+    # Keep columns of non-numerical properties as strings
+    strings = {
+        column: str for column, name in columns.items() if name not in dtypes
+    }
+    with pd.read_csv(
+        stream,
+        sep=config.delimiter,
+        usecols=lambda column: column in columns,
+        dtype=strings,
+        chunksize=config.chunk_rows,
+    ) as reader:
+        for frame in reader:
+            _check_columns(frame.columns, columns)
+            yield {
+                columns[column]: frame[column].to_numpy()
+                for column in frame.columns
+            }
+
+
+def _excel_chunks(
+    stream: "IO[bytes]",
+    columns: "dict[str, str]",
+    config: DLiteTableParseConfig,
+) -> "Iterator[dict[str, Any]]":
+    """Yield chunks of an Excel worksheet as dicts mapping property names
+    to lists of values.  Empty rows are skipped."""
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet = workbook[config.sheet] if config.sheet else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        _check_columns(header, columns)
+        indices = [
+            (n, columns[column])
+            for n, column in enumerate(header)
+            if column in columns
+        ]
+        while chunk := list(islice(rows, config.chunk_rows)):
+            values = [
+                [row[n] if n < len(row) else None for n, _ in indices]
+                for row in chunk
+            ]
+            values = [row for row in values if any(v is not None for v in row)]
+            if values:
+                yield {
+                    name: [row[i] for row in values]
+                    for i, (_, name) in enumerate(indices)
+                }
+    finally:
+        workbook.close()
+
+
+def _check_columns(header: "Any", columns: "dict[str, str]") -> None:
+    """Check that the columns mapped to properties are in `header`."""
+    missing = sorted(set(columns).difference(header))
+    if missing:
+        raise ValueError(f"columns {missing} not found in table")
+
+
+class _ColumnBuffer:
+    """Growing array holding the values of a column."""
+
+    def __init__(self) -> None:
+        self._data: "Optional[np.ndarray]" = None
+        self.size = 0
+
+    def append(self, values: np.ndarray) -> None:
+        """Append `values` to the column."""
+        if self._data is None:
+            self._data = np.empty(len(values), dtype=values.dtype)
+        elif values.dtype != self._data.dtype:
+            # E.g. strings longer than in previous chunks
+            self._data = self._data.astype(
+                np.promote_types(self._data.dtype, values.dtype)
+            )
+        size = self.size + len(values)
+        if size > len(self._data):
+            self._data.resize(max(2 * len(self._data), size), refcheck=False)
+        self._data[self.size : size] = values
+        self.size = size
+
+    def array(self) -> np.ndarray:
+        """Return the values of the column."""
+        if self._data is None:
+            return np.empty(0)
+        self._data.resize(self.size, refcheck=False)
+        return self._data
@@ -0,0 +1,69 @@
+"""Support for running the strategies from an asyncio event loop.
+
+DLite storage plugins, the datacache, tripper and SPARQLWrapper are all
+blocking.  `run_blocking()` offloads such calls to a bounded, process-wide
+thread pool, such that the event loop of an OTEAPI services worker stays
+responsive and can serve many pipelines concurrently, while the number of
+simultaneous storage and network operations stays limited.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+    from typing import Any, Optional, TypeVar
+
+    T = TypeVar("T")
+
+
+# Maximum number of blocking calls run at the same time.
+MAX_WORKERS = 8
+
+_executor: "Optional[ThreadPoolExecutor]" = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the executor used by `run_blocking()`.
+
+    The executor is created on first use with `MAX_WORKERS` threads.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="oteapi-dlite"
+            )
+        return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the executor used by `run_blocking()`.
+
+    A new executor is created, with the current value of `MAX_WORKERS`,
+    the next time `run_blocking()` is called.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run_blocking(
+    func: "Callable[..., T]", /, *args: "Any", **kwargs: "Any"
+) -> "T":
+    """Run `func(*args, **kwargs)` in the executor and await the result.
+
+    Context variables of the calling task are visible to `func`.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(
+        contextvars.copy_context().run, func, *args, **kwargs
+    )
+    return await loop.run_in_executor(get_executor(), call)
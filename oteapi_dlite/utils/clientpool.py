@@ -0,0 +1,405 @@
+"""Process-wide pool of clients for remote triplestores and SPARQL services.
+
+Creating a `tripper.Triplestore` for a remote backend or a `SPARQLWrapper`
+and authenticating with it for every pipeline run is expensive.  The
+context managers in this module check out a client from a pool keyed by
+the connection parameters and return it to the pool when the block is
+left, such that it can be reused by later pipeline runs.
+
+A client is only used by one block at a time.  Clients that have been idle
+for more than `HEALTH_CHECK_INTERVAL` seconds are checked with a trivial
+ASK query before they are reused, clients that have been idle for more
+than `IDLE_TIMEOUT` seconds are evicted and clients used in a block that
+raised an exception are discarded.
+
+Pooled SPARQLWrapper clients keep their HTTP connection to the endpoint
+open between queries.  This relies on `SPARQLWrapper._query()`, hence it is
+only done for the versions of SPARQLWrapper listed in
+`KEEPALIVE_SPARQLWRAPPER_VERSIONS`.  With other versions, a new connection
+is opened for every query.
+
+Namespaces bound to a pooled Triplestore are reset to those it was created
+with when it is returned to the pool.
+"""
+
+import hashlib
+import http.client
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+import weakref
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, NamedTuple
+
+from SPARQLWrapper import JSON, SPARQLWrapper
+from SPARQLWrapper import __version__ as sparqlwrapper_version
+from SPARQLWrapper.SPARQLExceptions import (
+    EndPointInternalError,
+    EndPointNotFound,
+    QueryBadFormed,
+    Unauthorized,
+    URITooLong,
+)
+from tripper import Triplestore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Hashable, Iterator
+    from contextlib import AbstractContextManager
+    from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Number of seconds after which idle clients are evicted from the pool.
+IDLE_TIMEOUT = 300.0
+
+# Number of seconds a client may be idle before it is health checked when
+# it is checked out.
+HEALTH_CHECK_INTERVAL = 30.0
+
+# Query used for health checks.
+HEALTH_CHECK_QUERY = "ASK {}"
+
+# Versions (major.minor) of SPARQLWrapper whose private `_query()` method
+# pooled clients are known to override correctly.
+KEEPALIVE_SPARQLWRAPPER_VERSIONS = ("2.0",)
+
+# HTTP methods that may be sent again if a reused connection was closed.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _Idle(NamedTuple):
+    """An idle client in the pool."""
+
+    client: "Any"
+    since: float
+
+
+# Idle clients, keyed by their connection parameters.  The most recently
+# used client of each key is last.
+_idle: "dict[Hashable, list[_Idle]]" = {}
+_lock = threading.Lock()
+
+# Namespaces bound to pooled triplestores when they were created.
+_namespaces: "weakref.WeakKeyDictionary[Triplestore, dict[str, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# SPARQLWrapper exceptions raised for HTTP error codes.
+_HTTP_ERRORS = {
+    400: QueryBadFormed,
+    401: Unauthorized,
+    404: EndPointNotFound,
+    414: URITooLong,
+    500: EndPointInternalError,
+}
+
+
+class _KeepAliveHandler(urllib.request.HTTPSHandler):
+    """urllib handler keeping one persistent connection per host.
+
+    A connection is only reused once its last response has been read.  If
+    the server has closed a reused connection, an idempotent request is
+    sent again over a new one.  Requests are idempotent if their method is
+    in `IDEMPOTENT_METHODS` or their `idempotent` attribute is true.
+    """
+
+    # Take precedence over the default HTTP handler
+    handler_order = 400
+
+    http_request = urllib.request.AbstractHTTPHandler.do_request_
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Connections and their last responses, keyed by scheme and host
+        self._connections: "dict[tuple[str, str], tuple[Any, Any]]" = {}
+
+    def http_open(self, req: urllib.request.Request) -> "Any":
+        """Open an HTTP request."""
+        return self._open(http.client.HTTPConnection, req)
+
+    def https_open(self, req: urllib.request.Request) -> "Any":
+        """Open an HTTPS request."""
+        return self._open(
+            http.client.HTTPSConnection,
+            req,
+            context=self._context,  # type: ignore[attr-defined]
+        )
+
+    def close(self) -> None:
+        """Close all connections."""
+        for conn, _ in self._connections.values():
+            conn.close()
+        self._connections.clear()
+
+    def _open(
+        self, conn_class: "Any", req: urllib.request.Request, **kwargs
+    ) -> "Any":
+        """Send `req` over the persistent connection to its host."""
+        headers = dict(req.unredirected_hdrs)
+        headers.update(
+            (name, value)
+            for name, value in req.headers.items()
+            if name not in headers
+        )
+        headers = {name.title(): value for name, value in headers.items()}
+
+        key = (req.type, req.host)
+        conn, response = self._connections.pop(key, (None, None))
+        if conn is not None and not response.isclosed():
+            conn.close()
+            conn = None
+        while True:
+            reused = conn is not None
+            if conn is None:
+                conn = conn_class(req.host, timeout=req.timeout, **kwargs)
+            try:
+                conn.request(req.get_method(), req.selector, req.data, headers)
+                response = conn.getresponse()
+                break
+            except (http.client.HTTPException, OSError) as error:
+                conn.close()
+                conn = None
+                if not (reused and _retry(req, error)):
+                    raise urllib.error.URLError(error) from error
+        self._connections[key] = (conn, response)
+        response.url = req.get_full_url()
+        response.msg = response.reason
+        return response
+
+
+def _retry(req: urllib.request.Request, error: Exception) -> bool:
+    """Whether to send `req` again after `error` on a reused connection."""
+    closed = (
+        http.client.RemoteDisconnected,
+        ConnectionResetError,
+        BrokenPipeError,
+    )
+    return isinstance(error, closed) and (
+        req.get_method() in IDEMPOTENT_METHODS
+        or getattr(req, "idempotent", False)
+    )
+
+
+class _KeepAliveSPARQLWrapper(SPARQLWrapper):
+    """SPARQLWrapper keeping its HTTP connection open between queries.
+
+    Only used with the versions of SPARQLWrapper in
+    `KEEPALIVE_SPARQLWRAPPER_VERSIONS`.  Queries are idempotent, updates
+    are not.
+    """
+
+    def __init__(self, endpoint: str, **kwargs) -> None:
+        super().__init__(endpoint, **kwargs)
+        self._handler = _KeepAliveHandler()
+        self._opener = urllib.request.build_opener(self._handler)
+
+    def close(self) -> None:
+        """Close the HTTP connection."""
+        self._handler.close()
+
+    def _query(self) -> "tuple[Any, str]":
+        """Execute the query like `SPARQLWrapper._query()`."""
+        request = self._createRequest()
+        request.idempotent = (  # type: ignore[attr-defined]
+            not self.isSparqlUpdateRequest()
+        )
+        kwargs = {"timeout": self.timeout} if self.timeout else {}
+        try:
+            response = self._opener.open(request, **kwargs)
+        except urllib.error.HTTPError as error:
+            if error.code in _HTTP_ERRORS:
+                raise _HTTP_ERRORS[error.code](error.read()) from error
+            raise
+        return response, self.returnFormat
+
+
+def sparql_client(
+    endpoint: str,
+    username: "Optional[str]" = None,
+    password: "Optional[str]" = None,
+) -> "AbstractContextManager[SPARQLWrapper]":
+    """Check out a SPARQLWrapper for `endpoint` from the pool.
+
+    Parameters:
+        endpoint: URL of the SPARQL endpoint.
+        username: User name for basic HTTP authentication.
+        password: Password for basic HTTP authentication.
+
+    Returns:
+        A context manager returning a SPARQLWrapper configured with the
+        given credentials.
+    """
+
+    def create() -> SPARQLWrapper:
+        sparql = (
+            _KeepAliveSPARQLWrapper(endpoint)
+            if _keepalive_supported()
+            else SPARQLWrapper(endpoint)
+        )
+        sparql.setHTTPAuth("BASIC")
+        sparql.setCredentials(username, password)
+        return sparql
+
+    key = ("sparql", endpoint, username, _digest(password))
+    return _checkout(key, create, _sparql_alive)
+
+
+def triplestore_client(
+    backend: str, **kwargs
+) -> "AbstractContextManager[Triplestore]":
+    """Check out a Triplestore for a remote backend from the pool.
+
+    Parameters:
+        backend: Name of the tripper backend.
+        kwargs: Other arguments passed to `tripper.Triplestore`, like
+            `base_iri`, `triplestore_url`, `database`, `uname` and `pwd`.
+
+    Returns:
+        A context manager returning a Triplestore instance.  Namespaces
+        bound to it are reset when it is returned to the pool.
+    """
+    key = (
+        "triplestore",
+        backend,
+        *sorted(
+            (name, _digest(value) if name == "pwd" else value)
+            for name, value in kwargs.items()
+        ),
+    )
+
+    def create() -> Triplestore:
+        ts = Triplestore(backend=backend, **kwargs)
+        _namespaces[ts] = dict(ts.namespaces)
+        return ts
+
+    return _checkout(key, create, _triplestore_alive, _reset_namespaces)
+
+
+def clear_client_pool() -> None:
+    """Close and remove all idle clients in the pool."""
+    with _lock:
+        entries = [entry for idle in _idle.values() for entry in idle]
+        _idle.clear()
+    for entry in entries:
+        _close(entry.client)
+
+
+@contextmanager
+def _checkout(
+    key: "Hashable",
+    create: "Callable[[], Any]",
+    alive: "Callable[[Any], bool]",
+    reset: "Optional[Callable[[Any], None]]" = None,
+) -> "Iterator[Any]":
+    """Check out a client with the given key, creating it if needed.
+
+    `reset` is called with the client before it is returned to the pool.
+    Clients that fail to be reset are discarded.
+    """
+    client = _acquire(key, alive)
+    if client is None:
+        client = create()
+    try:
+        yield client
+    except BaseException:
+        _close(client)
+        raise
+    if reset:
+        try:
+            reset(client)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.info("Discarding client for %s", key[:2], exc_info=True)
+            _close(client)
+            return
+    with _lock:
+        _idle.setdefault(key, []).append(_Idle(client, time.monotonic()))
+
+
+def _acquire(
+    key: "Hashable", alive: "Callable[[Any], bool]"
+) -> "Optional[Any]":
+    """Return a healthy idle client with the given key or None."""
+    now = time.monotonic()
+    with _lock:
+        evicted = []
+        for idle_key, idle in list(_idle.items()):
+            evicted.extend(e for e in idle if now - e.since > IDLE_TIMEOUT)
+            idle[:] = [e for e in idle if now - e.since <= IDLE_TIMEOUT]
+            if not idle:
+                del _idle[idle_key]
+    for entry in evicted:
+        _close(entry.client)
+
+    while True:
+        with _lock:
+            idle = _idle.get(key)
+            if not idle:
+                return None
+            entry = idle.pop()
+        if now - entry.since <= HEALTH_CHECK_INTERVAL or alive(entry.client):
+            return entry.client
+        logger.info("Discarding unhealthy client for %s", key[:2])
+        _close(entry.client)
+
+
+def _keepalive_supported() -> bool:
+    """Whether pooled SPARQL clients can keep their connection open."""
+    version = ".".join(sparqlwrapper_version.split(".")[:2])
+    return version in KEEPALIVE_SPARQLWRAPPER_VERSIONS
+
+
+def _sparql_alive(sparql: SPARQLWrapper) -> bool:
+    """Return whether the SPARQL endpoint answers a trivial query."""
+    try:
+        sparql.setReturnFormat(JSON)
+        sparql.setQuery(HEALTH_CHECK_QUERY)
+        sparql.query().convert()
+    except Exception:  # pylint: disable=broad-exception-caught
+        return False
+    return True
+
+
+def _triplestore_alive(ts: Triplestore) -> bool:
+    """Return whether the triplestore answers a trivial query.
+
+    Triplestores whose backend does not support queries are assumed to be
+    alive.
+    """
+    if not hasattr(ts.backend, "query"):
+        return True
+    try:
+        ts.query(HEALTH_CHECK_QUERY)
+    except Exception:  # pylint: disable=broad-exception-caught
+        return False
+    return True
+
+
+def _reset_namespaces(ts: Triplestore) -> None:
+    """Bind the namespaces of `ts` to those it was created with."""
+    initial = _namespaces.get(ts, {})
+    for prefix in set(ts.namespaces) - set(initial):
+        ts.bind(prefix, None)
+    for prefix, namespace in initial.items():
+        if ts.namespaces.get(prefix) != namespace:
+            ts.bind(prefix, namespace)
+
+
+def _close(client: "Any") -> None:
+    """Close a client, ignoring errors."""
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.debug("Error closing pooled client", exc_info=True)
+
+
+def _digest(secret: "Optional[str]") -> "Optional[str]":
+    """Return a digest of `secret`, such that it is not kept as a key."""
+    if secret is None:
+        return None
+    return hashlib.sha256(secret.encode()).hexdigest()
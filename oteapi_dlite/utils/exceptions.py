@@ -7,3 +7,7 @@ class OteapiDliteException(Exception):
 
 class CollectionNotFound(OteapiDliteException):
     """A dlite.Collection could not be found."""
+
+
+class CollectionVersionConflict(OteapiDliteException):
+    """A dlite.Collection has been saved by someone else in the meantime."""
@@ -0,0 +1,182 @@
+"""Secondary indexes on the relations of DLite collections.
+
+Looking up instances by label or metadata, or relations by predicate,
+requires a scan over all relations of a DLite collection.  A
+`CollectionIndex` maps labels to UUIDs, metadata URIs to labels and
+predicates to relations, such that these lookups take time proportional
+to the size of the result.
+
+Indexes are maintained incrementally by `oteapi_dlite.utils.persistence`
+when collections are saved and loaded, and persisted together with them.
+Use `get_index()` there to obtain the index of a collection.
+"""
+
+from typing import TYPE_CHECKING
+
+from tripper.backends.collection import CollectionStrategy
+from tripper.literal import Literal
+from tripper.triplestore import Triplestore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable, Iterator
+    from typing import Any, Optional
+
+    import dlite
+
+    Relation = tuple[str, str, str, Optional[str]]
+
+
+class CollectionIndex:
+    """Index of the relations of a collection.
+
+    Parameters:
+        relations: Initial (s, p, o, d) relations, in the order they were
+            added to the collection.
+    """
+
+    def __init__(self, relations: "Iterable[Relation]" = ()) -> None:
+        self.nrelations = 0
+        self._uuids: "dict[str, str]" = {}
+        self._labels: "dict[str, dict[str, None]]" = {}
+        self._predicates: "dict[str, dict[Relation, None]]" = {}
+        self.update(added=relations)
+
+    def update(
+        self,
+        added: "Iterable[Relation]" = (),
+        removed: "Iterable[Relation]" = (),
+    ) -> None:
+        """Update the index with relations added to or removed from the
+        collection."""
+        for relation in removed:
+            s, p, o, _ = relation
+            relations = self._predicates.get(p)
+            if relations is None or relation not in relations:
+                continue
+            del relations[relation]
+            if not relations:
+                del self._predicates[p]
+            self.nrelations -= 1
+            if p == "_has-uuid" and self._uuids.get(s) == o:
+                del self._uuids[s]
+            elif p == "_has-meta" and o in self._labels:
+                self._labels[o].pop(s, None)
+                if not self._labels[o]:
+                    del self._labels[o]
+
+        for relation in added:
+            s, p, o, _ = relation
+            relations = self._predicates.setdefault(p, {})
+            if relation in relations:
+                continue
+            relations[relation] = None
+            self.nrelations += 1
+            if p == "_has-uuid":
+                self._uuids[s] = o
+            elif p == "_has-meta":
+                self._labels.setdefault(o, {})[s] = None
+
+    def get_uuid(self, label: str) -> "Optional[str]":
+        """Return the UUID of the instance with the given label or None."""
+        return self._uuids.get(label)
+
+    def get_labels(self, metaid: "Optional[str]" = None) -> "list[str]":
+        """Return the labels of the instances in the collection.
+
+        Parameters:
+            metaid: If given, only return the labels of the instances of
+                this metadata.
+
+        Returns:
+            The labels, in the order the instances were added.
+        """
+        if metaid is None:
+            return list(self._uuids)
+        return list(self._labels.get(str(metaid).rstrip("#/"), ()))
+
+    def get_metas(self) -> "list[str]":
+        """Return the URIs of the metadata of the instances."""
+        return list(self._labels)
+
+    def get_predicates(self) -> "list[str]":
+        """Return all predicates of the relations."""
+        return list(self._predicates)
+
+    def get_relations(self, p: str) -> "list[Relation]":
+        """Return the (s, p, o, d) relations with predicate `p`."""
+        return list(self._predicates.get(p, ()))
+
+    def asdict(self) -> "dict[str, Any]":
+        """Return a dict representation that can be stored in the datacache
+        and passed to `from_dict()`."""
+        return {
+            "relations": [
+                relation
+                for relations in self._predicates.values()
+                for relation in relations
+            ],
+            "uuids": self._uuids,
+            "labels": {
+                metaid: list(labels) for metaid, labels in self._labels.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: "dict[str, Any]") -> "CollectionIndex":
+        """Return an index from the representation returned by `asdict()`."""
+        index = cls()
+        for relation in data["relations"]:
+            index._predicates.setdefault(relation[1], {})[
+                tuple(relation)  # type: ignore[index]
+            ] = None
+        index.nrelations = len(data["relations"])
+        index._uuids = dict(data["uuids"])
+        index._labels = {
+            metaid: dict.fromkeys(labels)
+            for metaid, labels in data["labels"].items()
+        }
+        return index
+
+
+class IndexedCollectionStrategy(CollectionStrategy):
+    """Tripper backend for DLite collections answering queries with a
+    given predicate from a `CollectionIndex`.
+
+    Only meant for reading.  Triples added through this backend are added
+    to the collection, but not to the index.
+
+    Arguments:
+        collection: The collection.
+        index: Index of `collection`.
+    """
+
+    def __init__(
+        self, collection: "dlite.Collection", index: CollectionIndex
+    ) -> None:
+        super().__init__(collection=collection)
+        self.index = index
+
+    def triples(self, triple: "tuple") -> "Iterator[tuple]":
+        """Returns a generator over matching triples."""
+        s, p, o = triple
+        if p is None:
+            yield from super().triples(triple)
+            return
+        for rs, rp, ro, rd in self.index.get_relations(str(p)):
+            if (s is None or rs == s) and (o is None or ro == o):
+                if rd:
+                    lang = rd[1:] if rd[0] == "@" else None
+                    dt = None if lang else rd
+                    yield rs, rp, Literal(ro, lang=lang, datatype=dt)
+                else:
+                    yield rs, rp, ro
+
+
+def indexed_triplestore(
+    collection: "dlite.Collection", index: CollectionIndex
+) -> Triplestore:
+    """Return a triplestore reading from `collection` using `index`."""
+    ts = Triplestore(backend="collection", collection=collection)
+    # Tripper only instantiates backends by module name, so replace it
+    ts.backend = IndexedCollectionStrategy(collection, index)
+    return ts
@@ -0,0 +1,202 @@
+"""Per-collection reader/writer locks.
+
+Collections are persisted in the datacache with a read-modify-write cycle,
+see `oteapi_dlite.utils.persistence`.  The locks in this module serialise
+writers of the same collection while allowing concurrent readers, both
+between threads and, on platforms providing `fcntl`, between processes
+sharing the same datacache directory.  Different collections are locked
+independently, such that independent pipelines do not block each other.
+
+Locks are reentrant for the thread holding them.  A thread holding the
+write lock may also take the read lock, but a read lock cannot be upgraded
+to a write lock.
+"""
+
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from oteapi.datacache import DataCache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+    from typing import IO, Optional
+
+
+# Name of the subdirectory of the datacache directory holding lock files.
+LOCK_DIR = "oteapi-dlite-locks"
+
+
+class CollectionLock:
+    """Reader/writer lock of a single collection.
+
+    Writers are preferred: once a writer is waiting, new readers wait for
+    it to finish.  Across processes, the lock is implemented with
+    `flock()` on a lock file, shared by all threads of the process.
+
+    Parameters:
+        collection_id: UUID of the collection.
+        path: Path to the lock file.  If None, the lock is only effective
+            within this process.
+    """
+
+    def __init__(
+        self, collection_id: str, path: "Optional[Path]" = None
+    ) -> None:
+        self.collection_id = collection_id
+        self._file_lock = _FileLock(path)
+        self._cond = threading.Condition()
+        self._readers: "dict[int, int]" = {}
+        self._writer: "Optional[int]" = None
+        self._depth = 0
+        self._waiting_writers = 0
+
+    @property
+    def path(self) -> "Optional[Path]":
+        """Path to the lock file."""
+        return self._file_lock.path
+
+    @contextmanager
+    def read(self) -> "Iterator[None]":
+        """Context manager holding the lock for reading."""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._depth += 1
+            else:
+                if me not in self._readers:
+                    self._cond.wait_for(
+                        lambda: self._writer is None
+                        and not self._waiting_writers
+                    )
+                    if not self._readers:
+                        self._file_lock.lock(write=False)
+                self._readers[me] = self._readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                if self._writer == me:
+                    self._depth -= 1
+                else:
+                    self._readers[me] -= 1
+                    if not self._readers[me]:
+                        del self._readers[me]
+                    if not self._readers:
+                        self._file_lock.unlock()
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> "Iterator[None]":
+        """Context manager holding the lock for writing."""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._depth += 1
+            else:
+                if me in self._readers:
+                    raise RuntimeError(
+                        "cannot upgrade a read lock of collection "
+                        f"{self.collection_id} to a write lock"
+                    )
+                self._waiting_writers += 1
+                try:
+                    self._cond.wait_for(
+                        lambda: self._writer is None and not self._readers
+                    )
+                finally:
+                    self._waiting_writers -= 1
+                self._file_lock.lock(write=True)
+                self._writer = me
+                self._depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if not self._depth:
+                    self._writer = None
+                    self._file_lock.unlock()
+                    self._cond.notify_all()
+
+
+class _FileLock:
+    """`flock()` lock of a lock file, shared by all threads of a process.
+
+    The lock is only taken and released with the condition of the owning
+    `CollectionLock` held.
+
+    Parameters:
+        path: Path to the lock file.  If None, or if `fcntl` is not
+            available, locking does nothing.
+    """
+
+    def __init__(self, path: "Optional[Path]") -> None:
+        self.path = path
+        self._file: "Optional[IO[bytes]]" = None
+
+    def lock(self, write: bool) -> None:
+        """Lock the lock file."""
+        if self.path is None or fcntl is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # pylint: disable-next=consider-using-with
+        self._file = open(self.path, "ab")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+        except BaseException:
+            self._file.close()
+            self._file = None
+            raise
+
+    def unlock(self) -> None:
+        """Unlock the lock file."""
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+# Locks in use, keyed by collection UUID.  A lock is removed when it is no
+# longer referenced, i.e. when no thread is holding or waiting for it.
+_locks: "weakref.WeakValueDictionary[str, CollectionLock]" = (
+    weakref.WeakValueDictionary()
+)
+_locks_lock = threading.Lock()
+
+
+def collection_lock(
+    collection_id: str, cache: "Optional[DataCache]" = None
+) -> CollectionLock:
+    """Return the lock of the given collection.
+
+    All threads in a process get the same lock object for the same
+    collection, as long as a reference to it is kept.
+
+    Parameters:
+        collection_id: UUID of the collection.
+        cache: The datacache the collection is stored in.  The lock file
+            is placed in its directory.  Defaults to `DataCache()`.
+
+    Returns:
+        The lock of the collection.
+    """
+    with _locks_lock:
+        lock = _locks.get(collection_id)
+        if lock is None:
+            cache = cache or DataCache()
+            path = (
+                Path(cache.diskcache.directory)
+                / LOCK_DIR
+                / f"{collection_id}.lock"
+            )
+            lock = CollectionLock(collection_id, path)
+            _locks[collection_id] = lock
+        return lock
@@ -1,32 +1,138 @@
 """NumNy-related utility functions."""
 
+import re
 from typing import TYPE_CHECKING
 
 import numpy as np
+import pandas as pd
 
 if TYPE_CHECKING:  # pragma: no cover
-    from collections.abc import Sequence
+    from collections.abc import Mapping, Sequence
     from typing import Any, Optional
 
+    from numpy.typing import DTypeLike
+
+
+# Dtypes of numerical columns without missing values, keyed by the type
+# inferred by `pandas.api.types.infer_dtype()`.  Numerical columns with
+# missing values are converted to float64 (complex128 for complex values),
+# with missing values replaced by NaN.
+NUMERIC_TYPES = {
+    "boolean": np.bool_,
+    "integer": np.int64,
+    "floating": np.float64,
+    "mixed-integer-float": np.float64,
+    "complex": np.complex128,
+    "empty": np.float64,
+}
+
+# Values replacing missing values in string and bytes columns, keyed by the
+# type inferred by `pandas.api.types.infer_dtype()`.
+STRING_TYPES = {"string": "", "bytes": b""}
+
+# DLite property types with an equivalent NumPy dtype of the same name.
+NUMPY_TYPES = re.compile(r"(bool|u?int\d*|float\d*)$")
+
 
 def dict2recarray(
-    excel_dict: dict[str, "Any"], names: "Optional[Sequence[str]]" = None
+    excel_dict: dict[str, "Any"],
+    names: "Optional[Sequence[str]]" = None,
+    dtypes: "Optional[Mapping[str, DTypeLike]]" = None,
 ) -> np.recarray:
     """Converts a dict returned by the Excel parser to a numpy rec array.
 
     If `names` is None, the record names are inferred from `excel_dict`.
+
+    The dtype of each column is inferred in a single pass:
+
+    - Columns of booleans, integers or floats without missing values
+      become bool, int64 and float64 arrays, respectively.
+    - Numerical columns with missing values become float64 (or
+      complex128) arrays with NaN for missing values.
+    - Columns of strings or bytes become fixed-width unicode or bytes
+      arrays with empty strings for missing values.
+    - Other columns are converted with `numpy.asarray()`.
+
+    Parameters:
+        excel_dict: Dict mapping column names to sequences of values.
+        names: Record names.  Defaults to the keys of `excel_dict`.
+        dtypes: Dict mapping column names in `excel_dict` to the dtype to
+            use for the column instead of the inferred one.  Missing values
+            are replaced by NaN for floating point dtypes and by empty
+            strings for string dtypes.
+
+    Returns:
+        A numpy rec array with one record per column in `excel_dict`.
     """
-    arrays = []
-    for arr in excel_dict.values():
-        if all(
-            isinstance(v, (bool, int, float, complex, None.__class__))
-            for v in arr
-        ):
-            arrays.append([np.nan if v is None else v for v in arr])
-        elif all(isinstance(v, (str, bytes, None.__class__)) for v in arr):
-            arrays.append(["" if v is None else v for v in arr])
-        else:
-            arrays.append(arr)
-        if names is None:
-            names = list(excel_dict.keys())
+    dtypes = dtypes or {}
+    arrays = [
+        _column_array(name, values, dtypes.get(name))
+        for name, values in excel_dict.items()
+    ]
+    if names is None:
+        names = list(excel_dict.keys())
     return np.rec.fromarrays(arrays, names=names)
+
+
+def _column_array(
+    name: str, values: "Any", dtype: "Optional[DTypeLike]" = None
+) -> np.ndarray:
+    """Return the values of a column as a numpy array."""
+    if isinstance(values, np.ndarray) and values.dtype.kind != "O":
+        if dtype is None:
+            return values
+        # Typed arrays, like the columns of pandas data frames, can only
+        # have missing values as NaN
+        dtype = np.dtype(dtype)
+        if dtype.kind in "fc" or values.dtype.kind not in "fc":
+            return values.astype(dtype, copy=False)
+        if dtype.kind not in "SU" and not np.isnan(values).any():
+            return values.astype(dtype)
+
+    # Convert to an object array once, such that type inference, missing
+    # value replacement and conversion are all done in bulk
+    column = np.array(values, dtype=object)
+    if dtype is not None:
+        return _convert_column(name, column, np.dtype(dtype))
+    return _infer_column(column, values)
+
+
+def _convert_column(
+    name: str, column: np.ndarray, dtype: np.dtype
+) -> np.ndarray:
+    """Convert an object array to `dtype`, replacing missing values."""
+    missing = pd.isna(column)
+    if missing.any():
+        if dtype.kind in "fc":
+            column[missing] = np.nan
+        elif dtype.kind in "SU":
+            column[missing] = b"" if dtype.kind == "S" else ""
+        else:
+            raise ValueError(
+                f"column '{name}' has missing values, which cannot be "
+                f"represented as {dtype}"
+            )
+    return column.astype(dtype)
+
+
+def _infer_column(column: np.ndarray, values: "Any") -> np.ndarray:
+    """Convert an object array to the dtype inferred from its values."""
+    inferred = pd.api.types.infer_dtype(column, skipna=True)
+    if inferred in NUMERIC_TYPES:
+        # Missing values make the type inferred without skipping them differ
+        numeric_dtype = NUMERIC_TYPES[inferred]
+        if pd.api.types.infer_dtype(column, skipna=False) != inferred:
+            numeric_dtype = (
+                np.complex128 if inferred == "complex" else np.float64
+            )
+        try:
+            return column.astype(numeric_dtype)
+        except OverflowError:
+            return np.asarray(values)
+    if inferred in STRING_TYPES:
+        # Convert each distinct value only once, which is much faster for
+        # the typical low-cardinality (categorical) columns in tables
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+        table = np.array(list(uniques) + [STRING_TYPES[inferred]])
+        return table[codes]
+    return np.asarray(values)
@@ -0,0 +1,548 @@
+"""Incremental persistence of DLite collections in the OTEAPI DataCache.
+
+A collection is stored as a *base* and a *journal*:
+
+- The base is the full JSON representation of the collection, stored under
+  the collection UUID (as `update_collection()` always has done).
+- The journal is a sequence of deltas, each listing the relations that were
+  added to or removed from the collection since the previous save.  The
+  number of journal entries is stored under `<uuid>#journal` and entry `n`
+  under `<uuid>#journal-<n>`.
+
+Saving a collection hence only writes the relations that changed since the
+last save.  Loading a collection reads the base and replays the journal on
+top of it.  Every `COMPACT_INTERVAL` saves the journal is folded into a new
+base, keeping the replay cost bounded.
+
+The relations added to and removed from a collection are recorded as they
+happen for the collection objects saved or loaded by this module, see
+`track_changes()`.  Saving a collection hence takes time proportional to
+the number of changes, not to the size of the collection.  Changes made
+through other Python objects referring to the same collection are detected
+when saving, and then a new base is written.
+
+Every save also increments a version number stored under `<uuid>#version`.
+Loaded collections are kept alive in a bounded in-process cache together
+with their version, such that a collection that has not been changed by
+another interpreter is returned without touching its base or journal.
+
+Saving and loading are protected by the per-collection reader/writer locks
+of `oteapi_dlite.utils.locking`.  The version is also used for optimistic
+concurrency control: if another thread or process has saved a collection
+since this interpreter last loaded or saved it, the local changes are
+merged into the saved relations instead of overwriting them.
+
+A secondary index of the relations, see `oteapi_dlite.utils.indexes`, is
+kept up to date with the journal and stored with each base under
+`<uuid>#index`.  It is available through `get_index()`.
+"""
+
+import json
+import threading
+from typing import TYPE_CHECKING
+
+import dlite
+from cachetools import TTLCache
+from oteapi.datacache import DataCache
+
+from oteapi_dlite.utils.exceptions import CollectionVersionConflict
+from oteapi_dlite.utils.indexes import CollectionIndex
+from oteapi_dlite.utils.locking import collection_lock
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+    from typing import Optional
+
+    Relation = tuple[str, str, str, Optional[str]]
+
+
+# Predicates of the relations describing each instance in a collection.
+INSTANCE_PREDICATES = ("_is-a", "_has-uuid", "_has-meta")
+
+# Number of journal entries after which the journal is compacted into a
+# new base.
+COMPACT_INTERVAL = 32
+
+# Maximum number of live collections and the number of seconds they are
+# kept in the in-process cache.
+LIVE_CACHE_MAXSIZE = 128
+LIVE_CACHE_TTL = 3600
+
+# Persisted state of collections saved or loaded in this interpreter,
+# keyed by collection UUID.  Evicted like the live collections.
+_states: "TTLCache[str, _CollectionState]" = TTLCache(
+    maxsize=LIVE_CACHE_MAXSIZE, ttl=LIVE_CACHE_TTL
+)
+_states_lock = threading.RLock()
+
+# Live collections and their version, keyed by collection UUID.
+_live: "TTLCache[str, tuple[int, dlite.Collection]]" = TTLCache(
+    maxsize=LIVE_CACHE_MAXSIZE, ttl=LIVE_CACHE_TTL
+)
+_live_lock = threading.RLock()
+
+
+class _CollectionState:
+    """The persisted version, relations and index of a collection, and the
+    relations added and removed since it was last saved or loaded."""
+
+    def __init__(
+        self,
+        version: int,
+        relations: "set[Relation]",
+        index: CollectionIndex,
+    ) -> None:
+        self.version = version
+        self.relations = relations
+        self.index = index
+        self.added: "dict[Relation, None]" = {}
+        self.removed: "dict[Relation, None]" = {}
+
+    def record(
+        self,
+        added: "Iterable[Relation]" = (),
+        removed: "Iterable[Relation]" = (),
+    ) -> None:
+        """Record relations added to or removed from the collection."""
+        with _states_lock:
+            for relation in removed:
+                if relation in self.added:
+                    del self.added[relation]
+                else:
+                    self.removed[relation] = None
+            for relation in added:
+                if relation in self.removed:
+                    del self.removed[relation]
+                else:
+                    self.added[relation] = None
+
+    def changes(self) -> "tuple[list[Relation], list[Relation]]":
+        """Return the relations added and removed since the last save, in
+        the order they were added and removed."""
+        with _states_lock:
+            added = [r for r in self.added if r not in self.relations]
+            removed = [r for r in self.removed if r in self.relations]
+        return added, removed
+
+    def is_modified(self) -> bool:
+        """Whether relations have been added or removed since the last
+        save or load."""
+        return bool(self.added or self.removed)
+
+    def matches(self, collection: dlite.Collection) -> bool:
+        """Whether the recorded changes account for all relations of
+        `collection`.
+
+        This is false if the collection was modified without going through
+        a tracked collection object, e.g. by DLite itself.
+        """
+        added, removed = self.changes()
+        return len(self.relations) + len(added) - len(
+            removed
+        ) == collection.get_dimension_size("nrelations")
+
+
+def _get_state(collection_id: str) -> "Optional[_CollectionState]":
+    """Return the persisted state of a collection or None."""
+    with _states_lock:
+        return _states.get(collection_id)
+
+
+def _set_state(collection_id: str, state: _CollectionState) -> None:
+    """Store the persisted state of a collection."""
+    with _states_lock:
+        _states[collection_id] = state
+
+
+def journal_key(collection_id: str, entry: "Optional[int]" = None) -> str:
+    """Return the datacache key of the journal of the given collection.
+
+    Parameters:
+        collection_id: UUID of the collection.
+        entry: If given, return the key of this journal entry instead of
+            the key holding the number of journal entries.
+
+    Returns:
+        The datacache key.
+    """
+    if entry is None:
+        return f"{collection_id}#journal"
+    return f"{collection_id}#journal-{entry}"
+
+
+def version_key(collection_id: str) -> str:
+    """Return the datacache key of the version of the given collection."""
+    return f"{collection_id}#version"
+
+
+def index_key(collection_id: str) -> str:
+    """Return the datacache key of the index of the given collection."""
+    return f"{collection_id}#index"
+
+
+def get_index(collection: dlite.Collection) -> "Optional[CollectionIndex]":
+    """Return the index of the relations of `collection`.
+
+    The index reflects the relations of the collection as last saved or
+    loaded in this interpreter.
+
+    Returns:
+        The index or None if the collection has not been saved or loaded,
+        or if its relations have changed since.
+    """
+    state = _get_state(collection.uuid)
+    if state is None or state.is_modified():
+        return None
+    if state.index.nrelations != collection.get_dimension_size("nrelations"):
+        # Modified without going through the methods of dlite.Collection
+        return None
+    return state.index
+
+
+def get_version(collection_id: str, cache: "Optional[DataCache]" = None) -> int:
+    """Return the persisted version of the given collection.
+
+    Parameters:
+        collection_id: UUID of the collection.
+        cache: The datacache to look in.  Defaults to `DataCache()`.
+
+    Returns:
+        The version, which is incremented every time the collection is
+        saved.  Zero is returned if the collection has no version.
+    """
+    cache = cache or DataCache()
+    key = version_key(collection_id)
+    return cache.get(key) if key in cache else 0
+
+
+def get_relations(collection: dlite.Collection) -> "set[Relation]":
+    """Return the set of all (s, p, o, d) relations in `collection`."""
+    # Fetching the relations property in bulk is several times faster than
+    # iterating over `collection.get_relations()`.
+    return {(r.s, r.p, r.o, r.d) for r in collection.get_property("relations")}
+
+
+def collection_asjson(collection: dlite.Collection) -> str:
+    """Return the JSON representation of `collection`.
+
+    The representation is built from the relations of the collection,
+    since `collection.asjson()` is not able to serialise large collections
+    with all versions of DLite.
+    """
+    relations = [
+        [r.s, r.p, r.o] if r.d is None else [r.s, r.p, r.o, r.d]
+        for r in collection.get_property("relations")
+    ]
+    return json.dumps(
+        {
+            collection.uuid: {
+                "meta": dlite.COLLECTION_ENTITY,
+                "dimensions": {"nrelations": len(relations)},
+                "properties": {"relations": relations},
+            }
+        }
+    )
+
+
+def save_collection(
+    collection: dlite.Collection,
+    cache: "Optional[DataCache]" = None,
+    compact: bool = False,
+    expected_version: "Optional[int]" = None,
+) -> None:
+    """Persist `collection` in the datacache.
+
+    Only the relations that have changed since the last save are written,
+    unless the collection has not been saved or loaded in this interpreter,
+    the journal has reached `COMPACT_INTERVAL` entries or `compact` is
+    true.  In these cases the full collection is written as a new base.
+
+    If the collection has been saved by another interpreter since it was
+    last loaded or saved here, the relations added and removed here are
+    merged into the saved relations, and `collection` is updated to the
+    merged result.
+
+    Parameters:
+        collection: The DLite Collection to save.
+        cache: The datacache to save to.  Defaults to `DataCache()`.
+        compact: Whether to force writing a new base.
+        expected_version: If given, only save if the persisted version of
+            the collection equals this version, as returned by
+            `get_version()`.
+
+    Raises:
+        CollectionVersionConflict: If `expected_version` is given and
+            differs from the persisted version.
+    """
+    cache = cache or DataCache()
+    uuid = collection.uuid
+    track_changes(collection)
+    with collection_lock(uuid, cache).write():
+        version = get_version(uuid, cache)
+        if expected_version is not None and expected_version != version:
+            raise CollectionVersionConflict(
+                f"collection {uuid} has version {version}, expected "
+                f"{expected_version}"
+            )
+        state = _get_state(uuid)
+        key = journal_key(uuid)
+        nentries = cache.get(key) if key in cache else 0
+
+        if state is not None and state.version != version and uuid in cache:
+            # Rebase the local changes onto the saved relations
+            current = get_relations(collection)
+            persisted = state.relations
+            saved = _replay(uuid, cache)
+            current = (saved - (persisted - current)) | (current - persisted)
+            _synchronise(collection, current)
+            state = None
+
+        if (
+            compact
+            or state is None
+            or uuid not in cache
+            or nentries >= COMPACT_INTERVAL
+            or not state.matches(collection)
+        ):
+            state = _write_base(cache, collection, nentries)
+        else:
+            added, removed = state.changes()
+            state.added.clear()
+            state.removed.clear()
+            if not added and not removed:
+                return
+            cache.add(
+                {"add": added, "remove": removed},
+                key=journal_key(uuid, nentries),
+            )
+            cache.add(nentries + 1, key=key)
+            state.relations.difference_update(removed)
+            state.relations.update(added)
+            state.index.update(added=added, removed=removed)
+
+        version += 1
+        cache.add(version, key=version_key(uuid))
+        state.version = version
+        _set_state(uuid, state)
+        with _live_lock:
+            _live[uuid] = (version, collection)
+
+
+def load_collection(
+    collection_id: str, cache: "Optional[DataCache]" = None
+) -> "Optional[dlite.Collection]":
+    """Load a collection from its base and journal in the datacache.
+
+    A collection in the in-process cache is returned directly if its
+    version matches the version in the datacache.  A collection that is
+    alive in this interpreter is also returned as is if no other
+    interpreter has saved it since it was last loaded or saved here.
+    Otherwise, its relations are synchronised with the datacache.
+
+    Parameters:
+        collection_id: UUID of the collection to load.
+        cache: The datacache to load from.  Defaults to `DataCache()`.
+
+    Returns:
+        The loaded collection or None if `collection_id` is not in the
+        datacache.
+    """
+    cache = cache or DataCache()
+    if collection_id not in cache:
+        return None
+
+    lock = collection_lock(collection_id, cache)
+    with lock.read():
+        coll = _get_live(collection_id, cache)
+    if coll is not None:
+        return coll
+
+    # Synchronising modifies the live collection, so exclude other threads
+    with lock.write():
+        coll = _get_live(collection_id, cache)
+        if coll is not None:
+            return coll
+        version = get_version(collection_id, cache)
+        live = dlite.has_instance(collection_id, check_storages=False)
+        coll = track_changes(
+            dlite.Instance.from_json(cache.get(collection_id), id=collection_id)
+        )
+        state = _get_state(collection_id)
+        if not live or state is None or state.version != version:
+            relations = _replay(collection_id, cache)
+            _synchronise(coll, relations)
+            _set_state(
+                collection_id,
+                _CollectionState(
+                    version,
+                    relations,
+                    _load_index(collection_id, cache, coll),
+                ),
+            )
+
+        with _live_lock:
+            _live[collection_id] = (version, coll)
+        return coll
+
+
+def clear_live_cache() -> None:
+    """Clear the in-process cache of live collections."""
+    with _live_lock:
+        _live.clear()
+
+
+def _get_live(
+    collection_id: str, cache: DataCache
+) -> "Optional[dlite.Collection]":
+    """Return the live collection if it is at the persisted version."""
+    version = get_version(collection_id, cache)
+    with _live_lock:
+        cached = _live.get(collection_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    return None
+
+
+def _replay(collection_id: str, cache: DataCache) -> "set[Relation]":
+    """Return the relations of a collection from its base and journal."""
+    base = json.loads(cache.get(collection_id))
+    relations = {
+        (s, p, o, d[0] if d else None)
+        for s, p, o, *d in base[collection_id]["properties"]["relations"]
+    }
+    key = journal_key(collection_id)
+    nentries = cache.get(key) if key in cache else 0
+    for entry in range(nentries):
+        delta = cache.get(journal_key(collection_id, entry))
+        relations.difference_update(delta["remove"])
+        relations.update(delta["add"])
+    return relations
+
+
+def _synchronise(
+    collection: dlite.Collection, relations: "set[Relation]"
+) -> None:
+    """Add and remove relations in `collection` to match `relations`."""
+    current = get_relations(collection)
+    for relation in current - relations:
+        collection.remove_relations(*relation)
+    for relation in relations - current:
+        collection.add_relation(*relation)
+
+
+def _ordered_relations(collection: dlite.Collection) -> "list[Relation]":
+    """Return the relations of `collection` in the order they were added."""
+    return [(r.s, r.p, r.o, r.d) for r in collection.get_property("relations")]
+
+
+def _load_index(
+    collection_id: str, cache: DataCache, collection: dlite.Collection
+) -> CollectionIndex:
+    """Return the index of a collection from the datacache.
+
+    The index stored with the base is updated with the journal.  It is
+    rebuilt from `collection` if it is missing or inconsistent.
+    """
+    key = index_key(collection_id)
+    if key in cache:
+        index = CollectionIndex.from_dict(cache.get(key))
+        nkey = journal_key(collection_id)
+        nentries = cache.get(nkey) if nkey in cache else 0
+        for entry in range(nentries):
+            delta = cache.get(journal_key(collection_id, entry))
+            index.update(
+                added=map(tuple, delta["add"]),
+                removed=map(tuple, delta["remove"]),
+            )
+        if index.nrelations == collection.get_dimension_size("nrelations"):
+            return index
+    return CollectionIndex(_ordered_relations(collection))
+
+
+def _write_base(
+    cache: DataCache, collection: dlite.Collection, nentries: int
+) -> _CollectionState:
+    """Write `collection` and its index as a new base and truncate its
+    journal.
+
+    Returns:
+        The new persisted state of the collection, with the version yet to
+        be set.
+    """
+    uuid = collection.uuid
+    relations = _ordered_relations(collection)
+    index = CollectionIndex(relations)
+    cache.add(collection_asjson(collection), key=uuid)
+    cache.add(index.asdict(), key=index_key(uuid))
+    for entry in range(nentries):
+        key = journal_key(uuid, entry)
+        if key in cache:
+            del cache[key]
+    cache.add(0, key=journal_key(uuid))
+    return _CollectionState(0, set(relations), index)
+
+
+def _record_changes(
+    collection: dlite.Collection,
+    added: "Iterable[Relation]" = (),
+    removed: "Iterable[Relation]" = (),
+) -> None:
+    """Record relations added to or removed from a persisted collection."""
+    state = _get_state(collection.uuid)
+    if state is not None:
+        state.record(added=added, removed=removed)
+
+
+def _instance_relations(
+    collection: dlite.Collection, label: str
+) -> "list[Relation]":
+    """Return the relations describing the instance with the given label."""
+    return [
+        relation
+        for relation in collection.get_relations(s=label, rettype="T")
+        if relation[1] in INSTANCE_PREDICATES
+    ]
+
+
+class _TrackedCollection(dlite.Collection):
+    """A `dlite.Collection` recording the relations added to and removed
+    from it while it is persisted."""
+
+    def add(self, label, inst, force=False):
+        super().add(label, inst, force)
+        if _get_state(self.uuid) is not None:
+            _record_changes(self, added=_instance_relations(self, label))
+
+    def remove(self, label):
+        if _get_state(self.uuid) is None:
+            super().remove(label)
+            return
+        removed = _instance_relations(self, label)
+        super().remove(label)
+        _record_changes(self, removed=removed)
+
+    def add_relation(self, s, p, o, d=None):
+        super().add_relation(s, p, o, d)
+        _record_changes(self, added=[(s, p, o, d)])
+
+    def remove_relations(self, s=None, p=None, o=None, d=None):
+        if _get_state(self.uuid) is None:
+            super().remove_relations(s, p, o, d)
+            return
+        removed = list(self.get_relations(s, p, o, d, rettype="T"))
+        super().remove_relations(s, p, o, d)
+        _record_changes(self, removed=removed)
+
+
+def track_changes(collection: dlite.Collection) -> dlite.Collection:
+    """Record the changes made to `collection` through its methods.
+
+    Only this Python object is affected; `dlite.Collection` itself and
+    other proxies of the same collection are left untouched.
+
+    Returns:
+        The collection, for convenience.
+    """
+    if not isinstance(collection, _TrackedCollection):
+        collection.__class__ = _TrackedCollection
+    return collection
@@ -0,0 +1,404 @@
+"""Vectorised row filtering of DLite instances.
+
+A query is a Python expression over the property names of an instance,
+like `"(temperature > 300) & (phase == 'alpha')"`.  It is evaluated with
+NumPy on whole property arrays, resulting in a boolean mask with one
+value per row, i.e. per index of the first dimension of the referenced
+properties.  `filter_instance()` returns a new instance with only the
+rows selected by the mask.
+
+Only a restricted subset of Python is accepted:
+
+- Property names, numbers, strings, booleans and lists or tuples of them.
+- Arithmetic (`+ - * / // % **`), comparisons, including chained
+  comparisons and `in`/`not in` a list, `and`, `or`, `not` and the
+  element-wise operators `& | ^ ~`.  One of the operands of arithmetic
+  and element-wise operators must reference a property, such that
+  queries like `[0] * 10**9` cannot exhaust the memory.  Powers are
+  limited to properties raised to a number of at most `MAX_EXPONENT` in
+  magnitude, such that queries like `9**9**9` cannot exhaust the CPU.
+- The functions in `FUNCTIONS`.
+- Subscripts of properties with more than one dimension, which index the
+  trailing dimensions of each row.  For example, `forces[0] > 0` selects
+  the rows of an `(natoms, ncoords)` array with a positive first
+  coordinate.
+
+String constants are compared with fixed-length string properties as
+bytes.
+"""
+
+import ast
+import functools
+import operator
+from typing import TYPE_CHECKING
+
+import dlite
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Mapping
+    from typing import Any, Optional
+
+
+def _reduce_rows(func: "Callable[..., Any]") -> "Callable[[Any], Any]":
+    """Return a function reducing the trailing dimensions with `func`."""
+
+    def reduce(value: "Any") -> "Any":
+        value = np.asarray(value)
+        return func(value, axis=tuple(range(1, value.ndim)))
+
+    return reduce
+
+
+# Functions that can be called in queries.
+FUNCTIONS: "dict[str, Callable[..., Any]]" = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "isnan": np.isnan,
+    "isfinite": np.isfinite,
+    "startswith": np.char.startswith,
+    "endswith": np.char.endswith,
+    "any": _reduce_rows(np.any),
+    "all": _reduce_rows(np.all),
+    "sum": _reduce_rows(np.sum),
+    "norm": lambda value: np.sqrt(_reduce_rows(np.sum)(np.square(value))),
+}
+
+# Largest magnitude of the exponent of a power.
+MAX_EXPONENT = 16
+
+_BINARY_OPERATORS: "dict[type, Callable[[Any, Any], Any]]" = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+}
+
+_UNARY_OPERATORS: "dict[type, Callable[[Any], Any]]" = {
+    ast.Not: np.logical_not,
+    ast.Invert: operator.invert,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_COMPARISONS: "dict[type, Callable[[Any, Any], Any]]" = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: np.isin,
+    ast.NotIn: lambda a, b: np.isin(a, b, invert=True),
+}
+
+
+class Query:
+    """A compiled query.
+
+    Parameters:
+        expression: The query expression.
+
+    Raises:
+        ValueError: If `expression` is not a valid query.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        try:
+            self._tree = ast.parse(expression.strip(), mode="eval").body
+        except SyntaxError as exc:
+            raise ValueError(f"invalid query {expression!r}: {exc}") from exc
+        self.names: "frozenset[str]" = frozenset(self._check(self._tree))
+
+    def __repr__(self) -> str:
+        return f"Query({self.expression!r})"
+
+    def evaluate(self, values: "Mapping[str, Any]") -> "Any":
+        """Evaluate the query.
+
+        Parameters:
+            values: Mapping of the names in the query to their values.
+
+        Returns:
+            The result, a boolean array with one value per row or a
+            boolean scalar if no arrays are referenced.
+
+        Raises:
+            ValueError: If the result has more than one dimension or is
+                not boolean.
+        """
+        result = np.asarray(self._eval(self._tree, values))
+        if result.ndim > 1:
+            raise ValueError(
+                f"query {self.expression!r} gives {result.ndim}-dimensional "
+                "result, use any() or all() to reduce it to one value per "
+                "row"
+            )
+        if result.dtype != np.bool_:
+            raise ValueError(
+                f"query {self.expression!r} does not evaluate to booleans"
+            )
+        return result if result.ndim else bool(result)
+
+    def _check(self, node: ast.AST) -> "set[str]":
+        """Check that `node` is allowed and return the names it uses."""
+        if isinstance(node, ast.Name):
+            return {node.id}
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name):
+            self._check_subscript(node)
+            return {node.value.id}
+        names: "set[str]" = set()
+        for operand in self._operands(node):
+            names |= self._check(operand)
+        if isinstance(node, ast.BinOp):
+            # Operations on constants only, like `[0] * 10**9`, could
+            # exhaust the memory
+            if not names:
+                raise ValueError(
+                    f"operands of {ast.unparse(node)!r} do not reference a "
+                    f"property in query {self.expression!r}"
+                )
+            if isinstance(node.op, ast.Pow):
+                self._check_power(node)
+        return names
+
+    # One return per node type, like `_eval()`
+    def _operands(  # pylint: disable=too-many-return-statements
+        self, node: ast.AST
+    ) -> "list[ast.expr]":
+        """Check that `node` is an allowed operation or constant and
+        return its operands."""
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, complex, str, bytes)):
+                raise ValueError(
+                    f"unsupported constant {node.value!r} in query "
+                    f"{self.expression!r}"
+                )
+            return []
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return node.elts
+        if isinstance(node, ast.BoolOp):
+            return node.values
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            return [node.left, node.right]
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            return [node.operand]
+        if isinstance(node, ast.Compare) and all(
+            type(op) in _COMPARISONS for op in node.ops
+        ):
+            return [node.left, *node.comparators]
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in FUNCTIONS
+            and not node.keywords
+        ):
+            return node.args
+        raise ValueError(
+            f"unsupported expression {ast.unparse(node)!r} in query "
+            f"{self.expression!r}"
+        )
+
+    def _check_subscript(self, node: ast.Subscript) -> None:
+        """Check that a subscript only has integer indices."""
+        try:
+            index = ast.literal_eval(node.slice)
+        except ValueError:
+            index = None
+        if not all(
+            isinstance(i, int)
+            for i in (index if isinstance(index, tuple) else [index])
+        ):
+            raise ValueError(
+                f"only integer subscripts are supported in query "
+                f"{self.expression!r}"
+            )
+
+    def _check_power(self, node: ast.BinOp) -> None:
+        """Check that a power raises a property to a small number."""
+        try:
+            exponent = ast.literal_eval(node.right)
+        except ValueError:
+            exponent = None
+        if (
+            not self._check(node.left)
+            or not isinstance(exponent, (int, float))
+            or abs(exponent) > MAX_EXPONENT
+        ):
+            raise ValueError(
+                f"only properties raised to a number of at most "
+                f"{MAX_EXPONENT} in magnitude are supported in query "
+                f"{self.expression!r}"
+            )
+
+    def _eval(  # pylint: disable=too-many-return-statements
+        self, node: ast.AST, values: "Mapping[str, Any]"
+    ) -> "Any":
+        """Evaluate a node checked by `_check()`."""
+        if isinstance(node, ast.Name):
+            return values[node.id]
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [self._eval(elt, values) for elt in node.elts]
+        if isinstance(node, ast.BoolOp):
+            func = (
+                np.logical_and
+                if isinstance(node.op, ast.And)
+                else np.logical_or
+            )
+            return func.reduce(
+                np.broadcast_arrays(
+                    *(self._eval(value, values) for value in node.values)
+                )
+            )
+        if isinstance(node, ast.BinOp):
+            left, right = _coerce(
+                self._eval(node.left, values), self._eval(node.right, values)
+            )
+            return _BINARY_OPERATORS[type(node.op)](left, right)
+        if isinstance(node, ast.UnaryOp):
+            return _UNARY_OPERATORS[type(node.op)](
+                self._eval(node.operand, values)
+            )
+        if isinstance(node, ast.Compare):
+            result: "Any" = True
+            left = self._eval(node.left, values)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._eval(comparator, values)
+                result = np.logical_and(
+                    result, _COMPARISONS[type(op)](*_coerce(left, right))
+                )
+                left = right
+            return result
+        if isinstance(node, ast.Call):
+            args = [self._eval(arg, values) for arg in node.args]
+            if len(args) == 2:
+                args = list(_coerce(*args))
+            return FUNCTIONS[node.func.id](*args)  # type: ignore[attr-defined]
+        assert isinstance(node, ast.Subscript)  # nosec
+        index = ast.literal_eval(node.slice)
+        index = index if isinstance(index, tuple) else (index,)
+        return np.asarray(values[node.value.id])[(slice(None), *index)]
+
+
+@functools.lru_cache(maxsize=256)
+def compile_query(expression: str) -> Query:
+    """Return the compiled query of `expression`.
+
+    Compiled queries are cached.
+    """
+    return Query(expression)
+
+
+def row_dimension(meta: dlite.Instance, names: "frozenset[str]") -> "Any":
+    """Return the name of the row dimension of the properties `names`.
+
+    Parameters:
+        meta: Metadata of the instances to filter.
+        names: Names of the properties referenced by a query.
+
+    Returns:
+        Name of the first dimension of the referenced array properties or
+        None if they are all scalars.
+
+    Raises:
+        ValueError: If the referenced arrays do not share the same first
+            dimension.
+    """
+    dims = {
+        str(meta.getprop(name).shape[0])
+        for name in names
+        if len(meta.getprop(name).shape)
+    }
+    if len(dims) > 1:
+        raise ValueError(
+            f"properties {sorted(names)} of {meta.uri} do not share the same "
+            f"first dimension: {sorted(dims)}"
+        )
+    return dims.pop() if dims else None
+
+
+def filter_instance(
+    inst: dlite.Instance, query: "Query | str", limit: "Optional[int]" = None
+) -> "Optional[dlite.Instance]":
+    """Return an instance with only the rows of `inst` matching `query`.
+
+    All properties whose first dimension is the row dimension of the query
+    (see `row_dimension()`) are filtered.  Other properties are copied.
+
+    Parameters:
+        inst: The instance to filter.
+        query: The query or its expression.
+        limit: If given, only keep the first `limit` matching rows.
+
+    Returns:
+        A new instance of the same metadata, or `inst` itself if all of
+        its rows match.  None if no rows match a query referencing only
+        scalar properties.
+
+    Raises:
+        KeyError: If `query` references properties that `inst` does not
+            have.
+    """
+    if isinstance(query, str):
+        query = compile_query(query)
+    meta = inst.meta
+    missing = sorted(
+        name for name in query.names if not inst.has_property(name)
+    )
+    if missing:
+        raise KeyError(f"{inst.uuid} has no properties {missing}")
+
+    dim = row_dimension(meta, query.names)
+    mask = query.evaluate(
+        {name: inst.get_property(name) for name in query.names}
+    )
+    if dim is None:
+        return inst if mask else None
+
+    if limit is not None:
+        mask = mask.copy()
+        mask[np.flatnonzero(mask)[limit:]] = False
+    nrows = int(np.count_nonzero(mask))
+    if nrows == inst.get_dimension_size(dim):
+        return inst
+
+    dimensions = dict(inst.dimensions)
+    dimensions[dim] = nrows
+    new = meta(dimensions=dimensions)
+    for prop in meta["properties"]:
+        value = inst.get_property(prop.name)
+        if len(prop.shape) and str(prop.shape[0]) == dim:
+            value = value[mask]
+        new.set_property(prop.name, value)
+    return new
+
+
+def _coerce(a: "Any", b: "Any") -> "tuple[Any, Any]":
+    """Encode strings compared with fixed-length string arrays as bytes."""
+
+    def encode(value: "Any") -> "Any":
+        if isinstance(value, str):
+            return value.encode()
+        if isinstance(value, list):
+            return [encode(v) for v in value]
+        return value
+
+    if isinstance(a, np.ndarray) and a.dtype.kind == "S":
+        b = encode(b)
+    if isinstance(b, np.ndarray) and b.dtype.kind == "S":
+        a = encode(a)
+    return a, b
@@ -0,0 +1,197 @@
+"""Registry of DLite storage paths with an index of metadata files.
+
+Storage paths registered with `register_storage_path()` are added to
+`dlite.storage_path` only once, however many times they are registered.
+Each path is scanned once for JSON files with metadata, building an index
+from metadata URI to file.  `find_metadata()` answers lookups from this
+index and rescans a path only when the modification time of one of its
+directories has changed.
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import dlite
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+# Modification times closer than this number of seconds to the time of a
+# scan are not trusted, since a file system may not be able to distinguish
+# changes made within its timestamp resolution.
+RACY_INTERVAL = 2.0
+
+# Registered storage paths in registration order, mapped to the
+# modification times of the directories they cover when last scanned.
+# A modification time of None forces a rescan.
+_paths: "dict[str, dict[str, Optional[float]]]" = {}
+
+# Index mapping metadata URIs to the file they are defined in, the storage
+# path that file was found through and the modification time of the file.
+_index: "dict[str, tuple[Path, str, Optional[float]]]" = {}
+
+_lock = threading.RLock()
+
+
+def register_storage_path(path: "Union[str, Path]") -> bool:
+    """Register a storage path.
+
+    The path may be a directory, a JSON file or a glob pattern.  A path
+    that is already registered is ignored.
+
+    Parameters:
+        path: The storage path to register.
+
+    Returns:
+        Whether the path was newly registered.
+    """
+    path = str(path)
+    with _lock:
+        if path in _paths:
+            return False
+        _paths[path] = {}
+        dlite.storage_path.append(path)
+        _scan(path)
+    return True
+
+
+def registered_storage_paths() -> "list[str]":
+    """Return a list of all registered storage paths."""
+    with _lock:
+        return list(_paths)
+
+
+def find_metadata(uri: str) -> "Optional[Path]":
+    """Return the file defining the metadata with the given uri.
+
+    Registered storage paths whose directories have been modified since
+    they were last scanned are rescanned before the lookup, as is the
+    storage path of the returned file if the file has been modified.
+
+    Parameters:
+        uri: URI of the metadata to look up.
+
+    Returns:
+        Path to the JSON file defining the metadata or None if the uri is
+        not defined in any of the registered storage paths.
+    """
+    with _lock:
+        for path, mtimes in _paths.items():
+            if any(_mtime(dirname) != t for dirname, t in mtimes.items()):
+                _scan(path)
+        entry = _index.get(uri)
+        if entry and _mtime(entry[0]) != entry[2]:
+            _scan(entry[1])
+            entry = _index.get(uri)
+    return entry[0] if entry else None
+
+
+def load_metadata(uri: str) -> "Optional[dlite.Instance]":
+    """Load the metadata with the given uri from the registered paths.
+
+    Parameters:
+        uri: URI of the metadata to load.
+
+    Returns:
+        The loaded metadata or None if the uri is not defined in any of
+        the registered storage paths.
+    """
+    filename = find_metadata(uri)
+    if filename is None:
+        return None
+    return dlite.Instance.from_location("json", filename, id=uri)
+
+
+def _scan(path: str) -> None:
+    """(Re)build the index entries for the given storage path."""
+    for uri in [uri for uri, entry in _index.items() if entry[1] == path]:
+        del _index[uri]
+
+    if glob.has_magic(path):
+        filenames = [Path(name) for name in glob.glob(path)]
+        dirnames = _glob_dirnames(path)
+    elif os.path.isdir(path):
+        filenames = list(Path(path).glob("*.json"))
+        dirnames = {path}
+    else:
+        filenames = [Path(path)] if os.path.isfile(path) else []
+        dirnames = {str(Path(path).parent)}
+
+    now = time.time()
+    for filename in filenames:
+        for uri in _metadata_uris(filename):
+            _index.setdefault(uri, (filename, path, _settled(filename, now)))
+    _paths[path] = {dirname: _settled(dirname, now) for dirname in dirnames}
+
+
+def _glob_dirnames(pattern: str) -> "set[str]":
+    """Return the directories whose modification may change the matches
+    of a glob pattern.
+
+    These are the directories matched by the directory part of `pattern`
+    and, if it has wildcards, recursively the directories that may change
+    which directories it matches.
+    """
+    dirname = os.path.dirname(pattern) or os.curdir
+    if not glob.has_magic(dirname):
+        return {dirname}
+    return _glob_dirnames(dirname) | {
+        name for name in glob.glob(dirname) if os.path.isdir(name)
+    }
+
+
+def _metadata_uris(filename: Path) -> "list[str]":
+    """Return the URIs of all metadata defined in a JSON file."""
+    try:
+        with open(filename, "r", encoding="utf8") as handle:
+            text = handle.read()
+    except OSError as exc:
+        logger.debug("Skipping %s: %s", filename, exc)
+        return []
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # DLite accepts JSON with e.g. trailing commas.  Fall back to the
+        # first "uri" field, which is the uri of a single-entity file.
+        match = re.search(r'"uri"\s*:\s*"([^"]+)"', text)
+        return [match.group(1)] if match and '"properties"' in text else []
+    if not isinstance(data, dict):
+        return []
+    if "uri" in data and "properties" in data:
+        return [data["uri"]]
+    return [
+        key
+        for key, value in data.items()
+        if "://" in key and isinstance(value, dict) and "properties" in value
+    ]
+
+
+def _settled(path: "Union[str, Path]", now: float) -> "Optional[float]":
+    """Return the modification time of `path` if it can be trusted.
+
+    None is returned if `path` was modified within `RACY_INTERVAL` seconds
+    before `now`.
+    """
+    mtime = _mtime(path)
+    return mtime if now - mtime > RACY_INTERVAL else None
+
+
+def _mtime(path: "Union[str, Path]") -> float:
+    """Return the modification time of a file or directory.
+
+    -1 is returned if `path` does not exist.
+    """
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return -1.0
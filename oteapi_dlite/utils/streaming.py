@@ -0,0 +1,682 @@
+"""Chunked serialisation and parsing of DLite instances.
+
+The functions in this module serialise instances to the DLite JSON format
+in bounded chunks, such that the full serialised representation of large
+array properties never has to be held in memory.
+
+`load_json_stream()` does the reverse for plain JSON documents mapping
+property names to values: the document is tokenized incrementally and
+numerical arrays are decoded block-wise directly into NumPy arrays,
+without building the Python object tree of the document.
+
+`add_cache_stream()` and `open_cache_stream()` write and read values of
+the OTEAPI DataCache as streams.  `DataCache` has no public API for this,
+so these are the only functions in this package that access its
+underlying `diskcache`.
+"""
+
+import codecs
+import io
+import json
+import re
+import warnings
+from typing import TYPE_CHECKING
+
+import dlite
+import numpy as np
+from dlite.utils import infer_dimensions
+from oteapi.datacache import DataCache
+
+from oteapi_dlite.utils.persistence import collection_asjson
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable, Iterator
+    from typing import IO, Any, Optional, Union
+
+
+# Default size in bytes of the chunks yielded by `iter_json()`.
+DEFAULT_CHUNK_SIZE = 2**20
+
+
+def iter_json(
+    instances: "Union[dlite.Instance, Iterable[dlite.Instance]]",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> "Iterator[bytes]":
+    """Serialise instances to DLite JSON and yield the result in chunks.
+
+    Numerical array properties are encoded a block of rows at a time,
+    directly from the memory of the instance.  All other properties are
+    small and encoded in one go.
+
+    Parameters:
+        instances: The instance or instances to serialise.
+        chunk_size: Approximate size in bytes of the yielded chunks.
+
+    Yields:
+        Chunks of the JSON representation of `instances`.
+    """
+    if isinstance(instances, dlite.Instance):
+        instances = [instances]
+
+    yield b"{"
+    for n, inst in enumerate(instances):
+        if n:
+            yield b", "
+        yield from _iter_entry(inst, chunk_size)
+    yield b"}"
+
+
+def open_json_stream(
+    instances: "Union[dlite.Instance, Iterable[dlite.Instance]]",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> io.BufferedReader:
+    """Return a binary file-like object reading the JSON of `instances`.
+
+    The JSON representation is produced lazily by `iter_json()` while the
+    returned object is read.
+
+    Parameters:
+        instances: The instance or instances to serialise.
+        chunk_size: Approximate size in bytes of the internal chunks.
+
+    Returns:
+        A readable binary file-like object.
+    """
+    return io.BufferedReader(
+        _IteratorReader(iter_json(instances, chunk_size)),
+        buffer_size=chunk_size,
+    )
+
+
+def add_cache_stream(
+    key: str, stream: "IO[bytes]", cache: "Optional[DataCache]" = None
+) -> None:
+    """Add the content read from `stream` to the datacache.
+
+    Large values are stored as files by the datacache, such that the
+    content never has to be held in memory.
+
+    Parameters:
+        key: The datacache key.
+        stream: A readable binary file-like object.
+        cache: The datacache.  Defaults to `DataCache()`.
+    """
+    cache = cache or DataCache()
+    cache.diskcache.set(key, stream, read=True, expire=cache.config.expireTime)
+
+
+def open_cache_stream(
+    key: str, cache: "Optional[DataCache]" = None
+) -> "IO[bytes]":
+    """Open a value in the datacache as a binary stream.
+
+    Parameters:
+        key: The datacache key.
+        cache: The datacache.  Defaults to `DataCache()`.
+
+    Returns:
+        A binary file-like object.  It should be closed by the caller.
+
+    Raises:
+        KeyError: If `key` is not in the datacache or has expired.
+    """
+    cache = cache or DataCache()
+    value = cache.diskcache.get(key, read=True)
+    if value is None:
+        raise KeyError(f"no value with key {key!r} in the datacache")
+    # Small values are stored in the cache database and returned as bytes
+    if isinstance(value, bytes):
+        return io.BytesIO(value)
+    return value
+
+
+def load_json_stream(
+    stream: "IO[bytes]",
+    meta: dlite.Instance,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dlite.Instance:
+    """Create an instance of `meta` from a JSON document read from `stream`.
+
+    The document must be a JSON object mapping property names of `meta`
+    to values.  Other keys are skipped without being decoded.  Arrays of
+    integer or floating point properties are decoded `chunk_size` bytes
+    at a time into growing NumPy arrays, such that peak memory is about
+    the size of the instance plus its largest property.  The dimensions
+    of the instance are inferred from the shapes of the arrays.
+
+    Parameters:
+        stream: Binary file-like object with the UTF-8 encoded document.
+        meta: Metadata of the instance to create.
+        chunk_size: Number of bytes read from `stream` at a time.
+
+    Returns:
+        The new instance.
+
+    Raises:
+        ValueError: If the document is not valid JSON or a numerical
+            array is not rectangular.
+    """
+    props = {prop.name: prop for prop in meta["properties"]}
+    scanner = _JsonScanner(stream, chunk_size)
+    values: "dict[str, Any]" = {}
+    scanner.expect("{")
+    delimiter = "}" if scanner.peek() == "}" else ","
+    while delimiter == ",":
+        name = scanner.string()
+        scanner.expect(":")
+        prop = props.get(name)
+        if prop is None:
+            scanner.skip()
+        elif (
+            len(prop.shape)
+            and _NUMERIC_TYPES.match(prop.type)
+            and scanner.peek() == "["
+        ):
+            values[name] = scanner.array(np.dtype(prop.type))
+            if values[name].ndim != len(prop.shape):
+                raise ValueError(
+                    f"expected {len(prop.shape)}-dimensional array for "
+                    f"{name!r}, got {values[name].ndim} dimensions"
+                )
+        else:
+            values[name] = json.loads(scanner.raw())
+        delimiter = scanner.next()
+        if delimiter not in (",", "}"):
+            raise scanner.error("expected ',' or '}'")
+
+    inst = meta(dimensions=infer_dimensions(meta, values))
+    # Release each array as soon as it is copied into the instance
+    for name in list(values):
+        inst[name] = values.pop(name)
+    return inst
+
+
+def _iter_entry(inst: dlite.Instance, chunk_size: int) -> "Iterator[bytes]":
+    """Yield the JSON representation of `inst` without enclosing braces."""
+    if isinstance(inst, dlite.Collection):
+        data = collection_asjson(inst)[1:-1].encode()
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+        return
+
+    header = {"meta": inst.meta.uri, "dimensions": inst.dimensions}
+    if inst.uri:
+        header = {"uri": inst.uri, **header}
+    yield (f'"{inst.uuid}": ' + json.dumps(header)[:-1]).encode()
+    yield b', "properties": {'
+
+    for n, prop in enumerate(inst.meta["properties"]):
+        yield f'{", " if n else ""}{json.dumps(prop.name)}: '.encode()
+        value = inst[prop.name]
+        if (
+            isinstance(value, np.ndarray)
+            and value.dtype.kind in "biuf"
+            and value.nbytes > chunk_size
+        ):
+            yield from _iter_array(value, chunk_size)
+        else:
+            yield inst.get_property_as_string(prop.name).encode()
+
+    yield b"}}"
+
+
+def _iter_array(array: np.ndarray, chunk_size: int) -> "Iterator[bytes]":
+    """Yield the JSON representation of `array` in chunks."""
+    if array.ndim == 0:
+        yield json.dumps(array.item()).encode()
+        return
+
+    # Estimate number of rows per chunk from the size of the first row
+    nrows = len(array)
+    rowsize = max(len(json.dumps(array[:1].tolist())), 1) if nrows else 1
+    step = max(chunk_size // rowsize, 1)
+
+    yield b"["
+    for start in range(0, nrows, step):
+        block = json.dumps(array[start : start + step].tolist())[1:-1]
+        yield f'{", " if start else ""}{block}'.encode()
+    yield b"]"
+
+
+class _IteratorReader(io.RawIOBase):
+    """Raw binary stream reading from an iterator over bytes."""
+
+    def __init__(self, iterator: "Iterator[bytes]") -> None:
+        super().__init__()
+        self._iterator = iterator
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "Union[bytearray, memoryview]") -> int:
+        while not self._pending:
+            chunk: "Optional[bytes]" = next(self._iterator, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+# Types of properties whose arrays are decoded block-wise.
+_NUMERIC_TYPES = re.compile(r"(u?int|float)\d*$")
+
+# Regular expressions used by `_JsonScanner`.
+_BRACKETS = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[\s,\]}]")
+_NON_SPACE = re.compile(r"\S")
+
+# Types of the tokens of arrays by character code, whitespace is -1.
+_OPEN, _CLOSE, _COMMA, _NUMBER, _START = range(5)
+_TOKEN_TYPES = np.full(256, _NUMBER, dtype=np.int8)
+_TOKEN_TYPES[[ord(char) for char in " \t\n\r"]] = -1
+_TOKEN_TYPES[[ord("["), ord("]"), ord(",")]] = [_OPEN, _CLOSE, _COMMA]
+
+# Allowed pairs of consecutive array tokens.
+_TRANSITIONS = np.zeros((5, 4), dtype=bool)
+_TRANSITIONS[_START, _OPEN] = True
+_TRANSITIONS[_OPEN, [_OPEN, _NUMBER, _CLOSE]] = True
+_TRANSITIONS[_NUMBER, [_COMMA, _CLOSE]] = True
+_TRANSITIONS[_COMMA, [_OPEN, _NUMBER]] = True
+_TRANSITIONS[_CLOSE, [_COMMA, _CLOSE]] = True
+_TRANSITIONS = _TRANSITIONS.ravel()  # Indexed by 4 * first + second
+
+# Translation table replacing the delimiters of arrays with spaces.
+_ARRAY_DELIMITERS = str.maketrans("[],", "   ")
+
+
+class _JsonScanner:
+    """Incremental tokenizer of a JSON document read from a binary stream.
+
+    Only the text from the current position to the end of the value being
+    scanned is kept in memory, except for numerical arrays decoded by
+    `array()`.
+    """
+
+    def __init__(self, stream: "IO[bytes]", chunk_size: int) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._offset = 0  # Number of characters dropped from the buffer
+        self._eof = False
+
+    def error(self, msg: str, pos: "Optional[int]" = None) -> ValueError:
+        """Return an error for the current or the given position."""
+        pos = self._pos if pos is None else pos
+        return ValueError(f"{msg} at character {self._offset + pos}")
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character or "" at EOF."""
+        while True:
+            match = _NON_SPACE.search(self._buffer, self._pos)
+            if match:
+                self._pos = match.start()
+                return match.group()
+            self._pos = len(self._buffer)
+            if not self._fill():
+                return ""
+
+    def next(self) -> str:
+        """Consume and return the next non-whitespace character."""
+        char = self.peek()
+        self._pos += len(char)
+        return char
+
+    def expect(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be `char`."""
+        if self.next() != char:
+            raise self.error(f"expected {char!r}")
+
+    def string(self) -> str:
+        """Consume and return a string."""
+        if self.peek() != '"':
+            raise self.error("expected string")
+        return json.loads(self.raw())
+
+    def raw(self) -> str:
+        """Consume a value and return its JSON text."""
+        self.peek()
+        end = self._scan(keep=True)
+        text = self._buffer[self._pos : end]
+        self._pos = end
+        return text
+
+    def skip(self) -> None:
+        """Consume a value without keeping its text."""
+        self.peek()
+        self._pos = self._scan(keep=False)
+
+    def array(self, dtype: np.dtype) -> np.ndarray:
+        """Consume a rectangular array of numbers and return it."""
+        data = np.empty(self._chunk_size // 8 or 1, dtype=dtype)
+        size = 0
+        shape = _ArrayShape()
+        while True:
+            start = self._pos
+            end = max(self._buffer.rfind(char, start) for char in ",[]") + 1
+            if not end:
+                if not self._fill():
+                    raise self.error("unterminated array")
+                continue
+            segment = self._buffer[start:end]
+            try:
+                length = shape.feed(segment)
+            except _ArrayError as exc:
+                raise self.error(str(exc), start + exc.pos) from exc
+            segment = segment[:length]
+            if "{" in segment or '"' in segment:
+                raise self.error("not an array of numbers", start)
+
+            try:
+                numbers = _parse_numbers(segment, dtype)
+            except ValueError as exc:
+                raise self.error("invalid number", start) from exc
+            if size + len(numbers) > len(data):
+                data.resize(
+                    max(2 * len(data), size + len(numbers)), refcheck=False
+                )
+            data[size : size + len(numbers)] = numbers
+            size += len(numbers)
+            self._pos = start + length
+            if shape.closed:
+                break
+            if not self._fill():
+                raise self.error("unterminated array")
+
+        data.resize(size, refcheck=False)
+        try:
+            return data.reshape(shape.shape())
+        except _ArrayError as exc:
+            raise self.error(str(exc)) from exc
+
+    def _scan(self, keep: bool) -> int:
+        """Return the end position of the value at the current position.
+
+        If `keep` is false, the scanned text may be dropped from the
+        buffer, i.e. the current position is moved along.
+        """
+        char = self._buffer[self._pos : self._pos + 1]
+        if not char:
+            raise self.error("expected value")
+        if char not in '["{':
+            return self._search(_SCALAR_END, self._pos, keep, eof_ok=True)
+
+        depth = 0
+        pos = self._pos
+        while True:
+            if char == '"':
+                pos = self._string_end(pos + 1, keep)
+                if not depth:
+                    return pos
+            elif char in "[{":
+                depth += 1
+                pos += 1
+            else:
+                depth -= 1
+                pos += 1
+                if not depth:
+                    return pos
+            pos = self._search(_BRACKETS, pos, keep)
+            char = self._buffer[pos]
+
+    def _string_end(self, pos: int, keep: bool) -> int:
+        """Return the position after the string ending at or after `pos`."""
+        while True:
+            pos = self._search(_STRING_END, pos, keep)
+            if self._buffer[pos] == '"':
+                return pos + 1
+            # Skip escaped character
+            pos += 2
+            while pos > len(self._buffer):
+                pos = self._fill_from(pos, keep)
+
+    def _search(
+        self, regex: "re.Pattern", pos: int, keep: bool, eof_ok: bool = False
+    ) -> int:
+        """Return the position of the next match of `regex` from `pos`,
+        reading more of the stream as needed."""
+        while True:
+            match = regex.search(self._buffer, pos)
+            if match:
+                return match.start()
+            if self._eof:
+                if eof_ok:
+                    return len(self._buffer)
+                raise self.error("unexpected end of document")
+            pos = self._fill_from(len(self._buffer), keep)
+
+    def _fill_from(self, pos: int, keep: bool) -> int:
+        """Read more of the stream and return `pos` adjusted to the new
+        buffer.  Unless `keep` is true, text before `pos` is dropped."""
+        if not keep:
+            self._pos = min(pos, len(self._buffer))
+        shift = self._pos
+        more = self._fill()
+        pos -= shift
+        if not more and pos > len(self._buffer):
+            raise self.error("unexpected end of document")
+        return pos
+
+    def _fill(self) -> bool:
+        """Read the next chunk of the stream into the buffer.
+
+        Text before the current position is dropped.  Returns false at the
+        end of the stream.
+        """
+        data = b"" if self._eof else self._stream.read(self._chunk_size)
+        self._eof = not data
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(
+            data, final=self._eof
+        )
+        self._pos = 0
+        return not self._eof
+
+
+def _parse_numbers(text: str, dtype: np.dtype) -> np.ndarray:
+    """Return the numbers in a segment of a JSON array."""
+    text = text.translate(_ARRAY_DELIMITERS)
+    if text.isspace() or not text:
+        # NumPy returns a bogus value for strings with only separators
+        return np.empty(0, dtype=dtype)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(  # type: ignore[call-overload]
+                text, dtype=dtype, sep=" "
+            )
+        except DeprecationWarning as exc:
+            raise ValueError(str(exc)) from exc
+
+
+class _ArrayError(ValueError):
+    """Invalid array at position `pos` of a segment."""
+
+    def __init__(self, msg: str, pos: int = 0) -> None:
+        super().__init__(msg)
+        self.pos = pos
+
+
+class _ArrayShape:
+    """Structure of a JSON array of numbers fed one segment at a time.
+
+    The tokens of each segment are checked to form a valid array, where
+    sub-arrays at the same depth have the same number of elements and
+    numbers only occur in the innermost arrays, which are all at the same
+    depth.  Segments must end at a delimiter of the array, such that no
+    number is split.
+
+    Only the brackets are tracked.  The number of elements of an
+    innermost array follows from the number of tokens between its
+    brackets, such that only the few other sub-arrays are counted per
+    depth.
+    """
+
+    def __init__(self) -> None:
+        self._last = _START  # Type of the last token
+        self._last_bracket = _START  # Type of the last bracket
+        self._gap = 0  # Number of tokens after the last bracket
+        self._depth = 0  # Nesting depth after the last bracket
+        self._leaf: "Optional[int]" = None  # Depth of the innermost arrays
+        # Number of elements per depth since the last sub-array closed
+        self._pending: "dict[int, int]" = {}
+        # Number of elements of the sub-arrays per depth
+        self._lengths: "dict[int, int]" = {}
+
+    def feed(self, segment: str) -> int:
+        """Check the next segment and return the length of its part
+        belonging to the array."""
+        types, pos = _tokenize(segment)
+        brackets = np.flatnonzero(types <= _CLOSE)
+        closes = types[brackets] == _CLOSE
+        delta = np.where(closes, -1, 1)
+        depths = np.cumsum(delta) + self._depth - delta  # Before brackets
+        length = len(segment)
+        done = np.flatnonzero(closes & (depths == 1))
+        if done.size:
+            brackets = brackets[: done[0] + 1]
+            closes, depths = closes[: done[0] + 1], depths[: done[0] + 1]
+            types, pos = types[: brackets[-1] + 1], pos[: brackets[-1] + 1]
+            length = int(pos[-1]) + 1
+
+        previous = np.empty_like(types)
+        previous[:1] = self._last
+        previous[1:] = types[:-1]
+        valid = np.take(_TRANSITIONS, 4 * previous + types)
+        if not valid.all():
+            raise _ArrayError("invalid array", int(pos[np.argmin(valid)]))
+        if not types.size:
+            return length
+
+        if brackets.size:
+            self._count(
+                closes,
+                depths,
+                gaps=np.diff(brackets, prepend=-1 - self._gap) - 1,
+                pos=pos[brackets],
+            )
+            self._last_bracket = _CLOSE if closes[-1] else _OPEN
+            self._gap = len(types) - 1 - int(brackets[-1])
+            self._depth = int(depths[-1]) + (-1 if closes[-1] else 1)
+        else:
+            self._gap += len(types)
+        self._last = int(types[-1])
+        return length
+
+    @property
+    def closed(self) -> bool:
+        """Whether the array has been closed."""
+        return self._last_bracket == _CLOSE and not self._depth
+
+    def shape(self) -> "tuple[int, ...]":
+        """Return the shape of the array."""
+        assert self._leaf is not None  # nosec
+        return tuple(self._lengths[depth] for depth in range(1, self._leaf + 1))
+
+    def _count(
+        self,
+        closes: np.ndarray,
+        depths: np.ndarray,
+        gaps: np.ndarray,
+        pos: np.ndarray,
+    ) -> None:
+        """Count the elements of the sub-arrays closed by the brackets.
+
+        `closes` tells which brackets are closing, `depths` is the depth
+        before each bracket, `gaps` the number of tokens before each
+        bracket since the previous one and `pos` their positions.
+        """
+        innermost = self._check_innermost(closes, depths, gaps, pos)
+        # Count the sub-arrays at their closing bracket.  The innermost
+        # arrays are counted at the closing bracket of their parent.
+        inner = np.flatnonzero(innermost)
+        kept = np.flatnonzero(closes & ~innermost)
+        ninner = np.searchsorted(inner, kept)
+        nchildren = np.diff(ninner, prepend=0)
+        levels = np.unique(depths[kept])
+        for depth in np.union1d(levels, levels[levels > 1] - 1).tolist():
+            self._count_depth(
+                depth,
+                np.where(depths[kept] == depth, nchildren, 0)
+                + (depths[kept] == depth + 1),
+                depths[kept] == depth,
+                pos[kept],
+            )
+        if self._leaf is not None:
+            parent = self._leaf - 1
+            ntail = len(inner) - int(ninner[-1:].sum())
+            self._pending[parent] = self._pending.get(parent, 0) + ntail
+
+    def _check_innermost(
+        self,
+        closes: np.ndarray,
+        depths: np.ndarray,
+        gaps: np.ndarray,
+        pos: np.ndarray,
+    ) -> np.ndarray:
+        """Check the innermost arrays and that numbers and arrays are not
+        mixed.  Returns which brackets close an innermost array."""
+        after_open = np.empty_like(closes)
+        after_open[0] = self._last_bracket == _OPEN
+        np.logical_not(closes[:-1], out=after_open[1:])
+        innermost = closes & after_open
+        # There must be nothing between "[[" or "]]" and only a comma
+        # between "], ["
+        mixed = (gaps != ~(after_open | closes)) & ~innermost
+        mixed[0] &= self._last_bracket != _START
+        wrong = np.flatnonzero(mixed)[:1]
+
+        inner = np.flatnonzero(innermost)
+        if inner.size:
+            numbers = (gaps[inner] + 1) // 2
+            if self._leaf is None:
+                self._leaf = int(depths[inner[0]])
+                self._lengths[self._leaf] = int(numbers[0])
+            misplaced = (depths[inner] != self._leaf) | (
+                numbers != self._lengths[self._leaf]
+            )
+            wrong = np.concatenate((wrong, inner[misplaced][:1]))
+        if wrong.size:
+            raise _ArrayError("array is not rectangular", int(pos[wrong.min()]))
+        return innermost
+
+    def _count_depth(
+        self,
+        depth: int,
+        elements: np.ndarray,
+        ends: np.ndarray,
+        pos: np.ndarray,
+    ) -> None:
+        """Count the elements of the sub-arrays at `depth`.
+
+        `elements` is the number of elements added at each closing bracket
+        and `ends` tells which of them close a sub-array at `depth`.
+        """
+        counts = np.cumsum(elements) + self._pending.get(depth, 0)
+        if ends.any():
+            lengths = np.diff(counts[ends], prepend=0)
+            expected = self._lengths.setdefault(depth, int(lengths[0]))
+            wrong = np.flatnonzero(lengths != expected)
+            if wrong.size:
+                at = int(pos[ends][wrong[0]])
+                raise _ArrayError("array is not rectangular", at)
+            self._pending[depth] = int(counts[-1] - counts[ends][-1])
+        else:
+            self._pending[depth] = int(counts[-1])
+
+
+def _tokenize(segment: str) -> "tuple[np.ndarray, np.ndarray]":
+    """Return the types and positions of the tokens of an array segment."""
+    codes = np.frombuffer(segment.encode("ascii", "replace"), np.uint8)
+    chars = np.take(_TOKEN_TYPES, codes)
+    starts = chars >= 0
+    numbers = chars == _NUMBER
+    starts[1:] &= ~(numbers[1:] & numbers[:-1])
+    pos = np.flatnonzero(starts)
+    return chars[pos], pos
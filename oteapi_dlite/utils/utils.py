@@ -1,25 +1,64 @@
 """Utility functions for OTEAPI DLite plugin."""
 
 # pylint: disable=invalid-name
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
 import dlite
-from dlite.mappings import instantiate
+import numpy as np
+from cachetools import LRUCache
+from dlite.mappings import (
+    InsufficientMappingError,
+    MissingRelationError,
+    UnknownUnitError,
+    infer_dimensions,
+    instantiate_from_routes,
+    mapping_routes,
+)
 from oteapi.datacache import DataCache
+from oteapi.plugins import create_strategy
+from oteapi.utils.paths import uri_to_path
+from pint import Quantity
 from tripper import Triplestore
 
 from oteapi_dlite.utils.exceptions import CollectionNotFound
+from oteapi_dlite.utils.indexes import indexed_triplestore
+from oteapi_dlite.utils.persistence import (
+    get_index,
+    load_collection,
+    save_collection,
+)
+from oteapi_dlite.utils.storagepaths import (
+    find_metadata,
+    load_metadata,
+    register_storage_path,
+)
+from oteapi_dlite.utils.streaming import open_cache_stream
 
 if TYPE_CHECKING:  # pragma: no cover
-    from typing import Any, Optional, Union
+    from collections.abc import Callable, Hashable, Iterator, Sequence
+    from concurrent.futures import Executor, Future
+    from typing import IO, Any, Optional, Union
+
+    from oteapi.models import AttrDict
+    from tripper.mappings import MappingStep
+
+    from oteapi_dlite.utils.indexes import CollectionIndex
 
     NoneType = type(None)
+    Relation = tuple[str, str, str, Optional[str]]
 
 
 # Set up paths
 entities_dir = Path(__file__).parent.parent.resolve() / "entities"
-dlite.storage_path.append(f"{entities_dir}/*.json")
+register_storage_path(f"{entities_dir}/*.json")
 
 
 # Map mediaType to DLite driver
@@ -46,6 +85,110 @@ ACCESSSERVICES = {
 }
 
 
+class MetaCacheInfo(NamedTuple):
+    """Statistics of the metadata cache used by `get_meta()`."""
+
+    hits: int
+    misses: int
+    negative_hits: int
+    currsize: int
+
+
+# Metadata cache used by get_meta().  Maps URIs to either the metadata or,
+# for URIs that could not be resolved, the exception that was raised.
+# The cache is invalidated whenever `dlite.storage_path` changes.
+_meta_cache: "dict[str, Union[dlite.Instance, dlite.DLiteError]]" = {}
+_meta_cache_path: "tuple[str, ...]" = ()
+_meta_cache_stats = {"hits": 0, "misses": 0, "negative_hits": 0}
+_meta_cache_lock = threading.Lock()
+
+
+# Maximum number of route plans cached by get_instance().
+ROUTE_PLAN_CACHE_MAXSIZE = 64
+
+
+class RoutePlanInfo(NamedTuple):
+    """Statistics of the route plan cache used by `get_instance()`.
+
+    `planning_time` and `execution_time` are the accumulated number of
+    seconds spent on finding mapping routes and on evaluating them.
+    """
+
+    hits: int
+    misses: int
+    currsize: int
+    planning_time: float
+    execution_time: float
+
+
+class _SourceValues(threading.local):
+    """Values of the sources of a route plan in the current thread."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.values: "Mapping[str, Any]" = {}
+
+    def getter(self, iri: str) -> "Any":
+        """Return a callable returning the current value of source `iri`."""
+        return lambda: self.values[iri]
+
+
+class _RoutePlan(NamedTuple):
+    """Mapping routes found for a target metadata and a set of sources.
+
+    The routes refer to the source values through `sources`, such that
+    the same routes can be evaluated for different source instances.
+    """
+
+    routes: "dict[str, MappingStep]"
+    sources: _SourceValues
+
+
+# Route plans used by get_instance(), see `_route_plan_key()`.
+_route_plans: "LRUCache[Hashable, _RoutePlan]" = LRUCache(
+    maxsize=ROUTE_PLAN_CACHE_MAXSIZE
+)
+_route_plan_stats = {
+    "hits": 0,
+    "misses": 0,
+    "planning_time": 0.0,
+    "execution_time": 0.0,
+}
+_route_plan_lock = threading.Lock()
+
+
+# Array values of at least this number of bytes are passed to worker
+# processes in shared memory by `get_instance()`.
+SHARED_MEMORY_THRESHOLD = 2**16
+
+
+class _WorkerPlan(NamedTuple):
+    """What a worker process needs to find the routes of a route plan."""
+
+    key: "Optional[Hashable]"
+    meta_uri: str
+    meta_json: str
+    relations: "list[tuple[str, str, str, Optional[str]]]"
+    sources: "list[str]"
+    allow_incomplete: bool
+    kwargs: "dict[str, Any]"
+
+
+class _SharedArray(NamedTuple):
+    """Reference to an array (or the magnitude of a quantity) in shared
+    memory."""
+
+    name: str
+    offset: int
+    shape: "tuple[int, ...]"
+    dtype: str
+    unit: "Optional[str]"
+
+
+# Shared memory blocks attached to by this worker process, keyed by name.
+_attached: "dict[str, shared_memory.SharedMemory]" = {}
+
+
 def get_collection(
     session: "Optional[dict[str, Any]]" = None,
     collection_id: "Optional[str]" = None,
@@ -60,6 +203,10 @@ def get_collection(
     `collection_id` in the session, that is left untouched. Otherwise
     `collection_id` is added to the session.
 
+    Collections that are already alive in this interpreter are returned
+    without being reloaded, unless they have been updated by another
+    interpreter since they were last loaded.
+
     Parameters:
         session: An OTEAPI session object.
         collection_id: A specific collection ID to retrieve.
@@ -72,16 +219,16 @@ def get_collection(
     session = session or {}
     id_ = collection_id or session.get("collection_id")
 
-    # Storing the collection in the datacache is not scalable.
-    # Do we really want to do that?
+    # The collection is stored incrementally in the datacache, see
+    # `oteapi_dlite.utils.persistence`.
     #
     # Currently we check the datacache first and then ask dlite to look
     # up the collection (which is the proper and scalable solution).
     if id_ is None:
         coll = dlite.Collection()
-        cache.add(coll.asjson(), key=coll.uuid)
+        save_collection(coll, cache=cache)
     elif id_ in cache:
-        coll = dlite.Instance.from_json(cache.get(id_), id=id_)
+        coll = load_collection(id_, cache=cache)
     else:
         try:
             coll = dlite.get_instance(id_)
@@ -102,24 +249,85 @@ def get_collection(
 def update_collection(collection: dlite.Collection) -> None:
     """Update collection in DataCache.
 
+    Only the relations that have changed since the collection was last
+    saved are written.
+
     Parameters:
         collection: The DLite Collection to be updated.
     """
-    cache = DataCache()
-    cache.add(value=collection.asjson(), key=collection.uuid)
+    save_collection(collection)
 
 
 def get_meta(uri: str) -> dlite.Instance:
     """Returns metadata corresponding to given uri.
 
+    Metadata defined in storage paths registered with
+    `oteapi_dlite.utils.storagepaths.register_storage_path()` are loaded
+    directly from the file they are defined in.  Other metadata are looked
+    up with `dlite.get_instance()`.
+
+    Resolved metadata are cached, such that repeated lookups of the same
+    uri do not search `dlite.storage_path`.  Failed lookups are cached as
+    well, unless the metadata has since been created in memory or added to
+    a registered storage path.  The cache is cleared whenever
+    `dlite.storage_path` changes.
+
     This function may in the future be connected to a database.
     """
-    meta = dlite.get_instance(uri)
+    global _meta_cache_path  # pylint: disable=global-statement
+
+    with _meta_cache_lock:
+        path = tuple(dlite.storage_path.aslist())
+        if path != _meta_cache_path:
+            _meta_cache.clear()
+            _meta_cache_path = path
+        cached = _meta_cache.get(uri)
+
+        if isinstance(cached, dlite.Instance):
+            _meta_cache_stats["hits"] += 1
+            return cached
+
+    # The registered storage paths are checked outside of the lock, since
+    # they may have to be rescanned
+    if (
+        cached is not None
+        and not dlite.has_instance(uri, check_storages=False)
+        and find_metadata(uri) is None
+    ):
+        with _meta_cache_lock:
+            _meta_cache_stats["negative_hits"] += 1
+        raise type(cached)(*cached.args)
+    with _meta_cache_lock:
+        _meta_cache_stats["misses"] += 1
+
+    try:
+        meta = load_metadata(uri) or dlite.get_instance(uri)
+    except dlite.DLiteError as exc:  # pylint: disable=no-member
+        with _meta_cache_lock:
+            _meta_cache[uri] = exc
+        raise
     if not meta.is_meta:
-        raise ValueError("uri {uri} does not correspond to metadata")
+        raise ValueError(f"uri {uri} does not correspond to metadata")
+
+    with _meta_cache_lock:
+        _meta_cache[uri] = meta
     return meta
 
 
+def get_meta_cache_info() -> MetaCacheInfo:
+    """Return hit/miss statistics of the metadata cache of `get_meta()`."""
+    with _meta_cache_lock:
+        return MetaCacheInfo(currsize=len(_meta_cache), **_meta_cache_stats)
+
+
+def clear_meta_cache() -> None:
+    """Clear the metadata cache of `get_meta()` and reset its statistics."""
+    with _meta_cache_lock:
+        _meta_cache.clear()
+        for key in _meta_cache_stats:
+            _meta_cache_stats[key] = 0
+
+
 def get_driver(
     mediaType: "Optional[str]" = None,
     accessService: "Optional[str]" = None,
@@ -140,16 +348,59 @@ def get_driver(
     raise ValueError("either `mediaType` or `accessService` must be provided")
 
 
-def get_instance(
+def open_resource(config: "AttrDict") -> "IO[bytes]":
+    """Open a resource as a binary stream.
+
+    Local files are opened directly.  Other resources are downloaded to
+    the data cache with the download strategy for `config.downloadUrl`,
+    where large values are stored as files.
+
+    Parameters:
+        config: Configuration with a `downloadUrl` field, passed on to
+            the download strategy.
+
+    Returns:
+        A binary file-like object.  It should be closed by the caller.
+
+    Raises:
+        KeyError: If the downloaded value is missing from the data cache,
+            e.g. since it has expired.
+    """
+    if config.downloadUrl and config.downloadUrl.scheme == "file":
+        return open(uri_to_path(config.downloadUrl), "rb")
+    downloader = create_strategy("download", config.model_dump())
+    return open_cache_stream(downloader.get()["key"])
+
+
+# The original arguments of this public function, plus `executor`
+def get_instance(  # pylint: disable=too-many-arguments
     meta: "Union[str, dlite.Metadata]",
     collection: dlite.Collection,
     routedict: "Optional[dict]" = None,
     instance_id: "Optional[str]" = None,
     allow_incomplete: bool = False,
+    *,
+    executor: "Optional[Executor]" = None,
     **kwargs,
 ) -> dlite.Instance:
     """Instantiates and returns an instance of `meta`.
 
+    The mapping routes found for a given target metadata, set of source
+    metadata and mapping triples in `collection` are cached, such that
+    repeated calls only evaluate the routes.  See `get_route_plan_info()`.
+
+    Only the instances in `collection` with properties appearing in the
+    mapping relations are loaded, and only when the routes need them.
+
+    If `executor` is given, the routes of the individual properties are
+    evaluated concurrently in it, which pays off when the routes call
+    expensive conversion functions.  With a `ProcessPoolExecutor`, each
+    worker process finds (and caches) the routes itself, so conversion
+    functions must be importable there.  Source array values of at least
+    `SHARED_MEMORY_THRESHOLD` bytes are passed to the workers in shared
+    memory.  Other executors, like `ThreadPoolExecutor`, are assumed to
+    share memory with the caller.
+
     Arguments:
         meta: Metadata to instantiate.  Typically its URI.
         collection: The collection with instances and mappings.
@@ -161,16 +412,508 @@ def get_instance(
         instance_id: URI of instance to create.
         allow_incomplete: Whether to allow not populating all properties
             of the returned instance.
+        executor: Executor to evaluate the property routes in.
         kwargs: Additional arguments passed to dlite.mappings.instantiate().
     """
-    ts = Triplestore(backend="collection", collection=collection)
-    inst = instantiate(
-        meta=meta,
-        instances=list(collection.get_instances()),
-        triplestore=ts,
-        routedict=routedict,
-        id=instance_id,
-        allow_incomplete=allow_incomplete,
-        **kwargs,
+    if isinstance(meta, str):
+        meta = get_meta(meta)
+    quantity = kwargs.pop("quantity", Quantity)
+    default = kwargs.pop("default", None)
+    if default:
+        allow_incomplete = True
+
+    # Only instances with mapped properties are loaded, on demand
+    index = get_index(collection)
+    metas, mappings = _collection_relations(collection, index)
+    values = _LazySourceValues(
+        collection, _mapped_sources(metas, mappings, quantity), quantity
+    )
+    key = _route_plan_key(
+        meta,
+        values,
+        mappings,
+        {"allow_incomplete": allow_incomplete, "quantity": quantity, **kwargs},
+    )
+    plan = _cached_route_plan(
+        key,
+        lambda: _plan_routes(
+            meta,
+            list(values),
+            collection,
+            allow_incomplete,
+            index=index,
+            **kwargs,
+        ),
+    )
+
+    with _route_plan_timer("execution_time"):
+        if executor is None:
+            plan.sources.values = values
+            try:
+                return instantiate_from_routes(
+                    meta=meta,
+                    routes=plan.routes,
+                    routedict=routedict,
+                    id=instance_id,
+                    default=default,
+                    quantity=quantity,
+                )
+            finally:
+                plan.sources.values = {}
+        return _instantiate_concurrently(
+            meta,
+            plan,
+            values,
+            executor,
+            (
+                _WorkerPlan(
+                    key=key,
+                    meta_uri=meta.uri,
+                    meta_json=meta.asjson(),
+                    relations=mappings,
+                    sources=list(values),
+                    allow_incomplete=allow_incomplete,
+                    kwargs=kwargs,
+                )
+                if isinstance(executor, ProcessPoolExecutor)
+                else None
+            ),
+            routedict=routedict,
+            id=instance_id,
+            default=default,
+            quantity=quantity,
+        )
+
+
+def get_route_plan_info() -> RoutePlanInfo:
+    """Return statistics of the route plan cache of `get_instance()`."""
+    with _route_plan_lock:
+        return RoutePlanInfo(currsize=len(_route_plans), **_route_plan_stats)
+
+
+def clear_route_plan_cache() -> None:
+    """Clear the route plan cache of `get_instance()` and its statistics."""
+    with _route_plan_lock:
+        _route_plans.clear()
+        for key, value in _route_plan_stats.items():
+            _route_plan_stats[key] = type(value)()
+
+
+class _LazySourceValues(Mapping):
+    """Read-only mapping from source property IRIs to their values.
+
+    Instances are only loaded from the collection, and their values
+    converted, when a value is first looked up.  Properties with a unit
+    are returned as quantities, like `dlite.mappings.instance_routes()`
+    does.
+
+    Parameters:
+        collection: The collection with the source instances.
+        sources: Maps source property IRIs to the label of the instance in
+            `collection`, the property name and its unit.
+        quantity: Quantity class.
+    """
+
+    def __init__(
+        self,
+        collection: dlite.Collection,
+        sources: "dict[str, tuple[str, str, Optional[str]]]",
+        quantity: "type[Quantity]",
+    ) -> None:
+        self._collection = collection
+        self._sources = sources
+        self._quantity = quantity
+        self._values: "dict[str, Any]" = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, iri: str) -> "Any":
+        with self._lock:
+            if iri not in self._values:
+                label, name, unit = self._sources[iri]
+                value = self._collection.get(label)[name]
+                self._values[iri] = (
+                    self._quantity(value, unit) if unit else value
+                )
+            return self._values[iri]
+
+    def __iter__(self) -> "Iterator[str]":
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+
+def _collection_relations(
+    collection: dlite.Collection, index: "Optional[CollectionIndex]"
+) -> "tuple[dict[str, str], list[Relation]]":
+    """Return the instances and the mapping relations in `collection`.
+
+    Relations with a predicate starting with an underscore only record the
+    instances in the collection and are not mapping relations.
+
+    Returns:
+        A dict mapping the labels of the instances to the URI of their
+        metadata, in the order the instances were added, and a list of
+        the mapping relations.
+    """
+    if index is not None:
+        metas = {
+            label: uri
+            for uri in index.get_metas()
+            for label in index.get_labels(uri)
+        }
+        mappings = [
+            rel
+            for p in index.get_predicates()
+            if not p.startswith("_")
+            for rel in index.get_relations(p)
+        ]
+        return metas, mappings
+
+    metas = {}
+    mappings = []
+    for rel in collection.get_property("relations"):
+        if rel.p == "_has-meta":
+            metas[rel.s] = rel.o
+        elif not rel.p.startswith("_"):
+            mappings.append((rel.s, rel.p, rel.o, rel.d))
+    return metas, mappings
+
+
+def _mapped_sources(
+    metas: "dict[str, str]",
+    mappings: "list[Relation]",
+    quantity: "type[Quantity]",
+) -> "dict[str, tuple[str, str, Optional[str]]]":
+    """Return the source properties that are mapped.
+
+    Only properties that appear in a mapping relation can be the source
+    of a mapping route.  They are found from the metadata of the
+    instances, without loading the instances.  If several instances have
+    the same metadata, the last one is used.
+
+    Parameters:
+        metas: Maps instance labels to the URI of their metadata.
+        mappings: The mapping relations.
+        quantity: Quantity class.
+
+    Returns:
+        A dict mapping source property IRIs to the label of the instance,
+        the property name and its unit.
+    """
+    mapped = set()
+    for s, _, o, _ in mappings:
+        mapped.update((s, o))
+
+    sources = {}
+    for label, uri in metas.items():
+        for prop in get_meta(uri)["properties"]:
+            iri = f"{uri}#{prop.name}"
+            if iri not in mapped:
+                continue
+            if prop.unit:
+                try:
+                    quantity(1.0, prop.unit)
+                except TypeError as exc:
+                    raise UnknownUnitError(
+                        f"unknown unit '{prop.unit}' in datamodel: {uri}"
+                    ) from exc
+            sources[iri] = (label, prop.name, prop.unit)
+    return sources
+
+
+def _route_plan_key(
+    meta: dlite.Metadata,
+    values: "Mapping[str, Any]",
+    mappings: "list[Relation]",
+    settings: "dict[str, Any]",
+) -> "Optional[Hashable]":
+    """Return the route plan cache key or None if the plan can't be cached.
+
+    The key is made of the target metadata, the set of source properties,
+    the mapping relations and the `settings` affecting route planning.
+    The relations themselves are part of the key, such that plans for
+    different mappings never share a key.
+    """
+    key = (
+        meta.uri,
+        frozenset(values),
+        frozenset(mappings),
+        tuple(sorted(settings.items())),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _cached_route_plan(
+    key: "Optional[Hashable]", plan_routes: "Callable[[], _RoutePlan]"
+) -> _RoutePlan:
+    """Return the cached route plan for `key`.
+
+    If there is none, the plan is found with `plan_routes()` and cached,
+    unless `key` is None.
+    """
+    with _route_plan_lock:
+        plan = _route_plans.get(key) if key is not None else None
+        _route_plan_stats["hits" if plan else "misses"] += 1
+
+    if plan is None:
+        with _route_plan_timer("planning_time"):
+            plan = plan_routes()
+        if key is not None:
+            with _route_plan_lock:
+                _route_plans[key] = plan
+    return plan
+
+
+@contextmanager
+def _route_plan_timer(stat: str) -> "Iterator[None]":
+    """Add the time spent in the context to the route plan statistic
+    `stat`."""
+    tic = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _route_plan_lock:
+            _route_plan_stats[stat] += time.perf_counter() - tic
+
+
+def _plan_routes(
+    meta: dlite.Metadata,
+    sources: "Sequence[str]",
+    collection: dlite.Collection,
+    allow_incomplete: bool,
+    index: "Optional[CollectionIndex]" = None,
+    **kwargs,
+) -> _RoutePlan:
+    """Find the mapping routes to all properties of `meta`.
+
+    Follows `dlite.mappings.instance_routes()`, but the sources of the
+    returned routes look up their values in the returned plan.  If
+    `index` is given, the mapping relations are looked up in it.
+    """
+    ts = (
+        Triplestore(backend="collection", collection=collection)
+        if index is None
+        else indexed_triplestore(collection, index)
     )
+    plan = _RoutePlan(routes={}, sources=_SourceValues())
+    getters = {iri: plan.sources.getter(iri) for iri in sources}
+    for prop in meta["properties"]:
+        target = f"{meta.uri}#{prop.name}"
+        try:
+            route = mapping_routes(target, getters, ts, **kwargs)
+        except MissingRelationError:
+            if allow_incomplete:
+                continue
+            raise
+        if not allow_incomplete and not route.number_of_routes():
+            raise InsufficientMappingError(f"No mappings for {target}")
+        plan.routes[prop.name] = route
+    return plan
+
+
+def _instantiate_concurrently(
+    meta: dlite.Metadata,
+    plan: _RoutePlan,
+    values: "Mapping[str, Any]",
+    executor: "Executor",
+    worker_plan: "Optional[_WorkerPlan]",
+    **kwargs,
+) -> dlite.Instance:
+    """Like `dlite.mappings.instantiate_from_routes()`, but evaluates the
+    routes of the properties concurrently in `executor`.
+
+    `worker_plan` must be given if and only if `executor` runs the routes
+    in other processes.  `kwargs` are the `routedict`, `id`, `default` and
+    `quantity` arguments of `instantiate_from_routes()`.
+    """
+    routedict = kwargs.get("routedict") or {}
+    quantity = kwargs.get("quantity", Quantity)
+    futures: "dict[str, Future]" = {}
+    shm = None
+    try:
+        if worker_plan is not None:
+            shm, shared = _share_values(values)
+            evaluate = partial(_eval_in_process, worker_plan, shared)
+        else:
+            evaluate = partial(_eval_in_thread, plan, values)
+        for prop in meta["properties"]:
+            if prop.name in plan.routes:
+                futures[prop.name] = executor.submit(
+                    evaluate,
+                    prop.name,
+                    {
+                        "routeno": routedict.get(prop.name),
+                        "unit": prop.unit,
+                        "quantity": quantity,
+                    },
+                )
+        results = _property_results(meta, futures, kwargs.get("default"))
+    finally:
+        for future in futures.values():
+            future.cancel()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    return _new_instance(meta, results, kwargs.get("id"))
+
+
+def _new_instance(
+    meta: dlite.Metadata, values: "dict[str, Any]", instance_id: "Optional[str]"
+) -> dlite.Instance:
+    """Return a new instance of `meta` with the given property values."""
+    inst = meta(dimensions=infer_dimensions(meta, values), id=instance_id)
+    for name, value in values.items():
+        inst[name] = value
     return inst
+
+
+def _property_results(
+    meta: dlite.Metadata,
+    futures: "dict[str, Future]",
+    default: "Optional[dlite.Instance]",
+) -> "dict[str, Any]":
+    """Return the property values of the evaluated routes in `futures`.
+
+    Properties without a route are taken from `default`, if given.
+    """
+    results = {}
+    for prop in meta["properties"]:
+        if prop.name in futures:
+            try:
+                results[prop.name] = futures[prop.name].result()
+            except MissingRelationError:
+                if not default:
+                    raise
+                results[prop.name] = default[prop.name]
+        elif default:
+            results[prop.name] = default[prop.name]
+    return results
+
+
+def _eval_in_thread(
+    plan: _RoutePlan,
+    values: "Mapping[str, Any]",
+    name: str,
+    options: "dict[str, Any]",
+) -> "Any":
+    """Evaluate the route of property `name` in a thread of the caller.
+
+    `options` are the `routeno`, `unit` and `quantity` arguments of
+    `MappingStep.eval()`.
+    """
+    plan.sources.values = values
+    try:
+        return plan.routes[name].eval(**options)
+    finally:
+        plan.sources.values = {}
+
+
+def _eval_in_process(
+    worker_plan: _WorkerPlan,
+    shared: "dict[str, Any]",
+    name: str,
+    options: "dict[str, Any]",
+) -> "Any":
+    """Evaluate the route of property `name` in a worker process."""
+    key = worker_plan.key
+    with _route_plan_lock:
+        plan = _route_plans.get(key) if key is not None else None
+    if plan is None:
+        if dlite.has_instance(worker_plan.meta_uri, check_storages=False):
+            meta = dlite.get_instance(worker_plan.meta_uri)
+        else:
+            meta = dlite.Instance.from_json(worker_plan.meta_json)
+        collection = dlite.Collection()
+        for relation in worker_plan.relations:
+            collection.add_relation(*relation)
+        plan = _plan_routes(
+            meta,
+            worker_plan.sources,
+            collection,
+            worker_plan.allow_incomplete,
+            **worker_plan.kwargs,
+        )
+        if key is not None:
+            with _route_plan_lock:
+                _route_plans[key] = plan
+
+    values = {
+        iri: (
+            _attach(value, options["quantity"])
+            if isinstance(value, _SharedArray)
+            else value
+        )
+        for iri, value in shared.items()
+    }
+    return _eval_in_thread(plan, values, name, options)
+
+
+def _share_values(
+    values: "Mapping[str, Any]",
+) -> "tuple[Optional[shared_memory.SharedMemory], dict[str, Any]]":
+    """Copy large arrays in `values` to a new shared memory block.
+
+    Returns:
+        The shared memory block, or None if no arrays were copied, and
+        `values` with the copied arrays replaced by `_SharedArray`
+        references.
+    """
+    arrays = {}
+    size = 0
+    for iri, value in values.items():
+        magnitude = value.m if isinstance(value, Quantity) else value
+        if (
+            isinstance(magnitude, np.ndarray)
+            and magnitude.dtype.kind != "O"
+            and magnitude.nbytes >= SHARED_MEMORY_THRESHOLD
+        ):
+            arrays[iri] = (size, magnitude)
+            size += -(-magnitude.nbytes // 64) * 64  # keep 64-byte aligned
+    if not arrays:
+        return None, dict(values)
+
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    shared = dict(values)
+    for iri, (offset, magnitude) in arrays.items():
+        np.ndarray(
+            magnitude.shape,
+            dtype=magnitude.dtype,
+            buffer=shm.buf,
+            offset=offset,
+        )[...] = magnitude
+        value = values[iri]
+        shared[iri] = _SharedArray(
+            name=shm.name,
+            offset=offset,
+            shape=magnitude.shape,
+            dtype=magnitude.dtype.str,
+            unit=str(value.units) if isinstance(value, Quantity) else None,
+        )
+    return shm, shared
+
+
+def _attach(array: _SharedArray, quantity: "type[Quantity]") -> "Any":
+    """Return a read-only view of an array in shared memory."""
+    shm = _attached.get(array.name)
+    if shm is None:
+        # Blocks of earlier calls are closed once no views are left
+        for name in list(_attached):
+            try:
+                _attached[name].close()
+            except BufferError:
+                continue
+            del _attached[name]
+        shm = shared_memory.SharedMemory(name=array.name)
+        _attached[array.name] = shm
+
+    value = np.ndarray(
+        array.shape, dtype=array.dtype, buffer=shm.buf, offset=array.offset
+    )
+    value.flags.writeable = False
+    return quantity(value, array.unit) if array.unit else value
@@ -5,7 +5,9 @@ from typing import TYPE_CHECKING
 import pytest
 
 if TYPE_CHECKING:
+    from collections.abc import Generator
     from pathlib import Path
+    from types import SimpleNamespace as SPARQLServer
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -35,3 +37,69 @@ def entities_path(repo_dir: "Path") -> "Path":
     """Absolute path to the entities directory filled with test DLite
     entities."""
     return repo_dir / "tests" / "entities"
+
+
+@pytest.fixture
+def sparql_server() -> "Generator[SPARQLServer, None, None]":
+    """A local stand-in SPARQL server answering queries with rdflib.
+
+    Add triples to the named graphs of `sparql_server.dataset` and find
+    the queries received by the server in `sparql_server.queries` and the
+    addresses of the clients that connected in `sparql_server.clients`.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from types import SimpleNamespace
+    from urllib.parse import parse_qs, urlparse
+
+    import rdflib
+
+    server_state = SimpleNamespace(
+        dataset=rdflib.Dataset(), queries=[], clients=[]
+    )
+
+    class Handler(BaseHTTPRequestHandler):
+        """Handle SPARQL protocol GET and POST requests."""
+
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            """Record the address of a new connection."""
+            super().setup()
+            server_state.clients.append(self.client_address)
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """Answer a query passed in the URL."""
+            self._answer(parse_qs(urlparse(self.path).query))
+
+        def do_POST(self) -> None:  # pylint: disable=invalid-name
+            """Answer a query passed as url-encoded form data."""
+            length = int(self.headers.get("Content-Length", 0))
+            self._answer(parse_qs(self.rfile.read(length).decode()))
+
+        def _answer(self, params: "dict[str, list[str]]") -> None:
+            query = params["query"][0]
+            server_state.queries.append(query)
+            result = server_state.dataset.query(query)
+            if result.type == "CONSTRUCT":
+                body = result.serialize(format="nt")
+                content_type = "application/n-triples"
+            else:
+                body = result.serialize(format="json")
+                content_type = "application/sparql-results+json"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            """Do not log requests."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server_state.url = f"http://127.0.0.1:{server.server_port}/sparql"
+    yield server_state
+    server.shutdown()
+    server.server_close()
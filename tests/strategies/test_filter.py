@@ -0,0 +1,93 @@
+"""Tests the DLite filter strategy."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import dlite
+
+
+def _forces_collection(entities_path: "Path") -> "dlite.Collection":
+    """Return a stored collection with three Forces instances, an Energy
+    instance, a relation between two of the instances and a mapping."""
+    import dlite
+    import numpy as np
+    from tripper import EMMO, MAP
+
+    from oteapi_dlite.utils import update_collection
+
+    dlite.storage_path.append(entities_path)
+    Forces = dlite.get_instance("http://onto-ns.com/meta/0.1/Forces")
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+
+    coll = dlite.Collection()
+    for n in range(3):
+        forces = Forces(dimensions={"natoms": 1000, "ncoords": 3})
+        forces.forces = np.arange(3000.0).reshape(1000, 3) - 1500 * n
+        coll.add(f"forces{n}", forces)
+    coll.add("energy", Energy())
+    coll.add_relation("forces1", "derivedFrom", "forces0")
+    coll.add_relation(
+        "http://onto-ns.com/meta/0.1/Forces#forces", MAP.mapsTo, EMMO.Force
+    )
+    update_collection(coll)
+    return coll
+
+
+def test_filter_rows(entities_path: "Path") -> None:
+    """Test selecting rows of the instances in a collection."""
+    import numpy as np
+    from tripper import EMMO, MAP
+
+    from oteapi_dlite.strategies.filter import (
+        DLiteFilterConfig,
+        DLiteFilterStrategy,
+    )
+    from oteapi_dlite.utils import get_collection
+
+    coll = _forces_collection(entities_path)
+    config = DLiteFilterConfig(
+        filterType="dlite/filter",
+        query="forces[0] >= 0",
+        limit=600,
+        configuration={"collection_id": coll.uuid},
+    )
+    session = DLiteFilterStrategy(config).get()
+    assert session.collection_id != coll.uuid
+    new = get_collection(collection_id=session.collection_id)
+    assert list(new.get_labels()) == ["forces0", "forces1", "forces2"]
+    assert new["forces0"].dimensions["natoms"] == 600
+    assert new["forces1"].dimensions["natoms"] == 500
+    assert new["forces2"].dimensions["natoms"] == 0
+    assert np.all(new["forces1"].forces[:, 0] >= 0)
+    assert (
+        "http://onto-ns.com/meta/0.1/Forces#forces",
+        MAP.mapsTo,
+        EMMO.Force,
+    ) in set(new.get_relations())
+
+
+def test_filter_instances(entities_path: "Path") -> None:
+    """Test selecting instances of a collection."""
+    from oteapi_dlite.strategies.filter import (
+        DLiteFilterConfig,
+        DLiteFilterStrategy,
+    )
+    from oteapi_dlite.utils import get_collection
+
+    coll = _forces_collection(entities_path)
+    config = DLiteFilterConfig(
+        filterType="dlite/filter",
+        configuration={
+            "collection_id": coll.uuid,
+            "datamodel": "http://onto-ns.com/meta/0.1/Forces",
+            "relation": [None, "derivedFrom", None],
+            "keep_relations": False,
+        },
+    )
+    session = DLiteFilterStrategy(config).get()
+    new = get_collection(collection_id=session.collection_id)
+    assert list(new.get_labels()) == ["forces0", "forces1"]
+    assert new["forces1"].uuid == coll["forces1"].uuid
+    assert new.nrelations == 6
@@ -0,0 +1,86 @@
+"""Tests batch mode of the generate strategy."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _image_collection():
+    """Return a collection with three images and an energy."""
+    import dlite
+
+    from oteapi_dlite.utils import get_meta
+
+    coll = dlite.Collection()
+    Image = get_meta("http://onto-ns.com/meta/1.0/Image")
+    for n in range(3):
+        image = Image([1, n + 1, 1])
+        coll.add(f"image{n}", image)
+    Energy = get_meta("http://onto-ns.com/meta/0.1/Energy")
+    coll.add("energy", Energy())
+    return coll
+
+
+def test_generate_label_pattern(
+    tmp_path: "Path", entities_path: "Path"
+) -> None:
+    """Test generating all instances matching a label pattern."""
+    import dlite
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+
+    dlite.storage_path.append(entities_path)
+    coll = _image_collection()
+    config = DLiteGenerateConfig(
+        functionType="application/vnd.dlite-generate",
+        configuration={
+            "label_pattern": "image*",
+            "driver": "json",
+            "location": str(tmp_path / "images.json"),
+            "options": "mode=w",
+            "collection_id": coll.uuid,
+        },
+    )
+    DLiteGenerateStrategy(config).get()
+
+    with dlite.Storage("json", tmp_path / "images.json", "mode=r") as s:
+        uuids = set(s.get_uuids())
+    assert uuids == {coll[f"image{n}"].uuid for n in range(3)}
+
+
+def test_generate_datamodel_batch(entities_path: "Path") -> None:
+    """Test generating instances of a datamodel to the datacache."""
+    import json
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+
+    dlite.storage_path.append(entities_path)
+    coll = _image_collection()
+    config = DLiteGenerateConfig(
+        functionType="application/vnd.dlite-generate",
+        configuration={
+            "datamodel": "http://onto-ns.com/meta/1.0/Image",
+            "batch": True,
+            "max_instances": 2,
+            "driver": "json",
+            "collection_id": coll.uuid,
+            "datacache_config": {"accessKey": "image-batch"},
+        },
+    )
+    session = DLiteGenerateStrategy(config).get()
+
+    keys = ["image-batch-0", "image-batch-1"]
+    assert session.cache_keys == keys
+    cache = DataCache()
+    uuids = {next(iter(json.loads(cache.get(key)))) for key in keys}
+    assert uuids == {coll["image0"].uuid, coll["image1"].uuid}
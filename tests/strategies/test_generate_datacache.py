@@ -0,0 +1,87 @@
+"""Tests generate strategy writing to the datacache."""
+
+
+def test_generate_to_datacache() -> None:
+    """Test that instances are serialised to the datacache in memory."""
+    import json
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+    from oteapi_dlite.utils import get_meta
+
+    coll = dlite.Collection()
+    Image = get_meta("http://onto-ns.com/meta/1.0/Image")
+    image = Image([2, 2, 1])
+    image.data = [[[1], [2]], [[3], [4]]]
+    coll.add("image", image)
+
+    config = DLiteGenerateConfig(
+        functionType="application/vnd.dlite-generate",
+        configuration={
+            "label": "image",
+            "driver": "json",
+            "collection_id": coll.uuid,
+            "datacache_config": {"accessKey": "generated-image"},
+        },
+    )
+    session = DLiteGenerateStrategy(config).get()
+
+    assert session.cache_keys == ["generated-image"]
+    data = DataCache().get("generated-image")
+    assert json.loads(data) == json.loads(image.asjson())
+
+
+def test_generate_to_datacache_without_key() -> None:
+    """Test that instances are not saved under a fixed key by default."""
+    import json
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+    from oteapi_dlite.utils import get_meta
+
+    coll = dlite.Collection()
+    Image = get_meta("http://onto-ns.com/meta/1.0/Image")
+    for label in ("image0", "image1"):
+        coll.add(label, Image([1, 1, 1]))
+
+    keys = []
+    for label in ("image0", "image1"):
+        for chunk_size in (None, 64):
+            config = DLiteGenerateConfig(
+                functionType="application/vnd.dlite-generate",
+                configuration={
+                    "label": label,
+                    "driver": "json",
+                    "collection_id": coll.uuid,
+                    "chunk_size": chunk_size,
+                },
+            )
+            (key,) = DLiteGenerateStrategy(config).get().cache_keys
+            assert coll[label].uuid in json.loads(DataCache().get(key))
+            keys.append(key)
+    assert len(set(keys)) == len(keys)
+
+
+def test_serialise_collection() -> None:
+    """Test serialising a collection too large for `asjson()`."""
+    import json
+
+    import dlite
+
+    from oteapi_dlite.strategies.generate import serialise
+
+    coll = dlite.Collection()
+    for i in range(100):
+        coll.add_relation(f"s{i}", "p", f"o{i}")
+    data = json.loads(serialise(coll, "json"))
+    assert len(data[coll.uuid]["properties"]["relations"]) == 100
@@ -0,0 +1,79 @@
+"""Tests parallel evaluation of property mappings in the generate strategy."""
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import dlite
+
+
+def _mapped_collection(entities_path: "Path") -> "dlite.Collection":
+    """Return a collection with Energy and Forces instances mapped to the
+    properties of Result."""
+    import dlite
+    from tripper import EMMO, MAP, Triplestore
+
+    from oteapi_dlite.utils import get_meta
+
+    dlite.storage_path.append(entities_path)
+    coll = dlite.Collection()
+    energy = get_meta("http://onto-ns.com/meta/0.1/Energy")()
+    energy.energy = 0.2  # eV
+    forces = get_meta("http://onto-ns.com/meta/0.1/Forces")([2, 3])
+    forces.forces = [[0.1, 0.0, -3.2], [0.0, -2.3, 1.2]]  # eV/Å
+    coll.add("energy", energy)
+    coll.add("forces", forces)
+
+    ts = Triplestore(backend="collection", collection=coll)
+    ENERGY = ts.bind("e", "http://onto-ns.com/meta/0.1/Energy#")
+    FORCES = ts.bind("f", "http://onto-ns.com/meta/0.1/Forces#")
+    RESULT = ts.bind("r", "http://onto-ns.com/meta/0.1/Result#")
+    ts.add_triples(
+        [
+            (ENERGY.energy, MAP.mapsTo, EMMO.PotentialEnergy),
+            (FORCES.forces, MAP.mapsTo, EMMO.Force),
+            (RESULT.potential_energy, MAP.mapsTo, EMMO.PotentialEnergy),
+            (RESULT.forces, MAP.mapsTo, EMMO.Force),
+        ]
+    )
+    return coll
+
+
+@pytest.mark.parametrize("parallel", ["thread", "process"])
+def test_generate_parallel(
+    parallel: str, tmp_path: "Path", entities_path: "Path"
+) -> None:
+    """Test generating an instance from mappings evaluated in a pool."""
+    import dlite
+    import numpy as np
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+
+    coll = _mapped_collection(entities_path)
+    config = DLiteGenerateConfig(
+        functionType="application/vnd.dlite-generate",
+        configuration={
+            "datamodel": "http://onto-ns.com/meta/0.1/Result",
+            "parallel": parallel,
+            "max_workers": 2,
+            "driver": "json",
+            "location": str(tmp_path / "result.json"),
+            "options": "mode=w",
+            "collection_id": coll.uuid,
+        },
+    )
+    DLiteGenerateStrategy(config).get()
+
+    with dlite.Storage("json", tmp_path / "result.json", "mode=r") as s:
+        (uuid,) = s.get_uuids()
+        result = s.load(id=uuid)
+    assert np.isclose(result.potential_energy, 0.2 * 1.602176634e-19)
+    assert np.allclose(
+        result.forces, coll.get("forces").forces * 1.602176634e-9
+    )
@@ -75,3 +75,32 @@ def test_mapping_with_prefixes() -> None:
     assert len(list(coll.get_relations())) == len(relations)
     assert (FORCES.forces, MAP.mapsTo, EMMO.Force) in relations
     assert (ENERGY.energy, MAP.mapsTo, EMMO.PotentialEnergy) in relations
+
+
+def test_populate_triplestore_batches() -> None:
+    """Test adding a generator of prefixed triples in batches."""
+    import dlite
+    from tripper import MAP, Triplestore
+
+    from oteapi_dlite.strategies.mapping import populate_triplestore
+
+    coll = dlite.Collection()
+    ts = Triplestore(backend="collection", collection=coll)
+    ts.bind("ex", "http://example.com/onto#")
+    ts.bind("map", str(MAP))
+
+    batches = []
+    add_triples = ts.add_triples
+    ts.add_triples = lambda batch: batches.append(batch) or add_triples(batch)
+
+    triples = ((f"ex:Item{n}", "map:mapsTo", "ex:Concept") for n in range(25))
+    assert populate_triplestore(ts, triples, batch_size=10) == 25
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    relations = set(coll.get_relations())
+    assert len(relations) == 25
+    assert (
+        "http://example.com/onto#Item24",
+        MAP.mapsTo,
+        "http://example.com/onto#Concept",
+    ) in relations
@@ -0,0 +1,168 @@
+"""Tests mapping strategy with a knowledge graph from a SPARQL endpoint."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import SimpleNamespace as SPARQLServer
+
+GRAPH_URI = "http://example.com/graph"
+EX = "http://example.com/onto#"
+
+
+def _populate(sparql_server: "SPARQLServer") -> None:
+    """Add a small class hierarchy to the stand-in SPARQL server."""
+    from rdflib import Literal, URIRef
+    from rdflib.namespace import RDFS
+
+    graph = sparql_server.dataset.graph(URIRef(GRAPH_URI))
+    for name, parent in [("A", "Thing"), ("B", "Thing"), ("C", "A")]:
+        graph.add((URIRef(EX + name), RDFS.subClassOf, URIRef(EX + parent)))
+        graph.add((URIRef(EX + name), RDFS.label, Literal(name)))
+
+
+def _mapping_config(
+    sparql_server: "SPARQLServer", collection_id: str, **kwargs
+):
+    """Return a mapping config fetching the graph from `sparql_server`."""
+    from tripper import MAP
+
+    from oteapi_dlite.strategies.mapping import DLiteMappingConfig
+
+    return DLiteMappingConfig(
+        mappingType="mappings",
+        triples=[
+            ("http://onto-ns.com/meta/0.1/Item#x", MAP.mapsTo, EX + "B"),
+            ("http://onto-ns.com/meta/0.1/Item#y", MAP.mapsTo, EX + "C"),
+        ],
+        configuration={
+            "collection_id": collection_id,
+            "sparql_endpoint": sparql_server.url,
+            "graph_uri": GRAPH_URI,
+            **kwargs,
+        },
+    )
+
+
+def test_mapping_sparql(sparql_server: "SPARQLServer") -> None:
+    """Test adding the knowledge graph fragment to the collection."""
+    import dlite
+    from rdflib.namespace import RDFS
+
+    from oteapi_dlite.strategies.mapping import DLiteMappingStrategy
+    from oteapi_dlite.utils import get_collection
+
+    _populate(sparql_server)
+    coll = dlite.Collection()
+    config = _mapping_config(sparql_server, coll.uuid)
+    DLiteMappingStrategy(config).initialize()
+
+    coll = get_collection(collection_id=coll.uuid)
+    relations = set(coll.get_relations())
+    assert (EX + "C", str(RDFS.subClassOf), EX + "A") in relations
+    assert (EX + "A", str(RDFS.subClassOf), EX + "Thing") in relations
+
+
+def test_mapping_sparql_cache(sparql_server: "SPARQLServer") -> None:
+    """Test caching the knowledge graph fragment in the datacache."""
+    import dlite
+    from oteapi.datacache import DataCache
+    from rdflib import URIRef
+    from rdflib.namespace import RDFS
+    from SPARQLWrapper import SPARQLWrapper
+
+    from oteapi_dlite.strategies.mapping import (
+        DLiteMappingStrategy,
+        fetch_graph_fragment,
+        graph_cache_key,
+    )
+
+    _populate(sparql_server)
+    class_names = [EX + "B", EX + "C"]
+    key = graph_cache_key(sparql_server.url, class_names, GRAPH_URI)
+    if key in DataCache():
+        del DataCache()[key]
+
+    # The first strategy fetches the graph, the second uses the cache
+    coll = dlite.Collection()
+    for _ in range(2):
+        DLiteMappingStrategy(
+            _mapping_config(sparql_server, coll.uuid, graph_cache_ttl=3600)
+        ).initialize()
+    assert len(sparql_server.queries) == 3
+    assert key in DataCache()
+
+    # Revalidation of an expired, unchanged fragment requires one query
+    sparql = SPARQLWrapper(sparql_server.url)
+    graph = fetch_graph_fragment(sparql, class_names, GRAPH_URI, ttl=0)
+    assert len(sparql_server.queries) == 4
+    assert (URIRef(EX + "C"), RDFS.subClassOf, URIRef(EX + "A")) in graph
+
+    # A changed graph is fetched again
+    sparql_server.dataset.graph(URIRef(GRAPH_URI)).add(
+        (URIRef(EX + "D"), RDFS.subClassOf, URIRef(EX + "B"))
+    )
+    graph = fetch_graph_fragment(sparql, class_names, GRAPH_URI, ttl=0)
+    assert len(sparql_server.queries) == 7
+    assert (URIRef(EX + "D"), RDFS.subClassOf, URIRef(EX + "B")) in graph
+
+    # So is a graph changed without changing its size
+    kg = sparql_server.dataset.graph(URIRef(GRAPH_URI))
+    kg.remove((URIRef(EX + "D"), RDFS.subClassOf, URIRef(EX + "B")))
+    kg.add((URIRef(EX + "E"), RDFS.subClassOf, URIRef(EX + "B")))
+    graph = fetch_graph_fragment(sparql, class_names, GRAPH_URI, ttl=0)
+    assert len(sparql_server.queries) == 10
+    assert (URIRef(EX + "E"), RDFS.subClassOf, URIRef(EX + "B")) in graph
+    assert (URIRef(EX + "D"), RDFS.subClassOf, URIRef(EX + "B")) not in graph
+
+    # Fragments are cached per user
+    assert (
+        graph_cache_key(
+            sparql_server.url, class_names, GRAPH_URI, username="user"
+        )
+        != key
+    )
+
+
+def test_fetch_graph_construct(sparql_server: "SPARQLServer") -> None:
+    """Test fetching the graph fragment with a single CONSTRUCT query."""
+    from SPARQLWrapper import SPARQLWrapper
+
+    from oteapi_dlite.strategies.mapping import fetch_graph_fragment
+
+    _populate(sparql_server)
+    sparql = SPARQLWrapper(sparql_server.url)
+    class_names = [EX + "B", EX + "C"]
+    selected = fetch_graph_fragment(sparql, class_names, GRAPH_URI)
+    nqueries = len(sparql_server.queries)
+    constructed = fetch_graph_fragment(
+        sparql, class_names, GRAPH_URI, query="construct"
+    )
+    assert len(sparql_server.queries) == nqueries + 1
+    assert {tuple(map(str, t)) for t in constructed} == {
+        tuple(map(str, t)) for t in selected
+    }
+
+    # The lowest common parent is chosen
+    graph = fetch_graph_fragment(
+        sparql, [EX + "C", EX + "A"], GRAPH_URI, query="construct"
+    )
+    assert {str(s) for s in graph.subjects()} == {EX + "A", EX + "C"}
+
+
+def test_fetch_and_populate_graph_paged(sparql_server: "SPARQLServer") -> None:
+    """Test fetching the graph fragment in pages."""
+    from SPARQLWrapper import SPARQLWrapper
+
+    from oteapi_dlite.strategies.mapping import fetch_and_populate_graph
+
+    _populate(sparql_server)
+    sparql = SPARQLWrapper(sparql_server.url)
+    graph = fetch_and_populate_graph(sparql, GRAPH_URI, EX + "Thing")
+    assert len(graph) == 6
+
+    paged = fetch_and_populate_graph(
+        sparql, GRAPH_URI, EX + "Thing", page_size=4
+    )
+    assert set(paged) == set(graph)
+    assert len(sparql_server.queries) == 3
+    assert "OFFSET 4" in sparql_server.queries[-1]
@@ -0,0 +1,78 @@
+"""Test parse_image Strategy"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_parse_image(
+    tmp_path: "Path", monkeypatch: "pytest.MonkeyPatch"
+) -> None:
+    """Test parsing images with cropping, downscaling and tiles."""
+    import dlite
+    import numpy as np
+    from PIL import Image, TiffImagePlugin
+
+    from oteapi_dlite.strategies.parse_image import (
+        DLiteImageStrategy,
+        DLiteImageStrategyConfig,
+    )
+
+    pixels = (np.arange(120 * 160 * 3) % 251).astype(np.uint8)
+    pixels = pixels.reshape(120, 160, 3)
+    # Write the TIFF image in many strips
+    monkeypatch.setattr(TiffImagePlugin, "WRITE_LIBTIFF", True)
+    Image.fromarray(pixels).save(
+        tmp_path / "image.tiff", compression="raw", strip_size=1024
+    )
+    Image.fromarray(pixels).save(tmp_path / "image.jpg")
+    assert len(Image.open(tmp_path / "image.tiff").tile) > 1
+
+    def parse(filename: str, **configuration) -> dlite.Instance:
+        coll = dlite.Collection()
+        config = DLiteImageStrategyConfig.model_validate(
+            {
+                "parserType": "image/vnd.dlite-image",
+                "configuration": {
+                    "collection_id": coll.uuid,
+                    "downloadUrl": (tmp_path / filename).as_uri(),
+                    **configuration,
+                },
+            }
+        )
+        update = DLiteImageStrategy(parse_config=config).get()
+        return coll[update.label]
+
+    inst = parse("image.tiff")
+    assert inst.meta.uri == "http://onto-ns.com/meta/1.0/Image"
+    assert np.array_equal(inst.data, pixels)
+
+    inst = parse("image.tiff", crop=(10, 15, 100, 77))
+    assert inst.dimensions == {"nheight": 62, "nwidth": 90, "nbands": 3}
+    assert np.array_equal(inst.data, pixels[15:77, 10:100])
+
+    # Uncompressed strips are decoded without loading the TIFF image
+    with monkeypatch.context() as m:
+        m.setattr(TiffImagePlugin.TiffImageFile, "load", None)
+        inst = parse("image.tiff", crop=(10, 15, 100, 77))
+    assert np.array_equal(inst.data, pixels[15:77, 10:100])
+
+    # Compressed strips are decoded as a whole
+    Image.fromarray(pixels).save(
+        tmp_path / "lzw.tiff", compression="tiff_lzw", strip_size=1024
+    )
+    inst = parse("lzw.tiff", crop=(10, 15, 100, 77))
+    assert np.array_equal(inst.data, pixels[15:77, 10:100])
+
+    inst = parse("image.tiff", crop=(10, 15, 100, 77), image_mode="L")
+    gray = np.asarray(Image.fromarray(pixels).convert("L"))
+    assert np.array_equal(inst.data[:, :, 0], gray[15:77, 10:100])
+
+    inst = parse("image.jpg", max_size=(40, 40))
+    assert inst.dimensions == {"nheight": 30, "nwidth": 40, "nbands": 3}
+
+    inst = parse("image.jpg", crop=(0, 0, 80, 120), max_size=(40, 40))
+    assert inst.dimensions == {"nheight": 40, "nwidth": 27, "nbands": 3}
@@ -40,3 +40,152 @@ def test_parse_json(static_files: "Path") -> None:
     assert inst.theta0 == 50
     assert inst.k == 0.02
     assert inst.d == 0.0005
+
+
+def test_parse_json_async(static_files: "Path") -> None:
+    """Test running several json parse strategies concurrently."""
+    import asyncio
+
+    import dlite
+
+    from oteapi_dlite.strategies.parse_json import (
+        DLiteJsonStrategy,
+        DLiteJsonStrategyConfig,
+    )
+
+    sample_file = static_files / "test_parse_json.json"
+
+    colls = [dlite.Collection() for _ in range(4)]
+    parsers = [
+        DLiteJsonStrategy(
+            parse_config=DLiteJsonStrategyConfig.model_validate(
+                {
+                    "entity": "http://onto-ns.com/meta/0.4/HallPetch",
+                    "parserType": "json/vnd.dlite-json",
+                    "configuration": {
+                        "collection_id": coll.uuid,
+                        "downloadUrl": sample_file.as_uri(),
+                        "mediaType": "application/json",
+                        "resourceType": "resource/url",
+                    },
+                }
+            )
+        )
+        for coll in colls
+    ]
+
+    async def main():
+        await asyncio.gather(*(parser.ainitialize() for parser in parsers))
+        return await asyncio.gather(*(parser.aget() for parser in parsers))
+
+    updates = asyncio.run(main())
+
+    for coll, update in zip(colls, updates):
+        assert update.collection_id == coll.uuid
+        assert coll.get("json-data").theta0 == 50
+
+
+def test_parse_json_stream(tmp_path: "Path", entities_path: "Path") -> None:
+    """Test parsing a JSON document incrementally."""
+    import json
+
+    import dlite
+    import numpy as np
+    import pytest
+
+    from oteapi_dlite.strategies.parse_json import (
+        DLiteJsonStrategy,
+        DLiteJsonStrategyConfig,
+    )
+
+    dlite.storage_path.append(entities_path)
+    forces = np.arange(3000.0).reshape(1000, 3) / 7
+    sample_file = tmp_path / "forces.json"
+    sample_file.write_text(
+        json.dumps(
+            {
+                "comment": {"text": 'unused "forces": [[0, 0, 0]]'},
+                "forces": forces.tolist(),
+                "other": list(range(1000)),
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    coll = dlite.Collection()
+    config = DLiteJsonStrategyConfig.model_validate(
+        {
+            "entity": "http://onto-ns.com/meta/0.1/Forces",
+            "parserType": "json/vnd.dlite-json",
+            "configuration": {
+                "collection_id": coll.uuid,
+                "downloadUrl": sample_file.as_uri(),
+                "mediaType": "application/json",
+                "chunk_size": 100,
+            },
+        }
+    )
+    parser = DLiteJsonStrategy(parse_config=config)
+    parser.initialize()
+    parser.get()
+
+    inst = coll.get("json-data")
+    assert inst.dimensions == {"natoms": 1000, "ncoords": 3}
+    assert np.array_equal(inst.forces, forces)
+
+    sample_file.write_text('{"forces": [[1, 2, 3], [4, 5]]}')
+    with pytest.raises(RuntimeError, match="Failed to parse JSON data"):
+        parser.get()
+
+
+def test_parse_json_records(tmp_path: "Path", entities_path: "Path") -> None:
+    """Test parsing a JSON array of records."""
+    import json
+
+    import dlite
+    import numpy as np
+
+    from oteapi_dlite.strategies.parse_json import (
+        DLiteJsonStrategy,
+        DLiteJsonStrategyConfig,
+    )
+
+    dlite.storage_path.append(entities_path)
+    sample_file = tmp_path / "records.json"
+
+    def parse(records: list, mode: str):
+        sample_file.write_text(json.dumps(records), encoding="utf-8")
+        coll = dlite.Collection()
+        config = DLiteJsonStrategyConfig.model_validate(
+            {
+                "entity": "http://onto-ns.com/meta/0.1/Forces",
+                "parserType": "json/vnd.dlite-json",
+                "configuration": {
+                    "collection_id": coll.uuid,
+                    "downloadUrl": sample_file.as_uri(),
+                    "mediaType": "application/json",
+                    "label": "forces",
+                    "records": mode,
+                },
+            }
+        )
+        return coll, DLiteJsonStrategy(parse_config=config).get()
+
+    # One instance per record, with a ragged record
+    records = [{"forces": [[n, 0, 0], [0, n, 0]], "step": n} for n in range(10)]
+    records.append({"forces": [[1, 2, 3]]})
+    coll, update = parse(records, "instances")
+    labels = [f"forces-{n}" for n in range(11)]
+    assert update.labels == labels
+    assert update.inst_uuids == [coll[label].uuid for label in labels]
+    assert coll["forces-3"].dimensions == {"natoms": 2, "ncoords": 3}
+    assert coll["forces-3"].forces.tolist() == [[3, 0, 0], [0, 3, 0]]
+    assert coll["forces-10"].dimensions == {"natoms": 1, "ncoords": 3}
+
+    # One instance with a row per record
+    records = [{"forces": [n, 2 * n, 3 * n]} for n in range(100)]
+    coll, update = parse(records, "columns")
+    inst = coll["forces"]
+    assert update.inst_uuid == inst.uuid
+    assert inst.dimensions == {"natoms": 100, "ncoords": 3}
+    assert np.array_equal(inst.forces[:, 2], 3 * np.arange(100))
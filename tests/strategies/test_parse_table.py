@@ -0,0 +1,109 @@
+"""Test parse_table Strategy"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import dlite
+
+
+def _parse(
+    entities_path: "Path", path: "Path", **configuration
+) -> "dlite.Instance":
+    """Parse the table in `path` into a salinity instance."""
+    import dlite
+
+    from oteapi_dlite.strategies.parse_table import (
+        DLiteTableStrategy,
+        DLiteTableStrategyConfig,
+    )
+
+    dlite.storage_path.append(entities_path)
+    coll = dlite.Collection()
+    config = DLiteTableStrategyConfig.model_validate(
+        {
+            "entity": (
+                "http://onto-ns.com/meta/oceanlab/1/ctd_salinity_munkholmen"
+            ),
+            "parserType": "table/vnd.dlite-table",
+            "configuration": {
+                "collection_id": coll.uuid,
+                "downloadUrl": path.as_uri(),
+                "columns": {"time": "time", "salt": "salinity"},
+                "chunk_rows": 4,
+                **configuration,
+            },
+        }
+    )
+    update = DLiteTableStrategy(parse_config=config).get()
+    return coll[update.label]
+
+
+def test_parse_table(tmp_path: "Path", entities_path: "Path") -> None:
+    """Test parsing CSV files and Excel workbooks in chunks."""
+    import numpy as np
+    import pytest
+    from openpyxl import Workbook
+
+    rows = [(f"2024-01-{n % 28 + 1:02}", 30 + n / 10, "x") for n in range(25)]
+    rows[7] = (rows[7][0], None, "x")
+
+    csv_file = tmp_path / "table.csv"
+    csv_file.write_text(
+        "time;salt;other\n"
+        + "".join(f"{t};{'' if s is None else s};{o}\n" for t, s, o in rows),
+        encoding="utf-8",
+    )
+    xlsx_file = tmp_path / "table.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "samples"
+    sheet.append(("time", "salt", "other"))
+    for n, row in enumerate(rows):
+        sheet.append(row)
+        if n == 10:
+            sheet.append((None, None, None))
+    workbook.save(xlsx_file)
+
+    for inst in (
+        _parse(entities_path, csv_file, delimiter=";"),
+        _parse(entities_path, xlsx_file, sheet="samples"),
+    ):
+        assert inst.dimensions == {"N": 25}
+        assert list(inst.time) == [t for t, _, _ in rows]
+        assert np.isnan(inst.salinity[7])
+        assert np.allclose(
+            np.delete(inst.salinity, 7),
+            [s for _, s, _ in rows if s is not None],
+        )
+
+    with pytest.raises(ValueError, match="not found"):
+        _parse(
+            entities_path,
+            csv_file,
+            delimiter=";",
+            columns={"salinity": "salinity"},
+        )
+
+
+def test_parse_table_default_columns(
+    tmp_path: "Path", entities_path: "Path"
+) -> None:
+    """Test that by default every property is read from a column."""
+    import numpy as np
+    import pytest
+
+    default_file = tmp_path / "default.csv"
+    default_file.write_text("salinity,time\n1.5,t1\n2.5,t2\n")
+    inst = _parse(entities_path, default_file, columns=None)
+    assert inst.dimensions == {"N": 2}
+    assert list(inst.time) == ["t1", "t2"]
+    assert np.allclose(inst.salinity, [1.5, 2.5])
+
+    default_file.write_text("salinity,other\n1.5,x\n")
+    with pytest.raises(ValueError, match=r"columns \['time'\] not found"):
+        _parse(entities_path, default_file, columns=None)
+
+    with pytest.raises(ValueError, match="has no properties"):
+        _parse(entities_path, default_file, columns={"salinity": "pressure"})
@@ -0,0 +1,60 @@
+"""Test the asyncio support."""
+
+
+def test_run_blocking_bounded() -> None:
+    """Test that run_blocking() limits the number of concurrent calls."""
+    import asyncio
+    import threading
+    import time
+
+    from oteapi_dlite.utils import aio
+
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work(n: int) -> int:
+        with lock:
+            running.append(n)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(n)
+        return n * n
+
+    async def main() -> list[int]:
+        return await asyncio.gather(
+            *(aio.run_blocking(work, n) for n in range(12))
+        )
+
+    aio.shutdown_executor()
+    max_workers = aio.MAX_WORKERS
+    aio.MAX_WORKERS = 3
+    try:
+        assert asyncio.run(main()) == [n * n for n in range(12)]
+    finally:
+        aio.shutdown_executor()
+        aio.MAX_WORKERS = max_workers
+    assert max(peak) == 3
+
+
+def test_run_blocking_context() -> None:
+    """Test that context variables and exceptions are propagated."""
+    import asyncio
+    import contextvars
+
+    import pytest
+
+    from oteapi_dlite.utils.aio import run_blocking
+
+    var = contextvars.ContextVar("var", default="unset")
+
+    def fail() -> None:
+        raise ValueError(var.get())
+
+    async def main() -> None:
+        var.set("task")
+        await run_blocking(fail)
+
+    with pytest.raises(ValueError, match="task"):
+        asyncio.run(main())
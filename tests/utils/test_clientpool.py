@@ -0,0 +1,171 @@
+"""Tests oteapi-dlite.utils.clientpool."""
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from types import SimpleNamespace as SPARQLServer
+
+
+def test_sparql_client(
+    sparql_server: "SPARQLServer", monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test checking out pooled SPARQL clients."""
+    from oteapi_dlite.utils import clientpool
+    from oteapi_dlite.utils.clientpool import clear_client_pool, sparql_client
+
+    clear_client_pool()
+    with sparql_client(sparql_server.url, "user", "secret") as sparql:
+        with sparql_client(sparql_server.url, "user", "secret") as other:
+            assert other is not sparql
+    with sparql_client(sparql_server.url, "user", "secret") as reused:
+        assert reused is sparql
+    with sparql_client(sparql_server.url, "user", "other") as new:
+        assert new not in (sparql, other)
+    assert not sparql_server.queries
+
+    # Idle clients are health checked before they are reused
+    monkeypatch.setattr(clientpool, "HEALTH_CHECK_INTERVAL", -1.0)
+    with sparql_client(sparql_server.url, "user", "secret") as checked:
+        assert checked is reused
+    assert sparql_server.queries == [clientpool.HEALTH_CHECK_QUERY]
+
+    # Clients of endpoints that fail the health check are replaced
+    with sparql_client("http://127.0.0.1:1/sparql") as unreachable:
+        pass
+    with sparql_client("http://127.0.0.1:1/sparql") as replaced:
+        assert replaced is not unreachable
+
+    # Clients used in a failing block are discarded
+    with pytest.raises(RuntimeError):
+        with sparql_client(sparql_server.url) as failed:
+            raise RuntimeError("failed")
+    with sparql_client(sparql_server.url) as replaced:
+        assert replaced is not failed
+
+    # Idle clients are evicted
+    monkeypatch.setattr(clientpool, "IDLE_TIMEOUT", -1.0)
+    with sparql_client(sparql_server.url, "user", "secret") as evicted:
+        assert evicted is not checked
+    clear_client_pool()
+
+
+def test_sparql_client_keepalive(sparql_server: "SPARQLServer") -> None:
+    """Test that pooled SPARQL clients reuse their HTTP connection."""
+    import socket
+    import urllib.error
+    import urllib.request
+
+    from SPARQLWrapper import JSON
+
+    from oteapi_dlite.utils.clientpool import clear_client_pool, sparql_client
+
+    def ask(sparql) -> bool:
+        sparql.setReturnFormat(JSON)
+        sparql.setQuery("ASK {}")
+        return sparql.query().convert()["boolean"]
+
+    clear_client_pool()
+    with sparql_client(sparql_server.url) as sparql:
+        assert ask(sparql)
+        assert ask(sparql)
+    with sparql_client(sparql_server.url) as reused:
+        assert reused is sparql
+        assert ask(reused)
+    assert len(sparql_server.queries) == 3
+    assert len(sparql_server.clients) == 1
+
+    # A connection closed by the server is replaced
+    handler = sparql._handler  # pylint: disable=protected-access
+    for (
+        conn,
+        _,
+    ) in handler._connections.values():  # pylint: disable=protected-access
+        conn.sock.shutdown(socket.SHUT_RDWR)
+    assert ask(sparql)
+    assert len(sparql_server.queries) == 4
+    assert len(sparql_server.clients) == 2
+
+    # So is a connection with an unread response
+    sparql.setQuery("ASK {}")
+    sparql.query()
+    assert ask(sparql)
+    assert len(sparql_server.queries) == 6
+    assert len(sparql_server.clients) == 3
+
+    # Requests that are not idempotent are not sent again
+    for (
+        conn,
+        _,
+    ) in handler._connections.values():  # pylint: disable=protected-access
+        conn.sock.shutdown(socket.SHUT_RDWR)
+    opener = urllib.request.build_opener(handler)
+    with pytest.raises(urllib.error.URLError):
+        opener.open(
+            urllib.request.Request(sparql_server.url, data=b"query=ASK+%7B%7D")
+        )
+    assert len(sparql_server.queries) == 6
+
+    # Clients close their connection when discarded
+    sparql.close()
+    assert not handler._connections  # pylint: disable=protected-access
+    clear_client_pool()
+
+
+def test_triplestore_client(sparql_server: "SPARQLServer") -> None:
+    """Test checking out pooled triplestores."""
+    from oteapi_dlite.utils.clientpool import (
+        clear_client_pool,
+        triplestore_client,
+    )
+
+    clear_client_pool()
+    with triplestore_client("sparqlwrapper", base_iri=sparql_server.url) as ts:
+        # Namespaces bound in a pipeline are reset for the next one
+        ts.bind("ex", "http://example.com/onto#")
+        ts.bind("owl", "http://example.com/owl#")
+    with triplestore_client(
+        "sparqlwrapper", base_iri=sparql_server.url
+    ) as reused:
+        assert reused is ts
+        assert "ex" not in reused.namespaces
+        assert str(reused.namespaces["owl"]) != "http://example.com/owl#"
+    clear_client_pool()
+
+
+def test_sparql_client_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that connections are only kept open with tested SPARQLWrapper
+    versions."""
+    from SPARQLWrapper import SPARQLWrapper
+
+    from oteapi_dlite.utils import clientpool
+    from oteapi_dlite.utils.clientpool import clear_client_pool, sparql_client
+
+    clear_client_pool()
+    with sparql_client("http://example.com/sparql") as sparql:
+        assert hasattr(sparql, "_handler")
+
+    clear_client_pool()
+    monkeypatch.setattr(clientpool, "KEEPALIVE_SPARQLWRAPPER_VERSIONS", ())
+    with sparql_client("http://example.com/sparql") as sparql:
+        assert sparql.__class__ is SPARQLWrapper
+    clear_client_pool()
+
+
+def test_retry() -> None:
+    """Test which requests are sent again over a new connection."""
+    import http.client
+    import urllib.request
+
+    from oteapi_dlite.utils.clientpool import _retry
+
+    get = urllib.request.Request("http://example.com/sparql")
+    post = urllib.request.Request("http://example.com/sparql", data=b"")
+    closed = http.client.RemoteDisconnected()
+    assert _retry(get, closed)
+    assert _retry(get, BrokenPipeError())
+    assert not _retry(get, TimeoutError())
+    assert not _retry(post, closed)
+    post.idempotent = True  # type: ignore[attr-defined]
+    assert _retry(post, closed)
@@ -6,6 +6,8 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from pathlib import Path
 
+    import pytest
+
 
 def test_instantiate_calcresults(entities_path: "Path") -> None:
     """Test utils.get_instance().
@@ -80,3 +82,180 @@ def test_instantiate_calcresults(entities_path: "Path") -> None:
             (0, 0, 3.36457e-09),  # Newton
         ],
     )
+
+
+def test_route_plan_cache(
+    entities_path: "Path", monkeypatch: "pytest.MonkeyPatch"
+) -> None:
+    """Test that get_instance() reuses mapping routes for new values."""
+    import dlite
+    import numpy as np
+    from tripper import EMMO, MAP, Triplestore
+
+    from oteapi_dlite.utils import utils
+    from oteapi_dlite.utils.utils import (
+        clear_route_plan_cache,
+        get_instance,
+        get_route_plan_info,
+    )
+
+    dlite.storage_path.append(str(entities_path / "*.json"))
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+    Forces = dlite.get_instance("http://onto-ns.com/meta/0.1/Forces")
+    Result = "http://onto-ns.com/meta/0.1/Result"
+
+    def collection(energy: float, extra: bool = False) -> dlite.Collection:
+        """Return a collection with mappings and the given energy."""
+        coll = dlite.Collection()
+        energy_inst = Energy()
+        energy_inst.energy = energy  # eV
+        forces_inst = Forces(dimensions={"natoms": 1, "ncoords": 3})
+        coll.add("energy", energy_inst)
+        coll.add("forces", forces_inst)
+        ts = Triplestore(backend="collection", collection=coll)
+        ts.add_triples(
+            [
+                (f"{Energy.uri}#energy", MAP.mapsTo, EMMO.PotentialEnergy),
+                (f"{Forces.uri}#forces", MAP.mapsTo, EMMO.Force),
+                (
+                    f"{Result}#potential_energy",
+                    MAP.mapsTo,
+                    EMMO.PotentialEnergy,
+                ),
+                (f"{Result}#forces", MAP.mapsTo, EMMO.Force),
+            ]
+        )
+        if extra:
+            ts.add(("http://example.com/meta/0.1/X#x", MAP.mapsTo, EMMO.Mass))
+        return coll
+
+    monkeypatch.setattr(utils, "hash", lambda value: 0, raising=False)
+    clear_route_plan_cache()
+    inst1 = get_instance(Result, collection(1.0))
+    inst2 = get_instance(Result, collection(2.0))
+    assert np.allclose(2 * inst1.potential_energy, inst2.potential_energy)
+
+    info = get_route_plan_info()
+    assert info.misses == 1
+    assert info.hits == 1
+    assert info.currsize == 1
+    assert info.planning_time > 0
+    assert info.execution_time > 0
+
+    # Plans for different mappings are not shared, even though all hashes
+    # computed by the utils module collide
+    get_instance(Result, collection(3.0, extra=True))
+    assert get_route_plan_info().misses == 2
+
+
+def test_get_instance_executor(
+    entities_path: "Path", monkeypatch: "pytest.MonkeyPatch"
+) -> None:
+    """Test evaluating property routes in thread and process pools."""
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    import dlite
+    import numpy as np
+    from tripper import EMMO, MAP, Triplestore
+
+    from oteapi_dlite.utils import get_instance, utils
+
+    dlite.storage_path.append(str(entities_path / "*.json"))
+    coll = dlite.Collection()
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+    Forces = dlite.get_instance("http://onto-ns.com/meta/0.1/Forces")
+    energy = Energy()
+    energy.energy = 2.1  # eV
+    forces = Forces(dimensions={"natoms": 2, "ncoords": 3})
+    forces.forces = [(0.0, 0.0, 2.1), (0.0, 0.0, -2.1)]  # eV/Å
+    coll.add("energy", energy)
+    coll.add("forces", forces)
+
+    ts = Triplestore(backend="collection", collection=coll)
+    FORCES = ts.bind("forces", "http://onto-ns.com/meta/0.1/Forces#")
+    ENERGY = ts.bind("energy", "http://onto-ns.com/meta/0.1/Energy#")
+    CALC = ts.bind("calc", "http://onto-ns.com/meta/0.1/Result#")
+    ts.add_triples(
+        [
+            (FORCES.forces, MAP.mapsTo, EMMO.Force),
+            (ENERGY.energy, MAP.mapsTo, EMMO.PotentialEnergy),
+            (CALC.forces, MAP.mapsTo, EMMO.Force),
+            (CALC.potential_energy, MAP.mapsTo, EMMO.PotentialEnergy),
+        ]
+    )
+
+    expected = get_instance("http://onto-ns.com/meta/0.1/Result", coll)
+
+    # Pass all arrays to the worker processes in shared memory
+    monkeypatch.setattr(utils, "SHARED_MEMORY_THRESHOLD", 0)
+    for executor_class in ThreadPoolExecutor, ProcessPoolExecutor:
+        with executor_class(max_workers=2) as executor:
+            for _ in range(2):
+                inst = get_instance(
+                    "http://onto-ns.com/meta/0.1/Result",
+                    coll,
+                    executor=executor,
+                )
+                assert inst.dimensions == expected.dimensions
+                assert np.allclose(
+                    inst.potential_energy, expected.potential_energy
+                )
+                assert np.allclose(inst.forces, expected.forces)
+
+
+def test_get_instance_lazy(
+    entities_path: "Path", monkeypatch: "pytest.MonkeyPatch"
+) -> None:
+    """Test that only instances with mapped properties are loaded."""
+    import dlite
+    import numpy as np
+    from tripper import EMMO, MAP, Triplestore
+
+    from oteapi_dlite.utils import get_instance
+
+    dlite.storage_path.append(str(entities_path / "*.json"))
+    coll = dlite.Collection()
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+    energy = Energy()
+    energy.energy = 2.1  # eV
+    coll.add("energy", energy)
+    HallPetch = dlite.get_instance("http://onto-ns.com/meta/0.4/HallPetch")
+    for n in range(3):
+        coll.add(f"hallpetch{n}", HallPetch())
+
+    # An instance of an unrelated datamodel that cannot be loaded
+    coll.add_relation("missing", "_is-a", "Instance")
+    coll.add_relation(
+        "missing", "_has-uuid", "0d6e6fd4-5e4b-4e1e-9b3a-0123456789ab"
+    )
+    coll.add_relation(
+        "missing", "_has-meta", "http://onto-ns.com/meta/0.4/HallPetch"
+    )
+
+    dlite.Instance.create_metadata(
+        "http://onto-ns.com/meta/0.1/LazyResult",
+        [],
+        [dlite.Property("potential_energy", "float64", unit="J")],
+        "Result with a single property.",
+    )
+    ts = Triplestore(backend="collection", collection=coll)
+    ENERGY = ts.bind("energy", "http://onto-ns.com/meta/0.1/Energy#")
+    CALC = ts.bind("calc", "http://onto-ns.com/meta/0.1/LazyResult#")
+    ts.add_triples(
+        [
+            (ENERGY.energy, MAP.mapsTo, EMMO.PotentialEnergy),
+            (CALC.potential_energy, MAP.mapsTo, EMMO.PotentialEnergy),
+        ]
+    )
+
+    loaded = []
+    collection_get = dlite.Collection.get
+
+    def get(self, label, *args, **kwargs):
+        loaded.append(label)
+        return collection_get(self, label, *args, **kwargs)
+
+    monkeypatch.setattr(dlite.Collection, "get", get)
+    inst = get_instance("http://onto-ns.com/meta/0.1/LazyResult", coll)
+    assert loaded == ["energy"]
+    assert np.allclose(inst.potential_energy, 3.36457e-19)  # Joule
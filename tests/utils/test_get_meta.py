@@ -0,0 +1,63 @@
+"""Tests oteapi-dlite.utils.get_meta()."""
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_get_meta_cache(tmp_path: "Path") -> None:
+    """Test that get_meta() caches both resolved and unresolved uris."""
+    import dlite
+
+    from oteapi_dlite.utils.utils import (
+        clear_meta_cache,
+        get_meta,
+        get_meta_cache_info,
+    )
+
+    clear_meta_cache()
+    uri = "http://onto-ns.com/meta/1.0/Image"
+    meta = get_meta(uri)
+    assert get_meta(uri) is meta
+    info = get_meta_cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+    missing = "urn:x-oteapi-dlite:NonExisting"
+    for _ in range(2):
+        with pytest.raises(dlite.DLiteError):
+            get_meta(missing)
+    assert get_meta_cache_info().negative_hits == 1
+
+    # Changing the storage path invalidates the cache
+    dlite.storage_path.append(str(tmp_path / "*.json"))
+    get_meta(uri)
+    info = get_meta_cache_info()
+    assert info.misses == 3
+    assert info.currsize == 1
+
+
+def test_get_meta_new_file(tmp_path: "Path") -> None:
+    """Test that get_meta() finds metadata added to a registered path
+    after a failed lookup."""
+    import json
+
+    import dlite
+
+    from oteapi_dlite.utils.storagepaths import register_storage_path
+    from oteapi_dlite.utils.utils import get_meta, get_meta_cache_info
+
+    register_storage_path(tmp_path / "*.json")
+    uri = "urn:x-oteapi-dlite:meta/0.1/AddedLater"
+    for _ in range(2):
+        with pytest.raises(dlite.DLiteError):
+            get_meta(uri)
+    negative_hits = get_meta_cache_info().negative_hits
+
+    entity = {"uri": uri, "dimensions": {}, "properties": {}}
+    (tmp_path / "AddedLater.json").write_text(json.dumps(entity))
+    assert get_meta(uri).uri == uri
+    assert get_meta_cache_info().negative_hits == negative_hits
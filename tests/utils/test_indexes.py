@@ -0,0 +1,121 @@
+"""Tests oteapi-dlite.utils.indexes."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_collection_index() -> None:
+    """Test building and updating an index."""
+    from oteapi_dlite.utils.indexes import CollectionIndex
+
+    relations = [
+        ("a", "_has-uuid", "uuid-a", "xsd:anyURI"),
+        ("a", "_has-meta", "http://onto-ns.com/meta/0.1/A", None),
+        ("b", "_has-uuid", "uuid-b", "xsd:anyURI"),
+        ("b", "_has-meta", "http://onto-ns.com/meta/0.1/B", None),
+        ("c", "_has-uuid", "uuid-c", "xsd:anyURI"),
+        ("c", "_has-meta", "http://onto-ns.com/meta/0.1/A", None),
+        ("x", "mapsTo", "y", None),
+    ]
+    index = CollectionIndex(relations)
+    assert index.nrelations == 7
+    assert index.get_labels() == ["a", "b", "c"]
+    assert index.get_labels("http://onto-ns.com/meta/0.1/A/") == ["a", "c"]
+    assert index.get_uuid("b") == "uuid-b"
+    assert index.get_relations("mapsTo") == [("x", "mapsTo", "y", None)]
+
+    index.update(
+        added=[("x", "mapsTo", "z", None)],
+        removed=[relations[0], relations[1], ("not", "in", "index", None)],
+    )
+    assert index.nrelations == 6
+    assert index.get_uuid("a") is None
+    assert index.get_labels("http://onto-ns.com/meta/0.1/A") == ["c"]
+    assert len(index.get_relations("mapsTo")) == 2
+
+    copy = CollectionIndex.from_dict(index.asdict())
+    assert copy.asdict() == index.asdict()
+    assert copy.nrelations == index.nrelations
+
+
+def test_persisted_index(entities_path: "Path") -> None:
+    """Test that the index follows saved and loaded collections."""
+    import gc
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils import persistence
+    from oteapi_dlite.utils.indexes import CollectionIndex
+
+    dlite.storage_path.append(entities_path)
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+    cache = DataCache()
+    coll = dlite.Collection()
+    coll.add("e0", Energy())
+    persistence.save_collection(coll, cache=cache)
+    index = persistence.get_index(coll)
+    assert index.get_labels(Energy.uri) == ["e0"]
+
+    # Saving a delta updates the index incrementally
+    coll.add("e1", Energy())
+    assert persistence.get_index(coll) is None  # not saved yet
+    persistence.save_collection(coll, cache=cache)
+    assert persistence.get_index(coll) is index
+    assert index.get_labels(Energy.uri) == ["e0", "e1"]
+    assert index.get_uuid("e1") == coll["e1"].uuid
+
+    # Changes keeping the number of relations also invalidate the index
+    coll.add_relation("a", "p", "b")
+    persistence.save_collection(coll, cache=cache)
+    coll.remove_relations("a", "p", "b")
+    coll.add_relation("c", "p", "d")
+    assert persistence.get_index(coll) is None
+    persistence.save_collection(coll, cache=cache)
+    assert persistence.get_index(coll).get_relations("p") == [
+        ("c", "p", "d", None)
+    ]
+
+    # Load in a "fresh interpreter" from the stored index and journal
+    uuid = coll.uuid
+    expected = index.asdict()
+    persistence.clear_live_cache()
+    del persistence._states[uuid]  # pylint: disable=protected-access
+    del coll, index
+    gc.collect()
+    coll = persistence.load_collection(uuid, cache=cache)
+    assert persistence.get_index(coll).asdict() == expected
+    assert (
+        CollectionIndex(persistence.get_relations(coll)).nrelations
+        == persistence.get_index(coll).nrelations
+    )
+
+
+def test_indexed_triplestore() -> None:
+    """Test that the indexed triplestore answers like the collection."""
+    import dlite
+    from tripper import MAP, Triplestore
+
+    from oteapi_dlite.utils.indexes import CollectionIndex, indexed_triplestore
+    from oteapi_dlite.utils.persistence import get_relations
+
+    coll = dlite.Collection()
+    for n in range(5):
+        coll.add_relation(f"http://ex.com/s{n}", MAP.mapsTo, "http://ex.com/o")
+        coll.add_relation(
+            f"http://ex.com/s{n}", "http://ex.com/p", "lit", "@en"
+        )
+    index = CollectionIndex(get_relations(coll))
+    ts = Triplestore(backend="collection", collection=coll)
+    its = indexed_triplestore(coll, index)
+
+    for pattern in [
+        (None, MAP.mapsTo, None),
+        ("http://ex.com/s1", MAP.mapsTo, None),
+        (None, MAP.mapsTo, "http://ex.com/o"),
+        (None, "http://ex.com/p", None),
+        ("http://ex.com/s1", None, None),
+    ]:
+        assert set(its.triples(pattern)) == set(ts.triples(pattern))
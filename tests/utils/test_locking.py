@@ -0,0 +1,95 @@
+"""Tests oteapi-dlite.utils.locking."""
+
+
+def test_collection_lock() -> None:
+    """Test that writers exclude readers and other writers."""
+    import threading
+    import time
+
+    from oteapi_dlite.utils.locking import collection_lock
+
+    lock = collection_lock("test-collection-lock")
+    assert collection_lock("test-collection-lock") is lock
+
+    events = []
+
+    def reader(n: int) -> None:
+        with lock.read():
+            events.append(("read", n))
+            time.sleep(0.05)
+            events.append(("done", n))
+
+    def writer() -> None:
+        with lock.write():
+            events.append(("write", None))
+            with lock.write(), lock.read():  # reentrant
+                time.sleep(0.02)
+            events.append(("done", None))
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(2)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    # Readers overlap each other, but not the writer
+    assert events[:2] == [("read", 0), ("read", 1)]
+    assert events[-2:] == [("write", None), ("done", None)]
+
+
+def test_read_lock_upgrade() -> None:
+    """Test that upgrading a read lock fails instead of deadlocking."""
+    import pytest
+
+    from oteapi_dlite.utils.locking import collection_lock
+
+    lock = collection_lock("test-read-lock-upgrade")
+    with lock.read():
+        with pytest.raises(RuntimeError, match="upgrade"):
+            with lock.write():
+                pass
+
+
+def _add_relations(collection_id: str, worker: int, n: int) -> None:
+    """Add `n` relations to a collection, saving after each of them."""
+    from oteapi_dlite.utils import get_collection, update_collection
+
+    for i in range(n):
+        coll = get_collection(collection_id=collection_id)
+        coll.add_relation(f"worker{worker}", "adds", f"relation{i}")
+        update_collection(coll)
+
+
+def test_concurrent_processes() -> None:
+    """Test that concurrent processes do not lose each others updates."""
+    import multiprocessing
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import clear_live_cache, load_collection
+    from oteapi_dlite.utils.utils import update_collection
+
+    coll = dlite.Collection()
+    update_collection(coll)
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_add_relations, args=(coll.uuid, worker, 10))
+        for worker in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    clear_live_cache()
+    coll = load_collection(coll.uuid, cache=DataCache())
+    assert set(coll.get_relations()) == {
+        (f"worker{worker}", "adds", f"relation{i}")
+        for worker in range(3)
+        for i in range(10)
+    }
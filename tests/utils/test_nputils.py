@@ -0,0 +1,49 @@
+"""Tests oteapi-dlite.utils.nputils."""
+
+import pytest
+
+
+def test_dict2recarray() -> None:
+    """Test dtype inference and missing values in dict2recarray()."""
+    import numpy as np
+
+    from oteapi_dlite.utils import dict2recarray
+
+    table = {
+        "int": [1, 2, 3],
+        "float": [1.5, None, 3],
+        "bool": [True, False, True],
+        "str": ["a", None, "abc"],
+        "bytes": [b"a", b"bc", None],
+        "missing": [None, None, None],
+    }
+    arr = dict2recarray(table)
+    assert arr.dtype.names == tuple(table)
+    assert arr.int.dtype == np.int64
+    assert arr.float.dtype == np.float64
+    assert np.isnan(arr.float[1])
+    assert arr.bool.dtype == np.bool_
+    assert arr.str.dtype == np.dtype("U3")
+    assert arr.str.tolist() == ["a", "", "abc"]
+    assert arr.bytes.dtype == np.dtype("S2")
+    assert np.isnan(arr.missing).all()
+
+    arr = dict2recarray(
+        table, names=list("abcdef"), dtypes={"int": "i2", "str": "U8"}
+    )
+    assert arr.a.dtype == np.int16
+    assert arr.d.dtype == np.dtype("U8")
+
+    with pytest.raises(ValueError, match="missing values"):
+        dict2recarray(table, dtypes={"float": int})
+
+    # Typed arrays are converted without going through object arrays
+    floats = np.array([1.0, np.nan, 3.0])
+    arr = dict2recarray(
+        {"x": floats[::2], "y": floats[::2]}, dtypes={"y": "i4"}
+    )
+    assert arr.x.dtype == np.float64
+    assert arr.y.dtype == np.int32
+    assert arr.y.tolist() == [1, 3]
+    with pytest.raises(ValueError, match="missing values"):
+        dict2recarray({"x": floats}, dtypes={"x": "i4"})
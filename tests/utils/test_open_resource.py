@@ -0,0 +1,76 @@
+"""Tests oteapi-dlite.utils.open_resource()."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_open_resource(
+    tmp_path: "Path", monkeypatch: "pytest.MonkeyPatch"
+) -> None:
+    """Test opening local files and small and large cached downloads."""
+    from oteapi.datacache import DataCache
+    from oteapi.models import ResourceConfig
+
+    from oteapi_dlite.utils import utils
+    from oteapi_dlite.utils.utils import open_resource
+
+    class Downloader:
+        """Download strategy adding `content` to the datacache."""
+
+        def __init__(self, content: bytes) -> None:
+            self.content = content
+
+        def get(self) -> dict:
+            """Add the content to the datacache and return its key."""
+            return {"key": DataCache().add(self.content)}
+
+    (tmp_path / "local.bin").write_bytes(b"local")
+    config = ResourceConfig(
+        downloadUrl=(tmp_path / "local.bin").as_uri(),
+        mediaType="application/octet-stream",
+    )
+    with open_resource(config) as stream:
+        assert stream.read() == b"local"
+
+    config = ResourceConfig(
+        downloadUrl="https://example.com/data.bin",
+        mediaType="application/octet-stream",
+    )
+    for content in (b"small", bytes(range(256)) * 1024):
+        monkeypatch.setattr(
+            utils,
+            "create_strategy",
+            lambda kind, config, content=content: Downloader(content),
+        )
+        with open_resource(config) as stream:
+            assert stream.read() == content
+
+
+def test_open_resource_missing(monkeypatch: "pytest.MonkeyPatch") -> None:
+    """Test opening a download missing from the datacache."""
+    import pytest
+    from oteapi.models import ResourceConfig
+
+    from oteapi_dlite.utils import utils
+    from oteapi_dlite.utils.utils import open_resource
+
+    class Downloader:
+        """Download strategy returning a key that is not in the cache."""
+
+        def get(self) -> dict:
+            """Return a missing key."""
+            return {"key": "oteapi-dlite-missing-download"}
+
+    monkeypatch.setattr(
+        utils, "create_strategy", lambda kind, config: Downloader()
+    )
+    config = ResourceConfig(
+        downloadUrl="https://example.com/data.bin",
+        mediaType="application/octet-stream",
+    )
+    with pytest.raises(KeyError, match="oteapi-dlite-missing-download"):
+        open_resource(config)
@@ -0,0 +1,209 @@
+"""Tests oteapi-dlite.utils.persistence."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_save_writes_delta() -> None:
+    """Test that saving a modified collection only journals the delta."""
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import journal_key, save_collection
+
+    cache = DataCache()
+    coll = dlite.Collection()
+    for i in range(100):
+        coll.add_relation(f"s{i}", "p", f"o{i}")
+    save_collection(coll, cache=cache)
+    assert cache.get(journal_key(coll.uuid)) == 0
+
+    coll.add_relation("new", "p", "o")
+    coll.remove_relations("s0", "p", "o0")
+    save_collection(coll, cache=cache)
+
+    assert cache.get(journal_key(coll.uuid)) == 1
+    delta = cache.get(journal_key(coll.uuid, 0))
+    assert delta["add"] == [("new", "p", "o", None)]
+    assert delta["remove"] == [("s0", "p", "o0", None)]
+
+    # Saving an unchanged collection does not add journal entries
+    save_collection(coll, cache=cache)
+    assert cache.get(journal_key(coll.uuid)) == 1
+
+
+def test_load_replays_journal() -> None:
+    """Test that a collection is restored from its base and journal."""
+    import gc
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import (
+        clear_live_cache,
+        journal_key,
+        load_collection,
+        save_collection,
+    )
+
+    cache = DataCache()
+    coll = dlite.Collection()
+    coll.add_relation("a", "p", "b")
+    coll.add_relation("c", "p", "d")
+    save_collection(coll, cache=cache)
+    coll.add_relation("e", "p", "f")
+    save_collection(coll, cache=cache)
+    coll.remove_relations("a", "p", "b")
+    save_collection(coll, cache=cache)
+
+    uuid = coll.uuid
+    expected = set(coll.get_relations())
+    clear_live_cache()
+    del coll
+    gc.collect()
+    assert not dlite.has_instance(uuid, check_storages=False)
+
+    coll = load_collection(uuid, cache=cache)
+    assert set(coll.get_relations()) == expected
+
+    # Compaction folds the journal into a new base
+    save_collection(coll, cache=cache, compact=True)
+    assert cache.get(journal_key(uuid)) == 0
+    assert journal_key(uuid, 0) not in cache
+
+
+def test_live_cache() -> None:
+    """Test that live collections are reused until another writer saves."""
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import (
+        get_version,
+        journal_key,
+        load_collection,
+        save_collection,
+        version_key,
+    )
+
+    cache = DataCache()
+    coll = dlite.Collection()
+    coll.add_relation("a", "p", "b")
+    save_collection(coll, cache=cache)
+    assert load_collection(coll.uuid, cache=cache) is coll
+
+    # Emulate another interpreter appending to the journal
+    version = get_version(coll.uuid, cache=cache)
+    nentries = cache.get(journal_key(coll.uuid))
+    cache.add(
+        {"add": [("c", "p", "d", None)], "remove": []},
+        key=journal_key(coll.uuid, nentries),
+    )
+    cache.add(nentries + 1, key=journal_key(coll.uuid))
+    cache.add(version + 1, key=version_key(coll.uuid))
+
+    coll2 = load_collection(coll.uuid, cache=cache)
+    assert coll2.uuid == coll.uuid
+    assert set(coll2.get_relations()) == {("a", "p", "b"), ("c", "p", "d")}
+
+
+def test_save_merges_concurrent_changes() -> None:
+    """Test that saving does not overwrite changes saved by others."""
+    import dlite
+    import pytest
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.exceptions import CollectionVersionConflict
+    from oteapi_dlite.utils.persistence import (
+        get_version,
+        journal_key,
+        load_collection,
+        save_collection,
+        version_key,
+    )
+
+    cache = DataCache()
+    coll = dlite.Collection()
+    coll.add_relation("a", "p", "b")
+    coll.add_relation("c", "p", "d")
+    save_collection(coll, cache=cache)
+
+    # Emulate another interpreter adding and removing a relation
+    version = get_version(coll.uuid, cache=cache)
+    nentries = cache.get(journal_key(coll.uuid))
+    cache.add(
+        {"add": [("e", "p", "f", None)], "remove": [("a", "p", "b", None)]},
+        key=journal_key(coll.uuid, nentries),
+    )
+    cache.add(nentries + 1, key=journal_key(coll.uuid))
+    cache.add(version + 1, key=version_key(coll.uuid))
+
+    coll.add_relation("g", "p", "h")
+    with pytest.raises(CollectionVersionConflict):
+        save_collection(coll, cache=cache, expected_version=version)
+    save_collection(coll, cache=cache, expected_version=version + 1)
+
+    expected = {("c", "p", "d"), ("e", "p", "f"), ("g", "p", "h")}
+    assert set(coll.get_relations()) == expected
+    assert get_version(coll.uuid, cache=cache) == version + 2
+    assert load_collection(coll.uuid, cache=cache) is coll
+    assert set(coll.get_relations()) == expected
+
+
+def test_save_records_changes(entities_path: "Path") -> None:
+    """Test that changes are journaled from the recorded modifications."""
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils import persistence
+
+    dlite.storage_path.append(entities_path)
+    Energy = dlite.get_instance("http://onto-ns.com/meta/0.1/Energy")
+    cache = DataCache()
+    coll = dlite.Collection()
+    coll.add("e0", Energy())
+    coll.add_relation("a", "p", "b")
+    persistence.save_collection(coll, cache=cache)
+
+    e1 = Energy()
+    coll.add("e1", e1)
+    coll.remove("e0")
+    coll.add_relation("c", "p", "d")
+    coll.remove_relations("c", "p", "d")
+    coll.remove_relations("a", "p", "b")
+    coll.add_relation("a", "p", "b")
+    persistence.save_collection(coll, cache=cache)
+
+    delta = cache.get(persistence.journal_key(coll.uuid, 0))
+    assert delta["add"] == [
+        ("e1", "_is-a", "Instance", None),
+        ("e1", "_has-uuid", e1.uuid, "xsd:anyURI"),
+        ("e1", "_has-meta", Energy.uri, None),
+    ]
+    assert {r[0] for r in delta["remove"]} == {"e0"}
+    assert len(delta["remove"]) == 3
+
+    # The persisted state of collections is evicted like live collections
+    for _ in range(persistence.LIVE_CACHE_MAXSIZE + 1):
+        persistence.save_collection(dlite.Collection(), cache=cache)
+    states = persistence._states  # pylint: disable=protected-access
+    assert len(states) <= persistence.LIVE_CACHE_MAXSIZE
+
+
+def test_tracking_is_per_object() -> None:
+    """Test that only collections saved or loaded are tracked."""
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.utils.persistence import save_collection
+
+    add_relation = dlite.Collection.add_relation
+    coll = dlite.Collection()
+    other = dlite.Collection()
+    save_collection(coll, cache=DataCache())
+
+    assert dlite.Collection.add_relation is add_relation
+    assert other.__class__ is dlite.Collection
+    assert isinstance(coll, dlite.Collection)
+    assert coll.__class__.add_relation is not add_relation
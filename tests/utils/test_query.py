@@ -0,0 +1,98 @@
+"""Tests oteapi-dlite.utils.query."""
+
+import pytest
+
+
+@pytest.fixture
+def samples():
+    """An instance with 1000 rows of mixed types."""
+    import dlite
+    import numpy as np
+
+    Samples = dlite.Instance.from_dict(
+        {
+            "uri": "http://onto-ns.com/meta/0.1/Samples",
+            "description": "Test samples.",
+            "dimensions": {"n": "Number of samples.", "m": "Components."},
+            "properties": {
+                "name": {"type": "string8", "shape": ["n"]},
+                "temperature": {"type": "float64", "shape": ["n"]},
+                "position": {"type": "float64", "shape": ["n", "m"]},
+                "weights": {"type": "float64", "shape": ["m"]},
+                "scale": {"type": "float64"},
+            },
+        }
+    )
+    n = 1000
+    samples = Samples(dimensions={"n": n, "m": 2})
+    samples.name = [f"s{i % 10}" for i in range(n)]
+    samples.temperature = np.arange(n, dtype=float)
+    samples.position = np.arange(2 * n, dtype=float).reshape(n, 2)
+    samples.weights = [0.5, 2.0]
+    samples.scale = 3.0
+    return samples
+
+
+def test_filter_instance(samples) -> None:
+    """Test filtering rows."""
+    import numpy as np
+
+    from oteapi_dlite.utils.query import filter_instance
+
+    new = filter_instance(
+        samples, "(temperature >= 100) & (name in ['s1', 's2'])"
+    )
+    assert new.dimensions == {"n": 180, "m": 2}
+    assert set(new.name) == {b"s1", b"s2"}
+    assert np.all(new.temperature >= 100)
+    assert np.array_equal(new.position[:, 0], 2 * new.temperature)
+    assert np.array_equal(new.weights, samples.weights)
+    assert new.scale == 3.0
+
+    new = filter_instance(samples, "position[1] > 100 and not name == 's0'")
+    assert new.temperature[0] == 51
+    assert b"s0" not in set(new.name)
+
+    new = filter_instance(samples, "startswith(name, 's9')", limit=3)
+    assert list(new.temperature) == [9, 19, 29]
+
+    assert filter_instance(samples, "all(position >= 0)") is samples
+    assert filter_instance(samples, "scale > 2") is samples
+    assert filter_instance(samples, "scale > 5") is None
+
+    with pytest.raises(KeyError):
+        filter_instance(samples, "pressure > 0")
+    with pytest.raises(ValueError, match="any\\(\\) or all\\(\\)"):
+        filter_instance(samples, "position > 0")
+    with pytest.raises(ValueError, match="first dimension"):
+        filter_instance(samples, "(temperature > 0) & all(weights > 0)")
+
+
+def test_compile_query() -> None:
+    """Test that only safe expressions are accepted."""
+    from oteapi_dlite.utils.query import compile_query
+
+    assert compile_query("0 < a < b[-1]").names == {"a", "b"}
+    assert compile_query("a > 1") is compile_query("a > 1")
+    assert compile_query("sqrt(a**2 + b**-0.5) > 1").names == {"a", "b"}
+    assert compile_query("2 * a + [1, 2] > b[0] - 1").names == {"a", "b"}
+    for expression in [
+        "__import__('os')",
+        "a.__class__",
+        "a[b]",
+        "a[1:]",
+        "open(a)",
+        "lambda: 1",
+        "a if b else c",
+        "a >",
+        "9**9**9 > a",
+        "a**9**9 > 1",
+        "a**b > 1",
+        "2**a > 1",
+        "a**17 > 1",
+        "'a' * 3000000000 == x",
+        "[0] * 400000000 == x",
+        "x + [0] * 400000000 > 1",
+    ]:
+        with pytest.raises(ValueError):
+            compile_query(expression)
@@ -0,0 +1,74 @@
+"""Tests oteapi-dlite.utils.storagepaths."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_register_storage_path(tmp_path: "Path", entities_path: "Path") -> None:
+    """Test that storage paths are deduplicated and indexed."""
+    import shutil
+
+    import dlite
+
+    from oteapi_dlite.utils.storagepaths import (
+        find_metadata,
+        load_metadata,
+        register_storage_path,
+        registered_storage_paths,
+    )
+
+    shutil.copy(entities_path / "Energy.json", tmp_path)
+    assert register_storage_path(tmp_path)
+    assert not register_storage_path(tmp_path)
+    assert registered_storage_paths().count(str(tmp_path)) == 1
+    assert dlite.storage_path.aslist().count(str(tmp_path)) == 1
+
+    assert find_metadata("http://onto-ns.com/meta/0.1/Energy") == (
+        tmp_path / "Energy.json"
+    )
+    assert find_metadata("http://onto-ns.com/meta/0.1/Forces") is None
+
+    # New files are picked up when the directory is modified
+    shutil.copy(entities_path / "Forces.json", tmp_path)
+    assert find_metadata("http://onto-ns.com/meta/0.1/Forces") == (
+        tmp_path / "Forces.json"
+    )
+
+    meta = load_metadata("http://onto-ns.com/meta/0.1/Forces")
+    assert meta.is_meta
+    assert meta.uri == "http://onto-ns.com/meta/0.1/Forces"
+
+
+def test_register_glob_storage_path(tmp_path: "Path") -> None:
+    """Test that glob patterns with wildcard directories are watched."""
+    import json
+    import os
+    import time
+
+    from oteapi_dlite.utils.storagepaths import (
+        find_metadata,
+        register_storage_path,
+    )
+
+    def write_entity(dirname: str, name: str) -> "Path":
+        path = tmp_path / dirname / "entities"
+        path.mkdir(parents=True)
+        uri = f"http://onto-ns.com/meta/0.1/{name}"
+        entity = {"uri": uri, "dimensions": {}, "properties": {}}
+        (path / f"{name}.json").write_text(json.dumps(entity))
+        return path / f"{name}.json"
+
+    first = write_entity("a", "GlobFirst")
+    # Make all modification times old enough to be trusted
+    old = time.time() - 3600
+    for dirname in (tmp_path, first.parent.parent, first.parent):
+        os.utime(dirname, (old, old))
+
+    assert register_storage_path(tmp_path / "*" / "entities" / "*.json")
+    assert find_metadata("http://onto-ns.com/meta/0.1/GlobFirst") == first
+
+    # New directories matching the pattern are picked up
+    second = write_entity("b", "GlobSecond")
+    assert find_metadata("http://onto-ns.com/meta/0.1/GlobSecond") == second
@@ -0,0 +1,116 @@
+"""Tests oteapi-dlite.utils.streaming."""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_iter_json(entities_path: "Path") -> None:
+    """Test that the streamed JSON equals the DLite JSON serialisation."""
+    import json
+
+    import dlite
+    import numpy as np
+
+    from oteapi_dlite.utils.streaming import iter_json, open_json_stream
+
+    dlite.storage_path.append(entities_path)
+    Image = dlite.get_instance("http://onto-ns.com/meta/1.0/Image")
+    image = Image([40, 30, 3])
+    image.data = (np.arange(3600) % 256).reshape(40, 30, 3).astype(np.uint8)
+
+    chunks = list(iter_json(image, chunk_size=256))
+    assert len(chunks) > 10
+    assert json.loads(b"".join(chunks)) == json.loads(image.asjson())
+
+    with open_json_stream([image, image.meta], chunk_size=256) as f:
+        data = json.loads(f.read())
+    assert set(data) == {image.uuid, image.meta.uuid}
+
+    copy = dlite.Instance.from_json(json.dumps({image.uuid: data[image.uuid]}))
+    assert np.array_equal(copy.data, image.data)
+
+
+def test_generate_streaming(tmp_path: "Path", entities_path: "Path") -> None:
+    """Test streaming instances from the generate strategy."""
+    import json
+
+    import dlite
+    from oteapi.datacache import DataCache
+
+    from oteapi_dlite.strategies.generate import (
+        DLiteGenerateConfig,
+        DLiteGenerateStrategy,
+    )
+
+    dlite.storage_path.append(entities_path)
+    coll = dlite.Collection()
+    Image = dlite.get_instance("http://onto-ns.com/meta/1.0/Image")
+    image = Image([4, 5, 1])
+    coll.add("image", image)
+
+    config = DLiteGenerateConfig(
+        functionType="application/vnd.dlite-generate",
+        configuration={
+            "label": "image",
+            "driver": "json",
+            "chunk_size": 16,
+            "collection_id": coll.uuid,
+            "datacache_config": {"accessKey": "image-stream"},
+        },
+    )
+    DLiteGenerateStrategy(config).get()
+    data = json.loads(DataCache().get("image-stream"))
+    assert data == json.loads(image.asjson())
+
+    config.configuration.datacache_config = None
+    config.configuration.location = str(tmp_path / "image.json")
+    DLiteGenerateStrategy(config).get()
+    copy = dlite.Instance.from_location("json", tmp_path / "image.json")
+    assert copy.uuid == image.uuid
+
+
+def test_load_json_stream(entities_path: "Path") -> None:
+    """Test parsing a JSON document incrementally."""
+    import io
+    import json
+
+    import dlite
+    import numpy as np
+    import pytest
+
+    from oteapi_dlite.utils.streaming import load_json_stream
+
+    dlite.storage_path.append(entities_path)
+    Image = dlite.get_instance("http://onto-ns.com/meta/1.0/Image")
+    data = (np.arange(360) % 256).reshape(4, 30, 3).astype(np.uint8)
+    document = json.dumps(
+        {
+            "ignored": [{"data": "[]"}, '\\"data\\": [[[1]]]'],
+            "data": data.tolist(),
+        },
+        indent=1,
+    ).encode()
+
+    for chunk_size in (1, 7, 4096):
+        image = load_json_stream(io.BytesIO(document), Image, chunk_size)
+        assert image.dimensions == {"nheight": 4, "nwidth": 30, "nbands": 3}
+        assert np.array_equal(image.data, data)
+
+    for invalid in [
+        b'{"data": [[[1, 2]], [[3]]]}',
+        b'{"data": [[[1, 2]]]',
+        b'{"data": [[["1"]]]}',
+        b'{"data": [[[1, 2]]] "x": 1}',
+        b'{"data": [[[1, 2, 3], [4]], [[5], [6, 7, 8]]]}',
+        b'{"data": [[[1], 2], [[3], 4]]}',
+        b'{"data": [[[1, 2]], [[]]]}',
+        b'{"data": [[[1,, 2]]]}',
+        b'{"data": [[[1 2]]]}',
+        b'{"data": [[[1, 2,]]]}',
+        b'{"data": [[[, 1]]]}',
+        b'{"data": [[[1]] [[2]]]}',
+    ]:
+        with pytest.raises(ValueError):
+            load_json_stream(io.BytesIO(invalid), Image, 4)